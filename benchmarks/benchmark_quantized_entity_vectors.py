@@ -0,0 +1,79 @@
+from word2vec_wikification_py.load_entity_model import load_entity_model
+from word2vec_wikification_py.entity_vector_store import EntityVectorStore, convert_entity_model
+from word2vec_wikification_py.make_lattice import make_lattice_object
+from word2vec_wikification_py.models import WikipediaArticleObject
+from tempfile import mkdtemp
+import argparse
+import shutil
+import copy
+import numpy
+import os
+
+"""In this benchmark, you see memory size of quantized entity vectors and agreement of top-1 routes with float32 vectors.
+Sequences are the same as fixtures in tests/
+
+python benchmarks/benchmark_quantized_entity_vectors.py bin/entity_vector/entity_vector.model.bin
+"""
+
+SEQ_FIXTURE = [
+    [
+        WikipediaArticleObject(page_title='ヤマハ', candidate_article_name=['[ヤマハ]', '[ヤマハ発動機]']),
+        WikipediaArticleObject(page_title='スズキ', candidate_article_name=['[スズキ_(企業)]', '[スズキ_(魚)]']),
+        WikipediaArticleObject(page_title='ドゥカティ', candidate_article_name=['[ドゥカティ]'])
+    ],
+    [
+        WikipediaArticleObject(page_title='お笑いタレント', candidate_article_name=['[お笑いタレント]']),
+        WikipediaArticleObject(page_title='ロバート', candidate_article_name=['[ロバート_(お笑いトリオ)]', '[ロバート]']),
+        WikipediaArticleObject(page_title='山本博', candidate_article_name=['[山本博_(お笑い芸人)]', '[山本博_(アーチェリー選手)]', '山本博_(弁護士)', '[山本博_(柔道家)]']),
+        WikipediaArticleObject(page_title='エンタの神様', candidate_article_name=['[エンタの神様]']),
+        WikipediaArticleObject(page_title='日テレ', candidate_article_name=['[日本テレビ放送網]']),
+        WikipediaArticleObject(page_title='さんま御殿', candidate_article_name=['[踊る!さんま御殿!!]']),
+    ]
+]
+
+
+def decode_fixtures(entity_vector_model):
+    """* What you can do
+    - You get (top-1 labels, all transition scores) of each fixture
+    """
+    seq_result = []
+    for seq_wiki_article_name in SEQ_FIXTURE:
+        lattice_object = make_lattice_object(seq_wiki_article_name=copy.deepcopy(seq_wiki_article_name),
+                                             entity_vector_model=entity_vector_model)
+        best_route = lattice_object.get_score_routes(top_k=1)[0]
+        seq_result.append((best_route.get_tokens(), numpy.array(lattice_object.transition_matrix.data, dtype=numpy.float64)))
+    return seq_result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of quantized entity vectors')
+    parser.add_argument('path_entity_model', help='path to word2vec model file or EntityVectorStore directory')
+    parser.add_argument('--path-working-dir', default=None, help='directory where quantized stores are written')
+    args = parser.parse_args()
+
+    float32_store = load_entity_model(args.path_entity_model, is_use_cache=True)  # type: EntityVectorStore
+    path_working_dir = mkdtemp() if args.path_working_dir is None else args.path_working_dir
+    try:
+        float32_result = decode_fixtures(float32_store)
+        print('{:>8} {:>12} {:>8} {:>16} {:>18}'.format('dtype', 'size(MB)', 'saved', 'top-1 agreement', 'max score error'))
+        for vector_dtype in ('float32', 'float16', 'int8'):
+            if vector_dtype == 'float32':
+                store_object = float32_store
+            else:
+                store_object = convert_entity_model(float32_store, os.path.join(path_working_dir, vector_dtype), vector_dtype=vector_dtype)
+            seq_result = decode_fixtures(store_object)
+            n_agreement = sum(1 for (tokens, _), (float32_tokens, _) in zip(seq_result, float32_result) if tokens == float32_tokens)
+            max_error = max(float(numpy.max(numpy.abs(scores - float32_scores)))
+                            for (_, scores), (_, float32_scores) in zip(seq_result, float32_result))
+            print('{:>8} {:>12.1f} {:>7.1f}% {:>16} {:>18.6f}'.format(
+                vector_dtype,
+                store_object.get_memory_size() / (1024 * 1024),
+                100.0 * (1.0 - store_object.get_memory_size() / float32_store.get_memory_size()),
+                '{}/{}'.format(n_agreement, len(SEQ_FIXTURE)),
+                max_error))
+    finally:
+        if args.path_working_dir is None: shutil.rmtree(path_working_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -52,5 +52,8 @@ setup(
     classifiers=classifiers,
     test_suite='tests',
     include_package_data=True,
-    zip_safe=False
+    zip_safe=False,
+    entry_points={
+        'console_scripts': ['word2vec-wikification=word2vec_wikification_py.cli:main']
+    }
 )
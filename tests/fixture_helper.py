@@ -0,0 +1,28 @@
+from word2vec_wikification_py import local_wiki_index, entity_vector_store
+from typing import Tuple
+import numpy
+import os
+
+# a tiny wikipedia-dump. "ホンダ" is a redirect page to "本田技研工業"
+SEQ_PAGE_RECORD = [(1, 'ヤマハ', 0), (2, 'スズキ_(企業)', 0), (3, 'スズキ_(魚)', 0), (4, 'ホンダ', 1), (5, '本田技研工業', 0)]
+SEQ_REDIRECT_RECORD = [(4, '本田技研工業')]
+SEQ_ENTITY_WORD = ['[ヤマハ]', '[スズキ_(企業)]', '[スズキ_(魚)]', '[本田技研工業]']
+
+
+def build_wiki_fixture(path_working_dir:str)->Tuple[str, str]:
+    """* What you can do
+    - You make a LocalWikipediaIndex and an EntityVectorStore with random vectors in path_working_dir.
+
+    * Output
+    - (path to the index file, path to the store directory)
+    """
+    path_index_file = os.path.join(path_working_dir, 'index.sqlite')
+    local_wiki_index.build_local_index(path_index_file=path_index_file,
+                                       iterable_page_record=iter(SEQ_PAGE_RECORD),
+                                       iterable_redirect_record=iter(SEQ_REDIRECT_RECORD)).close()
+    path_store_dir = os.path.join(path_working_dir, 'store')
+    random_state = numpy.random.RandomState(0)
+    entity_vector_store.save_entity_vector_store(seq_word=SEQ_ENTITY_WORD,
+                                                 vector_matrix=random_state.normal(size=(len(SEQ_ENTITY_WORD), 8)).astype(numpy.float32),
+                                                 path_store_dir=path_store_dir)
+    return path_index_file, path_store_dir
@@ -0,0 +1,74 @@
+from word2vec_wikification_py import async_interface, interface
+from word2vec_wikification_py.local_wiki_index import LocalWikipediaIndex
+from word2vec_wikification_py.entity_vector_store import EntityVectorStore
+from word2vec_wikification_py.cache_objects import CandidateCacheObject
+from tests import fixture_helper
+import asyncio
+import unittest
+import tempfile
+import shutil
+
+
+class TestAsyncInterface(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.path_working_dir = tempfile.mkdtemp()
+        path_index_file, path_store_dir = fixture_helper.build_wiki_fixture(cls.path_working_dir)
+        cls.local_index = LocalWikipediaIndex(path_index_file)
+        cls.entity_vector_model = EntityVectorStore(path_store_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        cls.local_index.close()
+        shutil.rmtree(cls.path_working_dir)
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        pass
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def test_predict_sentences_async(self):
+        seq_input_tokens = [['ヤマハ', 'バイク', 'スズキ'], ['ホンダ', 'スズキ'], ['スズキ', 'ヤマハ']]
+        seq_result = asyncio.run(async_interface.predict_sentences_async(seq_input_tokens=seq_input_tokens,
+                                                                         wikipedia_db_connector=self.local_index,
+                                                                         entity_vector_model=self.entity_vector_model,
+                                                                         max_concurrency=2))
+        self.assertEqual(len(seq_result), len(seq_input_tokens))
+        for input_tokens, seq_sequence_score in zip(seq_input_tokens, seq_result):
+            seq_expected = interface.predict_japanese_wiki_names_with_wikidump(input_tokens=input_tokens,
+                                                                               wikipedia_db_connector=self.local_index,
+                                                                               entity_vector_model=self.entity_vector_model)
+            self.assertEqual([(sequence_score.get_tokens(), sequence_score.sequence_score) for sequence_score in seq_sequence_score],
+                             [(sequence_score.get_tokens(), sequence_score.sequence_score) for sequence_score in seq_expected])
+
+
+    def test_predict_async_with_caches(self):
+        """キャッシュと候補の枝刈りを指定した非同期版の結果が同期版と一致するかのテスト
+        """
+        candidate_cache = CandidateCacheObject(max_size=10)
+        input_tokens = ['ヤマハ', 'バイク', 'スズキ', 'ホンダ']
+        kwargs = {'top_k': 2, 'max_candidates': 1, 'candidate_prior': {'[スズキ_(魚)]': 10.0}}
+        for _ in range(0, 2):
+            seq_sequence_score = asyncio.run(async_interface.predict_japanese_wiki_names_async(input_tokens=input_tokens,
+                                                                                               wikipedia_db_connector=self.local_index,
+                                                                                               entity_vector_model=self.entity_vector_model,
+                                                                                               candidate_cache=candidate_cache,
+                                                                                               **kwargs))
+            seq_expected = interface.predict_japanese_wiki_names_with_wikidump(input_tokens=input_tokens,
+                                                                               wikipedia_db_connector=self.local_index,
+                                                                               entity_vector_model=self.entity_vector_model,
+                                                                               **kwargs)
+            self.assertEqual([(sequence_score.get_tokens(), sequence_score.sequence_score) for sequence_score in seq_sequence_score],
+                             [(sequence_score.get_tokens(), sequence_score.sequence_score) for sequence_score in seq_expected])
+        self.assertEqual(candidate_cache.get_candidates('スズキ'), ['スズキ_(企業)', 'スズキ_(魚)'])
+        self.assertEqual((candidate_cache.get_statistics()['hits'], candidate_cache.get_statistics()['misses']), (4 + 1, 4))
+        self.assertEqual(seq_sequence_score[0].get_tokens()[1], '[スズキ_(魚)]')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+from word2vec_wikification_py import batch_interface, interface
+from word2vec_wikification_py.entity_vector_store import EntityVectorStore
+from word2vec_wikification_py.local_wiki_index import LocalWikipediaIndex
+from tests import fixture_helper
+from functools import partial
+import numpy
+import unittest
+import tempfile
+import shutil
+
+
+class TestBatchInterface(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.path_working_dir = tempfile.mkdtemp()
+        cls.path_index_file, path_store_dir = fixture_helper.build_wiki_fixture(cls.path_working_dir)
+        cls.entity_vector_model = EntityVectorStore(path_store_dir)
+        cls.seq_input_tokens = [['ヤマハ', 'バイク', 'スズキ'], ['ホンダ', 'スズキ'], [], ['スズキ', 'ヤマハ', 'ホンダ']] * 3
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        shutil.rmtree(cls.path_working_dir)
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        pass
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def test_predict_japanese_wiki_names_batch(self):
+        with LocalWikipediaIndex(self.path_index_file) as local_index:
+            seq_expected = [
+                [(sequence_score.get_tokens(), sequence_score.sequence_score)
+                 for sequence_score in interface.predict_japanese_wiki_names_with_wikidump(input_tokens=input_tokens,
+                                                                                          wikipedia_db_connector=local_index,
+                                                                                          entity_vector_model=self.entity_vector_model)][:2]
+                for input_tokens in self.seq_input_tokens]
+
+        for n_process in [0, 2]:
+            iterator_result = batch_interface.predict_japanese_wiki_names_batch(iterable_input_tokens=iter(self.seq_input_tokens),
+                                                                                entity_vector_store=self.entity_vector_model,
+                                                                                connector_factory=partial(LocalWikipediaIndex, self.path_index_file),
+                                                                                n_process=n_process,
+                                                                                chunk_size=2,
+                                                                                max_in_flight=2,
+                                                                                top_k=2)
+            seq_result = [[(sequence_score.get_tokens(), sequence_score.sequence_score) for sequence_score in seq_sequence_score]
+                          for seq_sequence_score in iterator_result]
+            self.assertEqual(len(seq_result), len(seq_expected))
+            for result, expected in zip(seq_result, seq_expected):
+                self.assertEqual([tokens for tokens, score in result], [tokens for tokens, score in expected])
+                numpy.testing.assert_allclose([score for tokens, score in result], [score for tokens, score in expected], rtol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
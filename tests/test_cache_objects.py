@@ -0,0 +1,297 @@
+from word2vec_wikification_py.cache_objects import LruCacheObject, SimilarityCacheObject, SqliteCacheObject, ResultCacheObject, \
+    CandidateCacheObject, make_result_cache_key
+from word2vec_wikification_py.models import WikipediaArticleObject
+from word2vec_wikification_py import interface, entity_vector_store, make_lattice
+import numpy
+import threading
+import time
+import tempfile
+import shutil
+import copy
+import json
+import os
+import unittest
+
+
+def cache_object_entry_bytes()->int:
+    return SimilarityCacheObject().get_entry_bytes(SimilarityCacheObject.make_key('[ヤマハ]', '[10]'), 0.5)
+
+
+class TestCacheObjects(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.path_working_dir = tempfile.mkdtemp()
+        seq_word = ['[ヤマハ]', '[ヤマハ発動機]', '[スズキ_(企業)]', '[スズキ_(魚)]', '[ドゥカティ]']
+        cls.entity_vector_model = entity_vector_store.save_entity_vector_store(
+            seq_word=seq_word,
+            vector_matrix=numpy.random.RandomState(0).normal(size=(len(seq_word), 8)).astype(numpy.float32),
+            path_store_dir=os.path.join(cls.path_working_dir, 'store'))
+        cls.seq_wiki_article_name = [
+            WikipediaArticleObject(page_title='ヤマハ', candidate_article_name=['[ヤマハ]', '[ヤマハ発動機]']),
+            WikipediaArticleObject(page_title='スズキ', candidate_article_name=['[スズキ_(企業)]', '[スズキ_(魚)]']),
+            WikipediaArticleObject(page_title='ドゥカティ', candidate_article_name=['[ドゥカティ]']),
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        shutil.rmtree(cls.path_working_dir)
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        pass
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def test_lru_cache_object(self):
+        cache_object = LruCacheObject(max_size=2)
+        cache_object.put('a', 1)
+        cache_object.put('b', 2)
+        self.assertEqual(cache_object.get('a'), 1)
+        # 'b' is the least recently used key
+        cache_object.put('c', 3)
+        self.assertEqual(cache_object.get('b'), None)
+        self.assertEqual(cache_object.get_many(['a', 'c']), [1, 3])
+        self.assertEqual(cache_object.get_statistics(),
+                         {'hits': 3, 'misses': 1, 'evictions': 1, 'expirations': 0, 'size': 2, 'max_size': 2})
+
+    def test_similarity_cache_object(self):
+        cache_object = SimilarityCacheObject(max_size=10)
+        cache_object.put_similarity('[ヤマハ発動機]', '[スズキ_(企業)]', 0.5)
+        self.assertEqual(cache_object.get_similarity('[スズキ_(企業)]', '[ヤマハ発動機]'), 0.5)
+        self.assertEqual(cache_object.get_many_similarity([('[ヤマハ発動機]', '[スズキ_(企業)]'), ('[ヤマハ]', '[ドゥカティ]')]),
+                         [0.5, None])
+
+    def test_similarity_cache_block(self):
+        """スコアブロックが候補ペアのキャッシュから作られ、足りない行だけ計算されるかのテスト
+        """
+        cache_object = SimilarityCacheObject(max_size=100)
+        lattice_array = make_lattice.make_lattice_array(self.seq_wiki_article_name, self.entity_vector_model,
+                                                        similarity_cache=cache_object)
+        self.assertEqual(cache_object.get_statistics()['hits'], 0)
+        self.assertEqual(cache_object.get_statistics()['misses'], 2 * 2 + 2 * 1)
+        self.assertEqual(len(cache_object), 2 * 2 + 2 * 1)
+        # a key is an unordered pair, so a swapped block is also cached
+        cached_matrix, is_cached = cache_object.get_block(['[スズキ_(企業)]', '[スズキ_(魚)]'], ['[ヤマハ]', '[ヤマハ発動機]'])
+        self.assertTrue(is_cached.all())
+        numpy.testing.assert_allclose(cached_matrix, lattice_array.get_score_matrix(0).T)
+
+        cached_lattice_array = make_lattice.make_lattice_array(self.seq_wiki_article_name, self.entity_vector_model,
+                                                               similarity_cache=cache_object)
+        self.assertEqual(cached_lattice_array.score_buffer.tolist(), lattice_array.score_buffer.tolist())
+        self.assertEqual(cache_object.get_statistics()['hits'], 4 + 6)
+
+        # an added candidate misses only its own pairs
+        seq_wiki_article_name = [self.seq_wiki_article_name[0],
+                                 WikipediaArticleObject(page_title='スズキ', candidate_article_name=['[スズキ_(企業)]', '[ドゥカティ]'])]
+        lattice_array = make_lattice.make_lattice_array(seq_wiki_article_name, self.entity_vector_model, similarity_cache=cache_object)
+        self.assertEqual(cache_object.get_statistics()['hits'], 4 + 6 + 2)
+        self.assertEqual(cache_object.get_statistics()['misses'], 6 + 2)
+        numpy.testing.assert_allclose(lattice_array.get_score_matrix(0)[:, 1],
+                                      [self.entity_vector_model.similarity(label, '[ドゥカティ]') for label in ['[ヤマハ]', '[ヤマハ発動機]']],
+                                      rtol=1e-5)
+
+        # cached rows are used in a lazy lattice, and other rows are computed on demand
+        lazy_lattice_array = make_lattice.make_lattice_array(self.seq_wiki_article_name, self.entity_vector_model,
+                                                             similarity_cache=cache_object, is_lazy_score=True)
+        self.assertTrue(lazy_lattice_array.is_row_computed.all())
+        numpy.testing.assert_allclose(lazy_lattice_array.get_score_matrix(1), cached_lattice_array.get_score_matrix(1))
+
+    def test_similarity_cache_object_bytes(self):
+        """キャッシュがバイト数で制限されるかのテスト
+        """
+        cache_object = SimilarityCacheObject(max_bytes=10 * cache_object_entry_bytes())
+        cache_object.put_many_similarity(('[ヤマハ]', '[{}]'.format(index), 0.5) for index in range(0, 100))
+        statistics = cache_object.get_statistics()
+        self.assertEqual(statistics['size'], 10)
+        self.assertEqual(statistics['evictions'], 90)
+        self.assertTrue(statistics['bytes'] <= statistics['max_bytes'])
+        cache_object.delete(SimilarityCacheObject.make_key('[ヤマハ]', '[99]'))
+        self.assertEqual(cache_object.get_statistics()['bytes'], 9 * cache_object_entry_bytes())
+        cache_object.clear()
+        self.assertEqual(cache_object.get_statistics()['bytes'], 0)
+        with self.assertRaises(Exception):
+            LruCacheObject(max_bytes=0)
+
+    def test_similarity_cache_object_threads(self):
+        cache_object = SimilarityCacheObject(max_size=50)
+
+        def put_and_get(thread_index):
+            for index in range(0, 1000):
+                name = '[{}]'.format(index % 100)
+                if cache_object.get_similarity(name, '[ヤマハ]') is None:
+                    cache_object.put_similarity('[ヤマハ]', name, float(index % 100))
+
+        seq_thread = [threading.Thread(target=put_and_get, args=(thread_index,)) for thread_index in range(0, 8)]
+        for thread in seq_thread: thread.start()
+        for thread in seq_thread: thread.join()
+
+        statistics = cache_object.get_statistics()
+        self.assertEqual(statistics['hits'] + statistics['misses'], 8 * 1000)
+        self.assertEqual(statistics['size'], 50)
+        self.assertEqual(len(cache_object), 50)
+
+    def test_sqlite_cache_object(self):
+        path_db_file = os.path.join(self.path_working_dir, 'sqlite_cache.sqlite')
+        cache_object = SqliteCacheObject(path_db_file, max_size=2)
+        cache_object.put_many([('a', b'1'), ('b', b'2'), ('c', b'3')])
+        self.assertEqual(cache_object.get_many(['a', 'b', 'c']), [None, b'2', b'3'])
+        self.assertEqual(cache_object.get_statistics(), {'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2, 'max_size': 2})
+        cache_object.close()
+        # values survive a restart
+        cache_object = SqliteCacheObject(path_db_file, max_size=2)
+        self.assertTrue('c' in cache_object)
+        cache_object.delete('c')
+        self.assertEqual(len(cache_object), 1)
+        cache_object.close()
+
+    def test_result_cache_key(self):
+        key = make_result_cache_key(self.seq_wiki_article_name, 'v1', top_k=1)
+        self.assertEqual(key, make_result_cache_key(copy.deepcopy(self.seq_wiki_article_name), 'v1', top_k=1))
+        self.assertNotEqual(key, make_result_cache_key(self.seq_wiki_article_name, 'v2', top_k=1))
+        self.assertNotEqual(key, make_result_cache_key(self.seq_wiki_article_name, 'v1', top_k=2))
+        self.assertNotEqual(key, make_result_cache_key(self.seq_wiki_article_name[::-1], 'v1', top_k=1))
+        self.assertNotEqual(key, make_result_cache_key(self.seq_wiki_article_name, 'v1', candidate_prior={'[ヤマハ]': 1.0}, top_k=1))
+        self.assertEqual(make_result_cache_key(self.seq_wiki_article_name, 'v1', candidate_prior={'[ヤマハ]': 1.0}),
+                         make_result_cache_key(self.seq_wiki_article_name, 'v1', candidate_prior={'[ヤマハ]': 1.0, '[ホンダ]': 2.0}))
+        # the order of candidates doesn't change the key
+        seq_reversed_candidate = [WikipediaArticleObject(page_title=wiki_article_obj.page_title,
+                                                         candidate_article_name=wiki_article_obj.candidate_article_name[::-1])
+                                  for wiki_article_obj in self.seq_wiki_article_name]
+        self.assertEqual(key, make_result_cache_key(seq_reversed_candidate, 'v1', top_k=1))
+        self.assertEqual(make_result_cache_key(self.seq_wiki_article_name, 'v1', candidate_prior={'[ヤマハ]': 1.0}),
+                         make_result_cache_key(seq_reversed_candidate, 'v1', candidate_prior={'[ヤマハ]': 1.0}))
+
+    def test_result_cache_object(self):
+        path_db_file = os.path.join(self.path_working_dir, 'result_cache.sqlite')
+        expected_result = interface.compute_wiki_node_probability(copy.deepcopy(self.seq_wiki_article_name), self.entity_vector_model, top_k=3)
+        result_cache = ResultCacheObject(model_version='v1', max_size=10, path_db_file=path_db_file)
+        for _ in range(0, 2):
+            result = interface.compute_wiki_node_probability(copy.deepcopy(self.seq_wiki_article_name), self.entity_vector_model,
+                                                             top_k=3, result_cache=result_cache)
+            self.assertEqual([seq_obj.__dict__() for seq_obj in result], [seq_obj.__dict__() for seq_obj in expected_result])
+        self.assertEqual(result_cache.get_statistics()['memory']['hits'], 1)
+        result_cache.close()
+
+        # the result is restored from sqlite after a restart
+        result_cache = ResultCacheObject(model_version='v1', max_size=10, path_db_file=path_db_file)
+        result = interface.compute_wiki_node_probability(copy.deepcopy(self.seq_wiki_article_name), self.entity_vector_model,
+                                                         top_k=3, result_cache=result_cache)
+        self.assertEqual([seq_obj.__dict__() for seq_obj in result], [seq_obj.__dict__() for seq_obj in expected_result])
+        self.assertEqual(result_cache.get_statistics()['db']['hits'], 1)
+        result_cache.close()
+
+    def test_result_cache_object_mutation(self):
+        """キャッシュから返された結果を変更しても、次のヒットは元の値を返すかのテスト
+        """
+        result_cache = ResultCacheObject(model_version='v1', max_size=10)
+        expected_result = interface.compute_wiki_node_probability(copy.deepcopy(self.seq_wiki_article_name), self.entity_vector_model,
+                                                                  top_k=3, result_cache=result_cache)
+        seq_expected_dict = copy.deepcopy([seq_obj.__dict__() for seq_obj in expected_result])
+        # changing the result which was put doesn't change the cache
+        expected_result[0].seq_transition_score.clear()
+
+        result = interface.compute_wiki_node_probability(copy.deepcopy(self.seq_wiki_article_name), self.entity_vector_model,
+                                                         top_k=3, result_cache=result_cache)
+        self.assertEqual([seq_obj.__dict__() for seq_obj in result], seq_expected_dict)
+        result[0].seq_transition_score[0] = ('[ヤマハ]', '[スズキ_(魚)]', 100.0)
+        result[0].seq_words.pop()
+        result[1].sequence_score = -1.0
+        result.pop()
+
+        result = interface.compute_wiki_node_probability(copy.deepcopy(self.seq_wiki_article_name), self.entity_vector_model,
+                                                         top_k=3, result_cache=result_cache)
+        self.assertEqual([seq_obj.__dict__() for seq_obj in result], seq_expected_dict)
+        self.assertEqual(result_cache.get_statistics()['memory']['hits'], 2)
+
+    def test_candidate_cache_object(self):
+        seq_searched_token = []
+
+        def search_tokens(seq_token, wikipedia_db_connector=None):
+            seq_searched_token.extend(seq_token)
+            return [['ヤマハ', 'ヤマハ発動機'] if token == 'ヤマハ' else [] for token in seq_token]
+
+        candidate_cache = CandidateCacheObject(max_size=10, ttl=60.0, negative_ttl=0.05)
+        cached_search_tokens = candidate_cache.wrap_bulk_search_function(search_tokens)
+        self.assertEqual(cached_search_tokens(['ヤマハ', 'バイク', 'ヤマハ'], wikipedia_db_connector=None),
+                         [['ヤマハ', 'ヤマハ発動機'], [], ['ヤマハ', 'ヤマハ発動機']])
+        self.assertEqual(seq_searched_token, ['ヤマハ', 'バイク'])
+        # a token without article names is cached too
+        self.assertEqual(cached_search_tokens(['バイク', 'ヤマハ']), [[], ['ヤマハ', 'ヤマハ発動機']])
+        self.assertEqual(seq_searched_token, ['ヤマハ', 'バイク'])
+        # the negative entry expires first
+        time.sleep(0.1)
+        self.assertEqual(cached_search_tokens(['バイク', 'ヤマハ']), [[], ['ヤマハ', 'ヤマハ発動機']])
+        self.assertEqual(seq_searched_token, ['ヤマハ', 'バイク', 'バイク'])
+        self.assertEqual(candidate_cache.get_statistics()['expirations'], 1)
+
+        cached_search_token = candidate_cache.wrap_search_function(lambda token: search_tokens([token])[0])
+        self.assertEqual(cached_search_token('ヤマハ'), ['ヤマハ', 'ヤマハ発動機'])
+        self.assertEqual(len(seq_searched_token), 3)
+
+        # entries are loaded from a warm-start file
+        path_warm_start_file = os.path.join(self.path_working_dir, 'candidate_cache.json')
+        candidate_cache.save(path_warm_start_file)
+        warm_candidate_cache = CandidateCacheObject(path_warm_start_file=path_warm_start_file)
+        self.assertEqual(warm_candidate_cache.get_many_candidates(['ヤマハ', 'バイク', 'スズキ']), [['ヤマハ', 'ヤマハ発動機'], [], None])
+
+    def test_candidate_cache_object_expiration(self):
+        """期限切れのエントリがヒットとして数えられず、ロックの中で削除されるかのテスト
+        """
+        seq_thread = []
+        seq_is_blocked = []
+
+        class RacingCandidateCacheObject(CandidateCacheObject):
+            def is_expired(self, token, value):
+                if len(seq_thread) == 0:
+                    # another thread tries to put the token between the check and the deletion
+                    thread = threading.Thread(target=self.put_candidates, args=(token, ['バイク']))
+                    thread.start()
+                    thread.join(timeout=0.05)
+                    seq_thread.append(thread)
+                    seq_is_blocked.append(thread.is_alive())
+                return CandidateCacheObject.is_expired(self, token, value)
+
+        candidate_cache = RacingCandidateCacheObject(max_size=10, ttl=60.0, negative_ttl=0.0)
+        candidate_cache.put_candidates('バイク', [])
+        time.sleep(0.01)
+        self.assertEqual(candidate_cache.get_many_candidates(['バイク']), [None])
+        seq_thread[0].join()
+        # the put waits for the lock, so it's not deleted as an expired entry
+        self.assertEqual(seq_is_blocked, [True])
+        self.assertEqual(candidate_cache.get_many_candidates(['バイク']), [['バイク']])
+        statistics = candidate_cache.get_statistics()
+        self.assertEqual((statistics['hits'], statistics['misses'], statistics['expirations']), (1, 1, 1))
+
+    def test_candidate_cache_object_warm_start_ttl(self):
+        """warm-startファイルから読み込んだエントリが残りのTTLで期限切れになるかのテスト
+        """
+        candidate_cache = CandidateCacheObject(max_size=10, ttl=0.2, negative_ttl=60.0)
+        candidate_cache.put_many_candidates([('ヤマハ', ['ヤマハ']), ('バイク', [])])
+        time.sleep(0.1)
+        path_warm_start_file = os.path.join(self.path_working_dir, 'candidate_cache_ttl.json')
+        candidate_cache.save(path_warm_start_file)
+        warm_candidate_cache = CandidateCacheObject(ttl=60.0, path_warm_start_file=path_warm_start_file)
+        self.assertEqual(warm_candidate_cache.get_many_candidates(['ヤマハ', 'バイク']), [['ヤマハ'], []])
+        # the remaining ttl is kept, not a new ttl of the loading object
+        time.sleep(0.15)
+        self.assertEqual(warm_candidate_cache.get_many_candidates(['ヤマハ', 'バイク']), [None, []])
+        # an expired entry is a miss, not a hit
+        statistics = warm_candidate_cache.get_statistics()
+        self.assertEqual((statistics['hits'], statistics['misses'], statistics['expirations']), (3, 1, 1))
+        # entries expired in the file are skipped
+        self.assertEqual(len(CandidateCacheObject(path_warm_start_file=path_warm_start_file)), 1)
+
+        # an old file of {token: article names} gets a new ttl
+        path_old_file = os.path.join(self.path_working_dir, 'candidate_cache_old.json')
+        with open(path_old_file, 'w', encoding='utf-8') as f:
+            json.dump({'ヤマハ': ['ヤマハ', 'ヤマハ発動機'], 'バイク': []}, f, ensure_ascii=False)
+        old_candidate_cache = CandidateCacheObject(path_warm_start_file=path_old_file)
+        self.assertEqual(old_candidate_cache.get_many_candidates(['ヤマハ', 'バイク']), [['ヤマハ', 'ヤマハ発動機'], []])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+from word2vec_wikification_py import cli
+from tests import fixture_helper
+import json
+import unittest
+import tempfile
+import shutil
+import os
+
+
+class TestCli(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.path_working_dir = tempfile.mkdtemp()
+        cls.path_index_file, cls.path_store_dir = fixture_helper.build_wiki_fixture(cls.path_working_dir)
+        cls.path_input_file = os.path.join(cls.path_working_dir, 'input.jsonl')
+        with open(cls.path_input_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(['ヤマハ', 'バイク', 'スズキ'], ensure_ascii=False) + '\n')
+            f.write(json.dumps({'id': 'doc-1', 'tokens': ['ホンダ', 'スズキ']}, ensure_ascii=False) + '\n')
+            f.write('\n')
+            f.write(json.dumps(['スズキ', 'ヤマハ', 'ホンダ'], ensure_ascii=False) + '\n')
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        shutil.rmtree(cls.path_working_dir)
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        self.path_output_file = os.path.join(self.path_working_dir, 'output.jsonl')
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        if os.path.exists(self.path_output_file): os.remove(self.path_output_file)
+
+    def __run(self, *seq_option:str):
+        cli.main([self.path_input_file, '-o', self.path_output_file,
+                  '--entity-model', self.path_store_dir, '--local-index', self.path_index_file,
+                  '--n-process', '0', '--chunk-size', '2'] + list(seq_option))
+        with open(self.path_output_file, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_main(self):
+        seq_output = self.__run('--top-k', '2')
+        self.assertEqual([output['line'] for output in seq_output], [0, 1, 2, 3])
+        self.assertEqual(seq_output[1]['id'], 'doc-1')
+        self.assertEqual(len(seq_output[1]['routes']), 2)
+        self.assertEqual([word['page_title'] for word in seq_output[3]['routes'][0]['seq_words']], ['スズキ', 'ヤマハ', 'ホンダ'])
+        self.assertTrue(seq_output[3]['routes'][0]['sequence_score'] >= seq_output[3]['routes'][1]['sequence_score'])
+
+    def test_main_offset(self):
+        seq_output = self.__run()
+        # it resumes after the 2nd line
+        with open(self.path_output_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(seq_output[0], ensure_ascii=False) + '\n')
+            f.write(json.dumps(seq_output[1], ensure_ascii=False) + '\n')
+        self.assertEqual(self.__run('--offset', '2'), seq_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
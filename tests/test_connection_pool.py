@@ -0,0 +1,104 @@
+from word2vec_wikification_py.connection_pool import MysqlConnectionPool
+from pymysql.err import OperationalError
+import threading
+import unittest
+
+
+class FakeCursor(object):
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, args=None):
+        if not self.connection.is_alive:
+            raise OperationalError(2006, 'MySQL server has gone away')
+        self.connection.seq_query.append(query)
+        return 1
+
+    def fetchall(self):
+        return [(1, 'ヤマハ'.encode('utf-8'), 0)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection(object):
+    """Connection which has the same methods as pymysql.Connection used by the pool
+    """
+    def __init__(self):
+        self.is_alive = True
+        self.is_closed = False
+        self.seq_query = []
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+    def ping(self, reconnect=True):
+        self.is_alive = True
+
+    def close(self):
+        self.is_closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        pass
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        self.seq_connection = []
+
+        def connection_factory():
+            connection = FakeConnection()
+            self.seq_connection.append(connection)
+            return connection
+        self.connection_pool = MysqlConnectionPool(connection_factory=connection_factory, max_size=2, timeout=1.0)
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        self.connection_pool.close()
+
+    def test_reuse_connection(self):
+        for i in range(0, 10):
+            with self.connection_pool.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                self.assertEqual(cursor.fetchall(), [(1, 'ヤマハ'.encode('utf-8'), 0)])
+        self.assertEqual(len(self.seq_connection), 1)
+        self.assertEqual(self.connection_pool.get_statistics()['idle_connections'], 1)
+
+    def test_bounded_size(self):
+        cursor_1 = self.connection_pool.cursor()
+        cursor_2 = self.connection_pool.cursor()
+        with self.assertRaises(TimeoutError):
+            self.connection_pool.cursor()
+        cursor_1.close()
+        cursor_3 = self.connection_pool.cursor()
+        self.assertTrue(cursor_3.connection is cursor_1.cursor.connection)
+        cursor_2.close()
+        cursor_3.close()
+
+        def execute_queries():
+            for i in range(0, 100):
+                with self.connection_pool.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+        seq_thread = [threading.Thread(target=execute_queries) for i in range(0, 8)]
+        for thread in seq_thread: thread.start()
+        for thread in seq_thread: thread.join()
+        self.assertEqual(len(self.seq_connection), 2)
+
+    def test_reconnect(self):
+        with self.connection_pool.cursor() as cursor:
+            cursor.connection.is_alive = False
+            cursor.execute('SELECT 1')
+        self.assertEqual(self.connection_pool.get_statistics()['reconnections'], 1)
+        self.assertEqual(self.seq_connection[0].seq_query, ['SELECT 1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,305 @@
+from word2vec_wikification_py import decode_lattice
+from word2vec_wikification_py.models import LatticeObject, IndexDictionaryObject, EdgeObject, SequenceScore, WikipediaArticleObject, \
+    LatticeArrayObject, WikipediaArticleView
+from scipy.sparse import csr_matrix
+from itertools import product
+import numpy
+import pickle
+import unittest
+
+
+class TestDecodeLattice(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        random_state = numpy.random.RandomState(0)
+        cls.seq_n_state = [2, 3, 1, 4, 2]
+        cls.seq_score_block = [random_state.uniform(-1.0, 1.0, size=(cls.seq_n_state[t], cls.seq_n_state[t+1]))
+                               for t in range(0, len(cls.seq_n_state)-1)]
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        pass
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        pass
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def __brute_force_routes(self, seq_score_block):
+        seq_route = []
+        for route in product(*[range(0, n_state) for n_state in self.seq_n_state]):
+            route_score = sum(seq_score_block[t][route[t], route[t+1]] for t in range(0, len(seq_score_block)))
+            seq_route.append((route_score, list(route)))
+        seq_route.sort(key=lambda score_route: score_route[0], reverse=True)
+        return seq_route
+
+    def test_decode_best_route(self):
+        seq_route = decode_lattice.decode_k_best_routes(self.seq_score_block, top_k=1)
+        expected_route = self.__brute_force_routes(self.seq_score_block)[0]
+        self.assertEqual(len(seq_route), 1)
+        self.assertAlmostEqual(seq_route[0][0], expected_route[0])
+        self.assertEqual(seq_route[0][1], expected_route[1])
+
+    def test_decode_k_best_routes(self):
+        seq_route = decode_lattice.decode_k_best_routes(self.seq_score_block, top_k=5)
+        expected_routes = self.__brute_force_routes(self.seq_score_block)[:5]
+        self.assertEqual(len(seq_route), 5)
+        for (route_score, route), (expected_score, expected_route) in zip(seq_route, expected_routes):
+            self.assertAlmostEqual(route_score, expected_score)
+            self.assertEqual(route, expected_route)
+
+    def test_decode_k_more_than_routes(self):
+        seq_score_block = [block.copy() for block in self.seq_score_block]
+        seq_score_block[1][0, :] = -numpy.inf
+        seq_route = decode_lattice.decode_k_best_routes(seq_score_block, top_k=1000)
+        expected_routes = [score_route for score_route in self.__brute_force_routes(seq_score_block)
+                           if not numpy.isneginf(score_route[0])]
+        self.assertEqual(len(seq_route), len(expected_routes))
+        for (route_score, route), (expected_score, expected_route) in zip(seq_route, expected_routes):
+            self.assertAlmostEqual(route_score, expected_score)
+
+    def test_decode_beam_search_routes(self):
+        # beam search is exact when the beam keeps all partial routes
+        seq_route = decode_lattice.decode_beam_search_routes(self.seq_score_block, beam_width=1000, top_k=5)
+        expected_routes = self.__brute_force_routes(self.seq_score_block)[:5]
+        for (route_score, route), (expected_score, expected_route) in zip(seq_route, expected_routes):
+            self.assertAlmostEqual(route_score, expected_score)
+            self.assertEqual(route, expected_route)
+
+        seq_route = decode_lattice.decode_beam_search_routes(self.seq_score_block, beam_width=2)
+        self.assertEqual(len(seq_route), 2)
+        for route_score, route in seq_route:
+            self.assertAlmostEqual(route_score, sum(self.seq_score_block[t][route[t], route[t+1]] for t in range(0, len(route)-1)))
+
+        seq_route = decode_lattice.decode_beam_search_routes(self.seq_score_block, beam_width=1000, score_threshold=0.0)
+        # with score_threshold=0.0, only the best partial route survives at each step. It's greedy decoding
+        self.assertEqual(seq_route, decode_lattice.decode_beam_search_routes(self.seq_score_block, beam_width=1))
+
+    def test_decode_beam_search_rows_on_demand(self):
+        """ビームサーチがビーム内の状態の行だけを要求し、初期ビームもbeam_width以下になるかのテスト
+        """
+        class RecordingScoreBlock(object):
+            def __init__(self, score_matrix):
+                self.score_matrix = score_matrix
+                self.shape = score_matrix.shape
+                self.seq_requested_row = []
+
+            def get_rows(self, row_index):
+                self.seq_requested_row.append(list(row_index))
+                return self.score_matrix[row_index, :]
+
+            def estimate_rows(self):
+                return self.score_matrix.max(axis=1)
+
+        random_state = numpy.random.RandomState(3)
+        seq_n_state = [8, 6, 7, 5]
+        seq_score_block = [random_state.uniform(-1.0, 1.0, size=(seq_n_state[t], seq_n_state[t+1])) for t in range(0, len(seq_n_state)-1)]
+        seq_recording_block = [RecordingScoreBlock(score_matrix) for score_matrix in seq_score_block]
+        seq_route = decode_lattice.decode_beam_search_routes(seq_recording_block, beam_width=3)
+        self.assertEqual(seq_route, decode_lattice.decode_beam_search_routes(seq_score_block, beam_width=3))
+        for recording_block in seq_recording_block:
+            self.assertEqual(len(recording_block.seq_requested_row), 1)
+            self.assertTrue(len(recording_block.seq_requested_row[0]) <= 3)
+        # the initial beam is states with the best scores into t=1
+        self.assertEqual(seq_recording_block[0].seq_requested_row[0],
+                         sorted(numpy.argsort(-seq_score_block[0].max(axis=1))[:3].tolist()))
+
+    def test_lazy_lattice_array_object(self):
+        """遅延評価のラティスでビームサーチが一部の行だけを計算し、全体を計算すると密なラティスと一致するかのテスト
+        """
+        random_state = numpy.random.RandomState(4)
+        seq_n_state = [6, 5, 7, 4]
+        n_candidate = sum(seq_n_state)
+        vector_matrix = random_state.normal(size=(n_candidate, 8))
+        vector_matrix /= numpy.linalg.norm(vector_matrix, axis=1, keepdims=True)
+        state_offsets = numpy.cumsum([0] + seq_n_state)
+        score_offsets = numpy.cumsum([0] + [seq_n_state[t] * seq_n_state[t+1] for t in range(0, len(seq_n_state)-1)])
+        label_table = ['[{}]'.format(candidate_id) for candidate_id in range(0, n_candidate)]
+        dense_buffer = numpy.concatenate([numpy.dot(vector_matrix[state_offsets[t]:state_offsets[t+1]],
+                                                    vector_matrix[state_offsets[t+1]:state_offsets[t+2]].T).ravel()
+                                          for t in range(0, len(seq_n_state)-1)])
+        dense_lattice = LatticeObject(lattice_array=LatticeArrayObject(score_buffer=dense_buffer,
+                                                                       score_offsets=score_offsets,
+                                                                       state_offsets=state_offsets,
+                                                                       label_table=label_table))
+        lazy_array = LatticeArrayObject(score_buffer=numpy.full(len(dense_buffer), numpy.nan),
+                                        score_offsets=score_offsets,
+                                        state_offsets=state_offsets,
+                                        label_table=label_table,
+                                        vector_matrix=vector_matrix)
+        lazy_lattice = LatticeObject(lattice_array=lazy_array)
+
+        seq_lazy_route = lazy_lattice.get_score_routes(top_k=2, decode_method='beam', beam_width=2)
+        self.assertTrue(lazy_array.is_row_computed.sum() <= 2 * lazy_array.n_step)
+        self.assertEqual(int(numpy.isnan(lazy_array.score_buffer).sum()),
+                         sum(seq_n_state[t+1] * (seq_n_state[t] - int(lazy_array.is_row_computed[state_offsets[t]:state_offsets[t+1]].sum()))
+                             for t in range(0, lazy_array.n_step)))
+        for seq_obj in seq_lazy_route:
+            self.assertAlmostEqual(seq_obj.sequence_score, sum(score for label_t, label_t_plus, score in seq_obj.seq_transition_score))
+        # with a beam which keeps all states, the initial beam is not pruned by the estimate
+        seq_lazy_route = lazy_lattice.get_score_routes(top_k=2, decode_method='beam', beam_width=max(seq_n_state))
+        seq_dense_route = dense_lattice.get_score_routes(top_k=2, decode_method='beam', beam_width=max(seq_n_state))
+        self.assertEqual([seq_obj.get_tokens() for seq_obj in seq_lazy_route], [seq_obj.get_tokens() for seq_obj in seq_dense_route])
+
+        # viterbi and compatible structures compute all rows
+        self.assertEqual(lazy_lattice.get_score_routes(top_k=3)[0].get_tokens(), dense_lattice.get_score_routes(top_k=3)[0].get_tokens())
+        self.assertTrue(lazy_array.is_row_computed.all())
+        numpy.testing.assert_allclose(lazy_array.score_buffer, dense_buffer)
+
+    def test_lattice_object_top_k(self):
+        """Viterbi decoding on LatticeObject returns the same routes as exhaustive enumeration
+        """
+        seq_wiki_article_name = [
+            WikipediaArticleObject(page_title='ヤマハ', candidate_article_name=['[ヤマハ]', '[ヤマハ発動機]']),
+            WikipediaArticleObject(page_title='スズキ', candidate_article_name=['[スズキ_(企業)]', '[スズキ_(魚)]']),
+            WikipediaArticleObject(page_title='ドゥカティ', candidate_article_name=['[ドゥカティ]']),
+        ]
+        row2index = {}
+        column2index = {}
+        seq_edge_groups = []
+        data, row, column = [], [], []
+        random_state = numpy.random.RandomState(1)
+        for t in range(0, len(seq_wiki_article_name)-1):
+            edge_group = []
+            for label_t, label_t_plus in product(seq_wiki_article_name[t].candidate_article_name,
+                                                 seq_wiki_article_name[t+1].candidate_article_name):
+                row_index = row2index.setdefault((t, label_t), len(row2index))
+                column_index = column2index.setdefault((t+1, label_t_plus), len(column2index))
+                edge_group.append(EdgeObject(row_index, column_index))
+                data.append(random_state.uniform())
+                row.append(row_index)
+                column.append(column_index)
+            seq_edge_groups.append(edge_group)
+        index_dictionary_obj = IndexDictionaryObject(
+            state2index={'row2index': row2index, 'column2index': column2index},
+            index2state={'index2row': {value: key for key, value in row2index.items()},
+                         'index2column': {value: key for key, value in column2index.items()}})
+        lattice_object = LatticeObject(transition_matrix=csr_matrix((data, (row, column)), shape=(len(row2index), len(column2index))),
+                                       index_dictionary_obj=index_dictionary_obj,
+                                       seq_edge_groups=seq_edge_groups,
+                                       seq_wiki_article_name=seq_wiki_article_name)
+
+        all_routes = lattice_object.get_score_routes()
+        all_routes.sort(key=lambda obj: obj.sequence_score, reverse=True)
+        best_routes = lattice_object.get_score_routes(top_k=2)
+        self.assertEqual(len(best_routes), 2)
+        for seq_obj, expected_obj in zip(best_routes, all_routes[:2]):
+            self.assertTrue(isinstance(seq_obj, SequenceScore))
+            self.assertAlmostEqual(seq_obj.sequence_score, expected_obj.sequence_score)
+            self.assertEqual(seq_obj.get_tokens(), expected_obj.get_tokens())
+            self.assertEqual([wiki_obj.article_name for wiki_obj in seq_obj.seq_words], seq_obj.get_tokens())
+
+        beam_routes = lattice_object.get_score_routes(top_k=2, decode_method='beam', beam_width=4)
+        self.assertEqual([seq_obj.get_tokens() for seq_obj in beam_routes], [seq_obj.get_tokens() for seq_obj in best_routes])
+
+    def test_lattice_array_object(self):
+        """A lattice on flat arrays returns the same routes as a lattice on transition_matrix and index dictionaries
+        """
+        seq_wiki_article_name = [
+            WikipediaArticleObject(page_title='ヤマハ', candidate_article_name=['[ヤマハ]', '[ヤマハ発動機]']),
+            WikipediaArticleObject(page_title='スズキ', candidate_article_name=['[スズキ_(企業)]', '[スズキ_(魚)]', '[スズキ]']),
+            WikipediaArticleObject(page_title='ドゥカティ', candidate_article_name=['[ドゥカティ]']),
+            WikipediaArticleObject(page_title='ホンダ', candidate_article_name=['[ホンダ]', '[本田技研工業]']),
+        ]
+        seq_n_state = [len(wiki_article_obj.candidate_article_name) for wiki_article_obj in seq_wiki_article_name]
+        score_offsets = numpy.cumsum([0] + [seq_n_state[t] * seq_n_state[t+1] for t in range(0, len(seq_n_state)-1)])
+        lattice_array = LatticeArrayObject(
+            score_buffer=numpy.random.RandomState(2).uniform(size=score_offsets[-1]).astype(numpy.float32),
+            score_offsets=score_offsets,
+            state_offsets=numpy.cumsum([0] + seq_n_state),
+            label_table=[label for wiki_article_obj in seq_wiki_article_name for label in wiki_article_obj.candidate_article_name])
+        self.assertEqual(lattice_array.get_score_matrix(1).shape, (3, 1))
+        self.assertEqual(lattice_array.get_state(5), (2, '[ドゥカティ]'))
+
+        compact_lattice = LatticeObject(seq_wiki_article_name=seq_wiki_article_name, lattice_array=lattice_array)
+        lattice_object = LatticeObject(transition_matrix=lattice_array.to_csr_matrix(),
+                                       index_dictionary_obj=lattice_array.to_index_dictionary(),
+                                       seq_edge_groups=None,
+                                       seq_wiki_article_name=seq_wiki_article_name,
+                                       seq_transition_block=lattice_array.to_transition_blocks())
+        for params in [{}, {'top_k': 3}, {'top_k': 2, 'decode_method': 'beam', 'beam_width': 4}]:
+            seq_compact_route = compact_lattice.get_score_routes(**params)
+            seq_route = lattice_object.get_score_routes(**params)
+            self.assertEqual(len(seq_compact_route), len(seq_route))
+            for compact_obj, seq_obj in zip(seq_compact_route, seq_route):
+                self.assertEqual(compact_obj.seq_transition_score, seq_obj.seq_transition_score)
+                self.assertAlmostEqual(compact_obj.sequence_score, seq_obj.sequence_score)
+        self.assertEqual(len(compact_lattice.get_score_routes()), numpy.prod(seq_n_state))
+
+        # structures for compatibility are generated from the arrays
+        index2row = compact_lattice.index_dictionary_obj.index2state['index2row']
+        index2column = compact_lattice.index_dictionary_obj.index2state['index2column']
+        transition_matrix = compact_lattice.transition_matrix
+        self.assertEqual(transition_matrix.nnz, score_offsets[-1])
+        for edge_group in compact_lattice.seq_edge_groups:
+            for edge_obj in edge_group:
+                (position_t, label_t), (position_t_plus, label_t_plus) = index2row[edge_obj.index_at_t], index2column[edge_obj.index_at_t_plus]
+                self.assertEqual(position_t + 1, position_t_plus)
+                candidate_id_t = lattice_array.label_table.index(label_t)
+                candidate_id_t_plus = lattice_array.label_table.index(label_t_plus)
+                self.assertEqual(transition_matrix[edge_obj.index_at_t, edge_obj.index_at_t_plus],
+                                 lattice_array.get_transition_score(position_t, candidate_id_t, candidate_id_t_plus))
+        self.assertEqual(compact_lattice.label2WikiArticleObj['[ホンダ]'][0][0], 3)
+
+    def test_article_view(self):
+        """Disambiguated articles are immutable views and input objects are not changed
+        """
+        seq_wiki_article_name = [
+            WikipediaArticleObject(page_title='ヤマハ', candidate_article_name=['[ヤマハ]', '[ヤマハ発動機]']),
+            WikipediaArticleObject(page_title='スズキ', candidate_article_name=['[スズキ_(企業)]', '[スズキ_(魚)]']),
+            WikipediaArticleObject(page_title='ドゥカティ', candidate_article_name=['[ドゥカティ]']),
+        ]
+        lattice_array = LatticeArrayObject(score_buffer=numpy.arange(6, dtype=numpy.float32),
+                                           score_offsets=numpy.array([0, 4, 6]),
+                                           state_offsets=numpy.array([0, 2, 4, 5]),
+                                           label_table=['[ヤマハ]', '[ヤマハ発動機]', '[スズキ_(企業)]', '[スズキ_(魚)]', '[ドゥカティ]'])
+        lattice_object = LatticeObject(seq_wiki_article_name=seq_wiki_article_name, lattice_array=lattice_array)
+        seq_route = lattice_object.get_score_routes()
+        self.assertEqual(len(seq_route), 4)
+        for seq_obj in seq_route:
+            self.assertEqual([wiki_obj.article_name for wiki_obj in seq_obj.seq_words], seq_obj.get_tokens())
+            self.assertTrue(all(isinstance(wiki_obj, WikipediaArticleView) for wiki_obj in seq_obj.seq_words))
+        # routes through the same state share the same view
+        self.assertIs(seq_route[0].seq_words[2], seq_route[1].seq_words[2])
+        self.assertTrue(all(wiki_obj.article_name is None for wiki_obj in seq_wiki_article_name))
+
+        wiki_article_view = seq_route[0].seq_words[0]
+        with self.assertRaises(AttributeError):
+            wiki_article_view.article_name = '[ヤマハ発動機]'
+        restored_view = pickle.loads(pickle.dumps(wiki_article_view))
+        self.assertTrue(isinstance(restored_view, WikipediaArticleView))
+        self.assertEqual(restored_view.__dict__(), wiki_article_view.__dict__())
+
+    def test_lazy_sequence_score(self):
+        """Labels and articles of SequenceScore are generated on access, and they survive close() of the lattice
+        """
+        seq_wiki_article_name = [
+            WikipediaArticleObject(page_title='ヤマハ', candidate_article_name=['[ヤマハ]', '[ヤマハ発動機]']),
+            WikipediaArticleObject(page_title='スズキ', candidate_article_name=['[スズキ_(企業)]', '[スズキ_(魚)]']),
+            WikipediaArticleObject(page_title='ドゥカティ', candidate_article_name=['[ドゥカティ]']),
+        ]
+        lattice_array = LatticeArrayObject(score_buffer=numpy.array([0.0, 1.0, 2.0, 3.0, 4.0, 6.0], dtype=numpy.float32),
+                                           score_offsets=numpy.array([0, 4, 6]),
+                                           state_offsets=numpy.array([0, 2, 4, 5]),
+                                           label_table=['[ヤマハ]', '[ヤマハ発動機]', '[スズキ_(企業)]', '[スズキ_(魚)]', '[ドゥカティ]'])
+        with LatticeObject(seq_wiki_article_name=seq_wiki_article_name, lattice_array=lattice_array) as lattice_object:
+            seq_route = lattice_object.get_score_routes(top_k=2)
+            expected_seq_words, expected_seq_transition_score = lattice_object.materialize_route(((1, 1), (3, 2)))
+            self.assertEqual(seq_route[0].get_tokens(), ['[ヤマハ発動機]', '[スズキ_(魚)]', '[ドゥカティ]'])
+            self.assertEqual(seq_route[0].seq_transition_score, expected_seq_transition_score)
+            self.assertEqual(seq_route[0].seq_words, expected_seq_words)
+            self.assertEqual(seq_route[0].sequence_score, 3.0 + 6.0)
+        # the second route is materialized by close()
+        self.assertIsNone(lattice_object.lattice_array)
+        self.assertEqual(seq_route[1].get_tokens(), ['[ヤマハ]', '[スズキ_(魚)]', '[ドゥカティ]'])
+        restored_obj = pickle.loads(pickle.dumps(seq_route[1]))
+        self.assertEqual(restored_obj.__dict__(), seq_route[1].__dict__())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+from word2vec_wikification_py import entity_vector_store, load_entity_model
+from word2vec_wikification_py.entity_vector_store import EntityVectorStore
+import numpy
+import unittest
+import tempfile
+import shutil
+import os
+
+
+class TestEntityVectorStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        random_state = numpy.random.RandomState(0)
+        cls.seq_word = ['[ヤマハ]', '[ヤマハ発動機]', '[スズキ_(企業)]', '[スズキ_(魚)]', '[ドゥカティ]', 'バイク']
+        cls.vector_matrix = random_state.normal(size=(len(cls.seq_word), 8)).astype(numpy.float32)
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        pass
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        self.path_working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        shutil.rmtree(self.path_working_dir)
+
+    def __cosine_similarity(self, word_1, word_2):
+        vector_1 = self.vector_matrix[self.seq_word.index(word_1)]
+        vector_2 = self.vector_matrix[self.seq_word.index(word_2)]
+        return numpy.dot(vector_1, vector_2) / (numpy.linalg.norm(vector_1) * numpy.linalg.norm(vector_2))
+
+    def test_save_entity_vector_store(self):
+        path_store_dir = os.path.join(self.path_working_dir, 'store')
+        store_object = entity_vector_store.save_entity_vector_store(seq_word=self.seq_word,
+                                                                    vector_matrix=self.vector_matrix,
+                                                                    path_store_dir=path_store_dir,
+                                                                    chunk_size=4)
+        self.assertTrue(isinstance(store_object, EntityVectorStore))
+        self.assertTrue(isinstance(store_object.vectors, numpy.memmap))
+        self.assertEqual(len(store_object), len(self.seq_word))
+        self.assertTrue('[ドゥカティ]' in store_object)
+        self.assertAlmostEqual(store_object.similarity('[ヤマハ]', '[スズキ_(企業)]'),
+                               self.__cosine_similarity('[ヤマハ]', '[スズキ_(企業)]'), places=5)
+        self.assertEqual(store_object.most_similar('[ヤマハ]', topn=2)[0][0],
+                         max(self.seq_word[1:], key=lambda word: self.__cosine_similarity('[ヤマハ]', word)))
+        with self.assertRaises(FileExistsError):
+            entity_vector_store.save_entity_vector_store(seq_word=self.seq_word,
+                                                         vector_matrix=self.vector_matrix,
+                                                         path_store_dir=path_store_dir)
+
+    def test_save_entity_vector_store_carriage_return(self):
+        """'\\r'を含む単語が保存後も同じ行のベクトルに対応するかのテスト
+        """
+        seq_word = ['[a]', '[b\rc]', '[d]', '[e\r]']
+        vector_matrix = numpy.eye(4, dtype=numpy.float32)
+        store_object = entity_vector_store.save_entity_vector_store(seq_word=seq_word,
+                                                                    vector_matrix=vector_matrix,
+                                                                    path_store_dir=os.path.join(self.path_working_dir, 'store_carriage_return'))
+        self.assertEqual(store_object.index2word, seq_word)
+        self.assertEqual(EntityVectorStore(store_object.path_store_dir).index2word, seq_word)
+        self.assertEqual(store_object['[d]'].tolist(), vector_matrix[2].tolist())
+        with self.assertRaises(Exception):
+            entity_vector_store.save_entity_vector_store(seq_word=['[a\nb]'],
+                                                         vector_matrix=vector_matrix[:1],
+                                                         path_store_dir=os.path.join(self.path_working_dir, 'store_line_feed'))
+
+    def test_extract_entity_vector_subset(self):
+        source_store = entity_vector_store.save_entity_vector_store(seq_word=self.seq_word,
+                                                                    vector_matrix=self.vector_matrix,
+                                                                    path_store_dir=os.path.join(self.path_working_dir, 'store'))
+        subset_store = entity_vector_store.extract_entity_vector_subset(source_store, os.path.join(self.path_working_dir, 'subset'))
+        self.assertEqual(subset_store.index2word, [word for word in self.seq_word if not word == 'バイク'])
+        self.assertAlmostEqual(subset_store.similarity('[ヤマハ]', '[ドゥカティ]'),
+                               source_store.similarity('[ヤマハ]', '[ドゥカティ]'), places=6)
+
+        allow_list_store = entity_vector_store.extract_entity_vector_subset(source_store,
+                                                                            os.path.join(self.path_working_dir, 'allow_list'),
+                                                                            key_filter=['[スズキ_(企業)]', '[ヤマハ]'])
+        self.assertEqual(allow_list_store.index2word, ['[ヤマハ]', '[スズキ_(企業)]'])
+        self.assertTrue(allow_list_store.store_info['is_subset'])
+
+    def test_quantized_entity_vector_store(self):
+        source_store = entity_vector_store.save_entity_vector_store(seq_word=self.seq_word,
+                                                                    vector_matrix=self.vector_matrix,
+                                                                    path_store_dir=os.path.join(self.path_working_dir, 'store'))
+        for vector_dtype, places in (('float16', 3), ('int8', 2)):
+            quantized_store = entity_vector_store.convert_entity_model(source_store,
+                                                                       os.path.join(self.path_working_dir, vector_dtype),
+                                                                       vector_dtype=vector_dtype)
+            self.assertEqual(quantized_store.vector_dtype, vector_dtype)
+            self.assertTrue(quantized_store.get_memory_size() < source_store.get_memory_size())
+            self.assertAlmostEqual(float(numpy.linalg.norm(quantized_store['[ヤマハ]'])), 1.0, places=places)
+            for word in self.seq_word:
+                self.assertAlmostEqual(quantized_store.similarity('[ヤマハ]', word),
+                                       source_store.similarity('[ヤマハ]', word), places=places)
+
+    def test_load_entity_model_from_store(self):
+        path_store_dir = os.path.join(self.path_working_dir, 'store')
+        entity_vector_store.save_entity_vector_store(seq_word=self.seq_word,
+                                                     vector_matrix=self.vector_matrix,
+                                                     path_store_dir=path_store_dir)
+        store_object = load_entity_model.load_entity_model(path_entity_model=path_store_dir)
+        self.assertTrue(isinstance(store_object, EntityVectorStore))
+        self.assertEqual(store_object.index2word, self.seq_word)
+
+    def test_load_entity_model_validate_store(self):
+        """既存のストアがvector_dtypeとkey_filterの異なる要求で再利用されないかのテスト
+        """
+        path_model_file = os.path.join(self.path_working_dir, 'entity_vector.model.bin')
+        with open(path_model_file, 'wb') as f:
+            f.write(b'')
+        path_default_store = load_entity_model.make_store_dir_name(path_model_file)
+        self.assertEqual(path_default_store, '{}.store'.format(path_model_file))
+        self.assertNotEqual(load_entity_model.make_store_dir_name(path_model_file, vector_dtype='int8'), path_default_store)
+        self.assertNotEqual(load_entity_model.make_store_dir_name(path_model_file,
+                                                                  entity_vector_store.describe_key_filter(['[ヤマハ]'])),
+                            load_entity_model.make_store_dir_name(path_model_file,
+                                                                  entity_vector_store.describe_key_filter(['[ドゥカティ]'])))
+
+        source_store = entity_vector_store.save_entity_vector_store(seq_word=self.seq_word,
+                                                                    vector_matrix=self.vector_matrix,
+                                                                    path_store_dir=os.path.join(self.path_working_dir, 'store'))
+        entity_vector_store.convert_entity_model(source_store, path_default_store)
+        store_object = load_entity_model.load_entity_model(path_entity_model=path_model_file, is_use_cache=True)
+        self.assertEqual(store_object.index2word, self.seq_word)
+
+        path_subset_store = os.path.join(self.path_working_dir, 'subset')
+        entity_vector_store.extract_entity_vector_subset(source_store, path_subset_store)
+        self.assertEqual(load_entity_model.load_entity_model(path_entity_model=path_model_file,
+                                                             is_use_cache=True,
+                                                             path_working_dir=path_subset_store,
+                                                             key_filter=entity_vector_store.is_article_name).index2word,
+                         self.seq_word[:-1])
+        with self.assertRaises(Exception):
+            load_entity_model.load_entity_model(path_entity_model=path_model_file, is_use_cache=True,
+                                                path_working_dir=path_subset_store)
+        with self.assertRaises(Exception):
+            load_entity_model.load_entity_model(path_entity_model=path_model_file, is_use_cache=True,
+                                                path_working_dir=path_subset_store,
+                                                key_filter=['[ヤマハ]'])
+        with self.assertRaises(Exception):
+            load_entity_model.load_entity_model(path_entity_model=path_model_file, is_use_cache=True,
+                                                path_working_dir=path_default_store,
+                                                vector_dtype='int8')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
 from word2vec_wikification_py import load_entity_model, make_lattice, interface, initialize_mysql_connector
 from word2vec_wikification_py.models import WikipediaArticleObject, SequenceScore, LatticeObject, IndexDictionaryObject
+from word2vec_wikification_py import entity_vector_store
 import configparser
+import numpy
 import unittest
+import tempfile
+import shutil
 import os
 
 class TestInterface(unittest.TestCase):
@@ -75,6 +79,25 @@ class TestInterface(unittest.TestCase):
             import pprint
             pprint.pprint(seq_obj.__dict__())
 
+    def test_compute_wiki_node_probability_top_k(self):
+        """top_kを指定した時に全経路の上位k件と一致するかのテスト
+        """
+        seq_wikipedia_article_object = [
+            WikipediaArticleObject(page_title='ヤマハ', candidate_article_name=['[ヤマハ]', '[ヤマハ発動機]']),
+            WikipediaArticleObject(page_title='スズキ', candidate_article_name=['[スズキ_(企業)]', '[スズキ_(魚)]']),
+            WikipediaArticleObject(page_title='ドゥカティ', candidate_article_name=['[ドゥカティ]'])
+        ]
+        all_sequence_score_objects = interface.compute_wiki_node_probability(
+            seq_wiki_article_name=seq_wikipedia_article_object,
+            entity_vector_model=self.model_object)
+        sequence_score_objects = interface.compute_wiki_node_probability(
+            seq_wiki_article_name=seq_wikipedia_article_object,
+            entity_vector_model=self.model_object,
+            top_k=2)
+        self.assertEqual(len(sequence_score_objects), 2)
+        self.assertEqual([seq_obj.get_tokens() for seq_obj in sequence_score_objects],
+                         [seq_obj.get_tokens() for seq_obj in all_sequence_score_objects[:2]])
+
     def test_predict_japanese_wiki_names_partial(self):
         connector = initialize_mysql_connector.initialize_pymysql_connector(
             hostname=self.config_obj.get('Mysql', 'host'),
@@ -123,5 +146,56 @@ class TestInterface(unittest.TestCase):
             pprint.pprint(seq_obj.__dict__())
 
 
+
+class TestComputeWikiNodeProbabilitySynthetic(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.path_working_dir = tempfile.mkdtemp()
+        cls.seq_candidate_article_name = [['[A{}]'.format(index) for index in range(0, 3)],
+                                          ['[B{}]'.format(index) for index in range(0, 4)],
+                                          ['[C{}]'.format(index) for index in range(0, 2)],
+                                          ['[D{}]'.format(index) for index in range(0, 3)]]
+        seq_word = [word for seq_candidate in cls.seq_candidate_article_name for word in seq_candidate]
+        cls.entity_vector_model = entity_vector_store.save_entity_vector_store(
+            seq_word=seq_word,
+            vector_matrix=numpy.random.RandomState(0).normal(size=(len(seq_word), 8)).astype(numpy.float32),
+            path_store_dir=os.path.join(cls.path_working_dir, 'store'))
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        shutil.rmtree(cls.path_working_dir)
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        self.seq_wikipedia_article_object = [
+            WikipediaArticleObject(page_title=seq_candidate[0][1], candidate_article_name=list(seq_candidate))
+            for seq_candidate in self.seq_candidate_article_name]
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def test_compute_wiki_node_probability_top_k(self):
+        """top_k=3の結果が全経路をソートした上位3件と一致するかのテスト
+        """
+        all_sequence_score_objects = interface.compute_wiki_node_probability(
+            seq_wiki_article_name=self.seq_wikipedia_article_object,
+            entity_vector_model=self.entity_vector_model)
+        self.assertEqual(len(all_sequence_score_objects), 3 * 4 * 2 * 3)
+        sequence_score_objects = interface.compute_wiki_node_probability(
+            seq_wiki_article_name=self.seq_wikipedia_article_object,
+            entity_vector_model=self.entity_vector_model,
+            top_k=3)
+        self.assertEqual(len(sequence_score_objects), 3)
+        self.assertEqual([seq_obj.get_tokens() for seq_obj in sequence_score_objects],
+                         [seq_obj.get_tokens() for seq_obj in all_sequence_score_objects[:3]])
+        numpy.testing.assert_allclose([seq_obj.sequence_score for seq_obj in sequence_score_objects],
+                                      [seq_obj.sequence_score for seq_obj in all_sequence_score_objects[:3]], rtol=1e-6)
+        self.assertEqual(sorted([seq_obj.sequence_score for seq_obj in all_sequence_score_objects], reverse=True),
+                         [seq_obj.sequence_score for seq_obj in all_sequence_score_objects])
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
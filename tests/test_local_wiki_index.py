@@ -0,0 +1,94 @@
+from word2vec_wikification_py import local_wiki_index, search_wiki_pages
+from word2vec_wikification_py.local_wiki_index import LocalWikipediaIndex
+import unittest
+import tempfile
+import shutil
+import os
+
+
+class TestLocalWikiIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.seq_page_record = [
+            (1, 'ヤマハ', 0),
+            (2, 'ヤマハ発動機', 0),
+            (3, 'スズキ_(企業)', 0),
+            (4, 'スズキ_(魚)', 0),
+            (5, 'スズキ', 1),
+            (6, 'ホンダ', 1),
+            (7, '本田技研工業', 0),
+            (8, 'ロバート_(お笑いトリオ)', 0),
+            (9, '山本博_(お笑い芸人)', 0),
+            (10, '山本博_(アーチェリー選手)', 0),
+        ]
+        cls.seq_redirect_record = [(5, 'スズキ_(企業)'), (6, '本田技研工業')]
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        pass
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        self.path_working_dir = tempfile.mkdtemp()
+        self.local_index = local_wiki_index.build_local_index(path_index_file=os.path.join(self.path_working_dir, 'index.sqlite'),
+                                                              iterable_page_record=iter(self.seq_page_record),
+                                                              iterable_redirect_record=iter(self.seq_redirect_record),
+                                                              batch_size=3)
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        self.local_index.close()
+        shutil.rmtree(self.path_working_dir)
+
+    def test_generate_title_tokens(self):
+        self.assertEqual(local_wiki_index.generate_title_tokens('スズキ_(企業)'), ['スズキ_(企業)', 'スズキ'])
+        self.assertEqual(local_wiki_index.generate_title_tokens('ヤマハ発動機'), ['ヤマハ発動機'])
+        self.assertEqual(local_wiki_index.generate_title_tokens('_(企業)'), ['_(企業)'])
+
+    def test_search_function_from_local_index(self):
+        self.assertTrue(isinstance(self.local_index, LocalWikipediaIndex))
+        self.assertEqual(sorted(search_wiki_pages.search_function_from_local_index('スズキ', self.local_index)),
+                         ['スズキ_(企業)', 'スズキ_(魚)'])
+        self.assertEqual(search_wiki_pages.search_function_from_local_index('ホンダ', self.local_index), ['本田技研工業'])
+        self.assertEqual(search_wiki_pages.search_function_from_local_index('バイク', self.local_index), [])
+
+        test_input = ['ヤマハ', 'バイク', 'スズキ', 'ホンダ', '山本博', 'ヤマハ']
+        seq_result = search_wiki_pages.search_function_from_local_index_bulk(test_input, self.local_index, chunk_size=2)
+        self.assertEqual([sorted(result) for result in seq_result],
+                         [sorted(search_wiki_pages.search_function_from_local_index(token, self.local_index)) for token in test_input])
+
+    def test_iterate_tokens(self):
+        seq_token = list(self.local_index.iterate_tokens())
+        self.assertEqual(seq_token, sorted(seq_token))
+        self.assertTrue('山本博' in seq_token)
+        self.assertTrue('スズキ' in self.local_index)
+
+    def test_search_from_dictionary_with_trie(self):
+        """trieを使った部分一致検索の結果が総当たりの検索結果と一致するかのテスト
+        """
+        title_trie = search_wiki_pages.TitleTrieObject(self.local_index.iterate_tokens())
+        self.assertTrue('ヤマハ発動機' in title_trie)
+        self.assertFalse('ヤマハ発' in title_trie)
+        start_index, end_index = title_trie.find_range('ヤマハ発')
+        self.assertTrue(start_index < end_index)
+        self.assertEqual(title_trie.find_range('ヤマハ発動機', start_index, end_index), title_trie.find_range('ヤマハ発動機'))
+        n_title = len(title_trie)
+        title_trie.add_title('ヤマハ発')
+        title_trie.add_title('ヤマハ発')
+        self.assertTrue('ヤマハ発' in title_trie)
+        self.assertEqual(len(title_trie), n_title + 1)
+        title_trie = search_wiki_pages.TitleTrieObject(self.local_index.iterate_tokens())
+
+        def search_function(token):
+            return search_wiki_pages.search_function_from_local_index(token, self.local_index)
+
+        for test_input in [['ヤマハ', '発動機', 'と', 'スズキ'], ['山本', '博', '山本博', 'ホン', 'ダ'], ['本田', '技研', '工業', 'ヤマハ'], []]:
+            expected_result = search_wiki_pages.search_from_dictionary(test_input, str, search_function)
+            result = search_wiki_pages.search_from_dictionary_with_trie(test_input, str, search_function, title_trie)
+            self.assertEqual(list(result.items()), list(expected_result.items()))
+
+
+if __name__ == '__main__':
+    unittest.main()
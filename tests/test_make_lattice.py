@@ -1,6 +1,9 @@
-from word2vec_wikification_py import load_entity_model, make_lattice
-from word2vec_wikification_py.models import WikipediaArticleObject, LatticeObject, IndexDictionaryObject
+from word2vec_wikification_py import load_entity_model, make_lattice, entity_vector_store
+from word2vec_wikification_py.models import WikipediaArticleObject, LatticeObject, IndexDictionaryObject, StateIndexDictionary
 import unittest
+import tempfile
+import shutil
+import numpy
 import os
 
 class TestMakeLatice(unittest.TestCase):
@@ -31,32 +34,33 @@ class TestMakeLatice(unittest.TestCase):
         # procedures after every tests are finished. This code block is executed every time
         pass
 
-    def test_make_state_transition_matrix(self):
-        """状態tから状態t+1への遷移行列を作成するテスト
+    def test_make_state_transition_block(self):
+        """行列積で作成した遷移スコアがsimilarityと一致するかのテスト
         """
         state2index_obj = IndexDictionaryObject(state2index={'row2index': {}, 'column2index': {}},
                                                 index2state={})
 
-        transition_edge = make_lattice.make_state_transition_edge(
-            state_t_word_tuple=(0,'[ヤマハ]'),
-            state_t_plus_word_tuple=(1, '[河合楽器製作所]'),
-            state2index_obj=state2index_obj,
-            entity_vector=self.model_object
-        )
-        self.assertTrue(isinstance(transition_edge, tuple))
-        self.assertEqual(transition_edge[0].transition_score, self.model_object.similarity('[ヤマハ]', '[河合楽器製作所]'))
-
-    def test_make_state_transition_sequence(self):
-        """
-        """
-        state2index_obj = IndexDictionaryObject(state2index={'row2index': {}, 'column2index': {}},
-                                                index2state={})
-
-        make_lattice.make_state_transition_sequence(
+        state2index_obj, seq_transition_block, transition_matrix = make_lattice.make_state_transition_block(
             seq_wiki_article_name=self.seq_wikipedia_article_object,
             entity_vector_model=self.model_object,
             state2index_obj=state2index_obj,
         )
+        self.assertEqual(len(seq_transition_block), len(self.seq_wikipedia_article_object)-1)
+        self.assertEqual(transition_matrix.shape, (4, 3))
+        row_index = state2index_obj.state2index['row2index'][(0, '[ヤマハ]')]
+        column_index = state2index_obj.state2index['column2index'][(1, '[スズキ_(企業)]')]
+        self.assertAlmostEqual(transition_matrix[row_index, column_index],
+                               self.model_object.similarity('[ヤマハ]', '[スズキ_(企業)]'), places=5)
+
+    def test_state_index_dictionary(self):
+        state_index_dictionary = StateIndexDictionary()
+        self.assertEqual(state_index_dictionary.add_state((0, '[ヤマハ]')), 0)
+        self.assertEqual(state_index_dictionary.add_state((0, '[ヤマハ発動機]')), 1)
+        self.assertEqual(state_index_dictionary.add_state((0, '[ヤマハ]')), 0)
+        state_index_dictionary[(1, '[スズキ_(企業)]')] = 2
+        self.assertEqual(state_index_dictionary.index2state, [(0, '[ヤマハ]'), (0, '[ヤマハ発動機]'), (1, '[スズキ_(企業)]')])
+        with self.assertRaises(Exception):
+            state_index_dictionary[(1, '[スズキ_(魚)]')] = 10
 
     def test_make_lattice_object(self):
         lattice_object = make_lattice.make_lattice_object(
@@ -66,6 +70,134 @@ class TestMakeLatice(unittest.TestCase):
         )
         self.assertTrue(isinstance(lattice_object, LatticeObject))
 
+    def test_make_lattice_object_disk_cache(self):
+        """ディスクに退避した遷移スコアがclose()で削除されるかのテスト
+        """
+        path_working_dir = tempfile.mkdtemp()
+        lattice_object = make_lattice.make_lattice_object(
+            seq_wiki_article_name=self.seq_wikipedia_article_object,
+            entity_vector_model=self.model_object,
+            path_wordking_dir=path_working_dir,
+            is_use_cache=True,
+            cache_threshold_bytes=0
+        )
+        self.assertEqual(len(os.listdir(path_working_dir)), 1)
+        self.assertEqual(len(lattice_object.get_score_routes(top_k=1)), 1)
+        lattice_object.close()
+        self.assertEqual(os.listdir(path_working_dir), [])
+        shutil.rmtree(path_working_dir)
+
+    def test_prune_candidates(self):
+        """候補数の上限を超えた候補が削除されるかのテスト
+        """
+        seq_wikipedia_article_object = [
+            WikipediaArticleObject(page_title='お笑いタレント', candidate_article_name=['[お笑いタレント]']),
+            WikipediaArticleObject(page_title='ロバート', candidate_article_name=['[ロバート_(お笑いトリオ)]', '[ロバート]']),
+            WikipediaArticleObject(page_title='山本博', candidate_article_name=['[山本博_(お笑い芸人)]', '[山本博_(アーチェリー選手)]', '[山本博_(柔道家)]']),
+        ]
+        seq_pruned_article = make_lattice.prune_candidates(seq_wikipedia_article_object, self.model_object, max_candidates=1)
+        self.assertEqual([wiki_obj.candidate_article_name for wiki_obj in seq_pruned_article],
+                         [['[お笑いタレント]'], ['[ロバート]'], ['[山本博_(お笑い芸人)]']])
+
+        wiki_article_object = WikipediaArticleObject(page_title='山本博', candidate_article_name=['[山本博_(お笑い芸人)]', '[山本博_(アーチェリー選手)]'])
+        seq_pruned_article = make_lattice.prune_candidates([wiki_article_object], self.model_object, max_candidates=1,
+                                                           candidate_prior={'[山本博_(アーチェリー選手)]': 10.0})
+        self.assertEqual(seq_pruned_article[0].candidate_article_name, ['[山本博_(アーチェリー選手)]'])
+
+
+
+class TestPruneCandidates(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.path_working_dir = tempfile.mkdtemp()
+        word2vector = {
+            '[お笑いタレント]': [1.0, 0.0, 0.0],
+            '[ロバート_(お笑いトリオ)]': [1.0, 0.1, 0.0],
+            '[ロバート]': [0.0, 1.0, 0.0],
+            '[山本博_(アーチェリー選手)]': [0.0, 0.0, 1.0],
+            '[山本博_(お笑い芸人)]': [1.0, 0.2, 0.0],
+            '[山本博_(柔道家)]': [0.0, 1.0, 0.0],
+            '[山本博_(野球)]': [0.0, 0.0, 1.0],
+            '[山本博]': [0.0, 0.0, 1.0],
+        }
+        cls.entity_vector_model = entity_vector_store.save_entity_vector_store(
+            seq_word=list(word2vector.keys()),
+            vector_matrix=numpy.array(list(word2vector.values()), dtype=numpy.float32),
+            path_store_dir=os.path.join(cls.path_working_dir, 'store'))
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        shutil.rmtree(cls.path_working_dir)
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        self.seq_wikipedia_article_object = [
+            WikipediaArticleObject(page_title='お笑いタレント', candidate_article_name=['[お笑いタレント]']),
+            WikipediaArticleObject(page_title='ロバート', candidate_article_name=['[ロバート_(お笑いトリオ)]', '[ロバート]']),
+            WikipediaArticleObject(page_title='山本', candidate_article_name=['[山本博_(アーチェリー選手)]', '[山本博_(お笑い芸人)]',
+                                                                            '[山本博_(柔道家)]', '[山本博_(野球)]']),
+        ]
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def test_prune_candidates_centroid(self):
+        """文脈の重心との類似度で候補が並び、同点の候補は元の順序を保つかのテスト
+        """
+        seq_pruned_article = make_lattice.prune_candidates(self.seq_wikipedia_article_object, self.entity_vector_model, max_candidates=3)
+        self.assertEqual([wiki_obj.candidate_article_name for wiki_obj in seq_pruned_article],
+                         [['[お笑いタレント]'],
+                          ['[ロバート_(お笑いトリオ)]', '[ロバート]'],
+                          ['[山本博_(お笑い芸人)]', '[山本博_(柔道家)]', '[山本博_(アーチェリー選手)]']])
+
+        # the exact title is kept first even though the other candidate is closer to the context
+        seq_pruned_article = make_lattice.prune_candidates(seq_pruned_article, self.entity_vector_model, max_candidates=1)
+        self.assertEqual([wiki_obj.candidate_article_name for wiki_obj in seq_pruned_article],
+                         [['[お笑いタレント]'], ['[ロバート]'], ['[山本博_(お笑い芸人)]']])
+
+    def test_prune_candidates_input_unchanged(self):
+        """候補を削除しても入力のオブジェクトが変更されないかのテスト
+        """
+        seq_candidate = [list(wiki_obj.candidate_article_name) for wiki_obj in self.seq_wikipedia_article_object]
+        seq_pruned_article = make_lattice.prune_candidates(self.seq_wikipedia_article_object, self.entity_vector_model, max_candidates=1)
+        self.assertEqual([wiki_obj.candidate_article_name for wiki_obj in self.seq_wikipedia_article_object], seq_candidate)
+        self.assertTrue(seq_pruned_article is not self.seq_wikipedia_article_object)
+        self.assertTrue(seq_pruned_article[0] is self.seq_wikipedia_article_object[0])
+        self.assertTrue(seq_pruned_article[1] is not self.seq_wikipedia_article_object[1])
+        self.assertEqual(seq_pruned_article[1].page_title, 'ロバート')
+
+        # pruning again with the same input gets the same result
+        self.assertEqual([wiki_obj.candidate_article_name for wiki_obj in
+                          make_lattice.prune_candidates(self.seq_wikipedia_article_object, self.entity_vector_model, max_candidates=1)],
+                         [wiki_obj.candidate_article_name for wiki_obj in seq_pruned_article])
+
+    def test_prune_candidates_prior(self):
+        """candidate_priorで候補が並び、同点の候補は元の順序を保つかのテスト
+        """
+        wiki_article_object = self.seq_wikipedia_article_object[2]
+        candidate_prior = {'[山本博_(柔道家)]': 5.0, '[山本博_(お笑い芸人)]': 5.0, '[ロバート_(お笑いトリオ)]': 1.0}
+        seq_pruned_article = make_lattice.prune_candidates([wiki_article_object], self.entity_vector_model, max_candidates=3,
+                                                           candidate_prior=candidate_prior)
+        self.assertEqual(seq_pruned_article[0].candidate_article_name,
+                         ['[山本博_(お笑い芸人)]', '[山本博_(柔道家)]', '[山本博_(アーチェリー選手)]'])
+
+        wiki_article_object = WikipediaArticleObject(page_title='山本博',
+                                                     candidate_article_name=['[山本博_(柔道家)]', '[山本博_(野球)]', '[山本博]'])
+        seq_pruned_article = make_lattice.prune_candidates([wiki_article_object], self.entity_vector_model, max_candidates=2,
+                                                           candidate_prior=candidate_prior)
+        self.assertEqual(seq_pruned_article[0].candidate_article_name, ['[山本博]', '[山本博_(柔道家)]'])
+
+        # nothing is pruned within max_candidates
+        wiki_article_object = self.seq_wikipedia_article_object[1]
+        seq_pruned_article = make_lattice.prune_candidates([wiki_article_object], self.entity_vector_model, max_candidates=2,
+                                                           candidate_prior=candidate_prior)
+        self.assertEqual(seq_pruned_article[0].candidate_article_name, ['[ロバート_(お笑いトリオ)]', '[ロバート]'])
+        with self.assertRaises(Exception):
+            make_lattice.prune_candidates([wiki_article_object], self.entity_vector_model, max_candidates=0)
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
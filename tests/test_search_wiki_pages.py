@@ -0,0 +1,188 @@
+from word2vec_wikification_py import search_wiki_pages, initialize_mysql_connector
+import configparser
+import unittest
+import re
+import os
+
+
+class TestSearchWikiPages(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.path_config_file = '../configs/development.ini'
+        if not os.path.exists(cls.path_config_file):
+            cls.path_config_file = cls.path_config_file.replace('../', '')
+
+        if not os.path.exists(cls.path_config_file):
+            raise FileExistsError()
+
+        cls.config_obj = configparser.ConfigParser(allow_no_value=True)
+        cls.config_obj.read(cls.path_config_file)
+        cls.connector = initialize_mysql_connector.initialize_pymysql_connector(
+            hostname=cls.config_obj.get('Mysql', 'host'),
+            user_name=cls.config_obj.get('Mysql', 'user_name'),
+            password=cls.config_obj.get('Mysql', 'password'),
+            dbname=cls.config_obj.get('Mysql', 'database_name')
+        )
+        cls.test_input = ['ヤマハ', 'バイク', 'スズキ', 'オーバーテイク', 'ホンダ', '優勝', 'スズキ']
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        cls.connector.close()
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        pass
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def test_search_function_from_wikipedia_database_bulk(self):
+        """1トークンずつ検索した結果と一括検索の結果が一致するかのテスト
+        """
+        seq_expected_result = [
+            sorted(search_wiki_pages.search_function_from_wikipedia_database(token=token, wikipedia_db_connector=self.connector))
+            for token in self.test_input]
+        seq_result = search_wiki_pages.search_function_from_wikipedia_database_bulk(seq_token=self.test_input,
+                                                                                    wikipedia_db_connector=self.connector,
+                                                                                    chunk_size=3)
+        self.assertEqual([sorted(result) for result in seq_result], seq_expected_result)
+
+    def test_search_sentences_from_wikipedia_database(self):
+        seq_input_tokens = [self.test_input[:3], [], self.test_input[3:]]
+        seq_result = search_wiki_pages.search_sentences_from_wikipedia_database(seq_input_tokens=seq_input_tokens,
+                                                                                wikipedia_db_connector=self.connector)
+        self.assertEqual([len(result) for result in seq_result], [len(input_tokens) for input_tokens in seq_input_tokens])
+
+
+class FakeCursor(object):
+    """A cursor which evaluates page and redirect queries of search_wiki_pages in Python with MySQL LIKE semantics.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.fetched_records = []
+
+    @staticmethod
+    def is_like(page_title:str, pattern:str)->bool:
+        regex = ''
+        index = 0
+        while index < len(pattern):
+            if pattern[index] == '\\':
+                index += 1
+                regex += re.escape(pattern[index])
+            elif pattern[index] == '%':
+                regex += '.*'
+            elif pattern[index] == '_':
+                regex += '.'
+            else:
+                regex += re.escape(pattern[index])
+            index += 1
+        return not re.fullmatch(regex, page_title, flags=re.DOTALL) is None
+
+    def execute(self, query, args):
+        if query.startswith('SELECT page_id'):
+            if isinstance(args[0], tuple):
+                seq_title, seq_pattern = args[0], args[1:]
+            else:
+                seq_title, seq_pattern = (args[0],), args[1:]
+            self.fetched_records = [(page_id, page_title.encode('utf-8'), page_is_redirect)
+                                    for page_id, page_title, page_is_redirect in self.connection.seq_page_record
+                                    if page_title in seq_title or any(self.is_like(page_title, pattern) for pattern in seq_pattern)]
+        elif query.startswith('SELECT rd_from'):
+            self.fetched_records = [(rd_from, rd_title.encode('utf-8')) for rd_from, rd_title in self.connection.seq_redirect_record
+                                    if rd_from in args[0]]
+        else:
+            self.fetched_records = [(rd_title.encode('utf-8'), ) for rd_from, rd_title in self.connection.seq_redirect_record
+                                    if rd_from in args[0]]
+
+    def fetchall(self):
+        return self.fetched_records
+
+    def close(self):
+        pass
+
+
+class FakeConnection(object):
+    def __init__(self, seq_page_record, seq_redirect_record):
+        self.seq_page_record = seq_page_record
+        self.seq_redirect_record = seq_redirect_record
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+class TestMergeBulkSearchRecords(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.seq_page_record = [
+            (1, 'スズキ_(企業)', 0),
+            (2, 'スズキ_(魚)', 0),
+            (3, 'ホンダ', 1),
+            (4, 'A_B', 0),
+            (5, 'AxB_(x)', 0),
+            (6, 'A%_(z)', 0),
+            (7, 'Abc_(z)', 0),
+            (8, 'C\\D_(y)', 1),
+            (9, 'スズキ_', 0),
+        ]
+        cls.seq_redirect_record = [(3, '本田技研工業'), (8, 'CD')]
+        cls.test_input = ['スズキ', 'ホンダ', 'A_B', 'A%', 'C\\D', 'ドゥカティ', 'スズキ']
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        pass
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        pass
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def test_escape_like_string(self):
+        self.assertEqual(search_wiki_pages.make_disambiguation_pattern('A_B%C\\D'), 'A\\_B\\%C\\\\D\\_(%)')
+        self.assertTrue(FakeCursor.is_like('A_B_(x)', search_wiki_pages.make_disambiguation_pattern('A_B')))
+        self.assertFalse(FakeCursor.is_like('AxB_(x)', search_wiki_pages.make_disambiguation_pattern('A_B')))
+        self.assertFalse(FakeCursor.is_like('Abc_(z)', search_wiki_pages.make_disambiguation_pattern('A%')))
+
+    def test_merge_bulk_search_records(self):
+        seq_chunk_token = list(dict.fromkeys(self.test_input))
+        fetched_records = search_wiki_pages.decode_page_records(
+            [(page_id, page_title.encode('utf-8'), page_is_redirect) for page_id, page_title, page_is_redirect in self.seq_page_record])
+        self.assertEqual(search_wiki_pages.get_redirect_page_ids(fetched_records), [3, 8])
+        token2article_names = {}
+        search_wiki_pages.merge_bulk_search_records(seq_chunk_token,
+                                                    fetched_records,
+                                                    [(rd_from, rd_title.encode('utf-8')) for rd_from, rd_title in self.seq_redirect_record],
+                                                    token2article_names)
+        self.assertEqual({token: sorted(article_names) for token, article_names in token2article_names.items()},
+                         {'スズキ': ['スズキ_(企業)', 'スズキ_(魚)'],
+                          'ホンダ': ['本田技研工業'],
+                          'A_B': ['A_B'],
+                          'A%': ['A%_(z)'],
+                          'C\\D': ['CD']})
+        self.assertEqual([sorted(result) for result in search_wiki_pages.collect_bulk_search_result(self.test_input, token2article_names)],
+                         [['スズキ_(企業)', 'スズキ_(魚)'], ['本田技研工業'], ['A_B'], ['A%_(z)'], ['CD'], [], ['スズキ_(企業)', 'スズキ_(魚)']])
+
+    def test_bulk_search_parity(self):
+        """1トークンずつ検索した結果と一括検索の結果が、LIKEの特殊文字を含むトークンでも一致するかのテスト
+        """
+        connection = FakeConnection(self.seq_page_record, self.seq_redirect_record)
+        seq_expected_result = [
+            sorted(search_wiki_pages.search_function_from_wikipedia_database(token=token, wikipedia_db_connector=connection))
+            for token in self.test_input]
+        for chunk_size in (1, 3, 1000):
+            seq_result = search_wiki_pages.search_function_from_wikipedia_database_bulk(seq_token=self.test_input,
+                                                                                        wikipedia_db_connector=connection,
+                                                                                        chunk_size=chunk_size)
+            self.assertEqual([sorted(result) for result in seq_result], seq_expected_result)
+        self.assertEqual(seq_expected_result[2:4], [['A_B'], ['A%_(z)']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+from word2vec_wikification_py import segmented_decoding, interface, entity_vector_store, make_lattice
+from word2vec_wikification_py.models import WikipediaArticleObject, SequenceScore
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from word2vec_wikification_py.cache_objects import SimilarityCacheObject
+import pickle
+import numpy
+import unittest
+import tempfile
+import shutil
+import copy
+import os
+
+
+class TestSegmentedDecoding(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.path_working_dir = tempfile.mkdtemp()
+        random_state = numpy.random.RandomState(0)
+        seq_word = ['[{}]'.format(index) for index in range(0, 100)]
+        cls.entity_vector_model = entity_vector_store.save_entity_vector_store(
+            seq_word=seq_word,
+            vector_matrix=random_state.normal(size=(len(seq_word), 8)).astype(numpy.float32),
+            path_store_dir=os.path.join(cls.path_working_dir, 'store'))
+        cls.seq_wiki_article_name = [
+            WikipediaArticleObject(page_title='token-{}'.format(position),
+                                   candidate_article_name=[seq_word[index] for index in random_state.choice(len(seq_word), 3, replace=False)])
+            for position in range(0, 30)]
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        shutil.rmtree(cls.path_working_dir)
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        pass
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def test_make_segment_ranges(self):
+        self.assertEqual(segmented_decoding.make_segment_ranges(10, segment_size=4, overlap=2), [(0, 4), (2, 6), (4, 8), (6, 10)])
+        self.assertEqual(segmented_decoding.make_segment_ranges(9, segment_size=4), [(0, 4), (4, 9)])
+        self.assertEqual(segmented_decoding.make_segment_ranges(10, segment_size=4, seq_boundary=[3, 5, 9]), [(0, 3), (3, 5), (5, 10)])
+        self.assertEqual(segmented_decoding.make_segment_ranges(1, segment_size=4), [(0, 1)])
+
+    def test_compute_wiki_node_probability_segmented(self):
+        expected_sequence_score = interface.compute_wiki_node_probability(copy.deepcopy(self.seq_wiki_article_name),
+                                                                          self.entity_vector_model,
+                                                                          top_k=1)[0]
+        # one segment is the same as exact decoding
+        sequence_score = segmented_decoding.compute_wiki_node_probability_segmented(copy.deepcopy(self.seq_wiki_article_name),
+                                                                                    self.entity_vector_model,
+                                                                                    segment_size=100)[0]
+        self.assertEqual([obj.article_name for obj in sequence_score.seq_words], expected_sequence_score.get_tokens())
+        self.assertAlmostEqual(sequence_score.sequence_score, expected_sequence_score.sequence_score, places=4)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            sequence_score = segmented_decoding.compute_wiki_node_probability_segmented(copy.deepcopy(self.seq_wiki_article_name),
+                                                                                        self.entity_vector_model,
+                                                                                        segment_size=8,
+                                                                                        overlap=4,
+                                                                                        executor=executor)[0]
+        self.assertTrue(isinstance(sequence_score, SequenceScore))
+        self.assertEqual([obj.page_title for obj in sequence_score.seq_words], [obj.page_title for obj in self.seq_wiki_article_name])
+        self.assertEqual(len(sequence_score.seq_transition_score), len(self.seq_wiki_article_name) - 1)
+        self.assertAlmostEqual(sequence_score.sequence_score, sum(score for label_t, label_t_plus, score in sequence_score.seq_transition_score))
+        self.assertTrue(sequence_score.sequence_score <= expected_sequence_score.sequence_score + 1e-4)
+
+    def test_compute_wiki_node_probability_segmented_process(self):
+        """ProcessPoolExecutorでもThreadPoolExecutorと同じ結果になるかのテスト
+        """
+        self.assertEqual(pickle.loads(pickle.dumps(self.entity_vector_model)).index2word, self.entity_vector_model.index2word)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            expected_sequence_score = segmented_decoding.compute_wiki_node_probability_segmented(
+                copy.deepcopy(self.seq_wiki_article_name), self.entity_vector_model, segment_size=8, overlap=4,
+                similarity_cache=SimilarityCacheObject(), max_candidates=2, executor=executor)[0]
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            sequence_score = segmented_decoding.compute_wiki_node_probability_segmented(
+                copy.deepcopy(self.seq_wiki_article_name), self.entity_vector_model, segment_size=8, overlap=4,
+                max_candidates=2, executor=executor)[0]
+            with self.assertRaises(Exception):
+                segmented_decoding.compute_wiki_node_probability_segmented(
+                    copy.deepcopy(self.seq_wiki_article_name), self.entity_vector_model, segment_size=8,
+                    similarity_cache=SimilarityCacheObject(), executor=executor)
+        self.assertEqual(sequence_score.get_tokens(), expected_sequence_score.get_tokens())
+        self.assertAlmostEqual(sequence_score.sequence_score, expected_sequence_score.sequence_score, places=4)
+
+    def test_compute_wiki_node_probability_segmented_prune(self):
+        """候補がセグメントごとに削除され、入力が変更されないかのテスト
+        """
+        seq_candidate = [list(wiki_obj.candidate_article_name) for wiki_obj in self.seq_wiki_article_name]
+        sequence_score = segmented_decoding.compute_wiki_node_probability_segmented(self.seq_wiki_article_name,
+                                                                                    self.entity_vector_model,
+                                                                                    segment_size=8,
+                                                                                    overlap=0,
+                                                                                    max_candidates=1)[0]
+        self.assertEqual([wiki_obj.candidate_article_name for wiki_obj in self.seq_wiki_article_name], seq_candidate)
+        # each segment is pruned in its own context
+        seq_expected_label = []
+        for start, end in segmented_decoding.make_segment_ranges(len(self.seq_wiki_article_name), segment_size=8):
+            seq_expected_label += [wiki_obj.candidate_article_name[0] for wiki_obj in
+                                   make_lattice.prune_candidates(self.seq_wiki_article_name[start:end], self.entity_vector_model, 1)]
+        self.assertEqual([obj.article_name for obj in sequence_score.seq_words], seq_expected_label)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+from word2vec_wikification_py import serialization
+from word2vec_wikification_py.models import WikipediaArticleObject, SequenceScore, LatticeObject, LatticeArrayObject
+import numpy
+import tempfile
+import shutil
+import os
+import unittest
+
+
+class TestSerialization(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # procedures before tests are started. This code block is executed only once
+        cls.path_working_dir = tempfile.mkdtemp()
+        cls.seq_wiki_article_name = [
+            WikipediaArticleObject(page_title='ヤマハ', candidate_article_name=['[ヤマハ]', '[ヤマハ発動機]']),
+            WikipediaArticleObject(page_title='スズキ', candidate_article_name=['[スズキ_(企業)]', '[スズキ_(魚)]']),
+            WikipediaArticleObject(page_title='ドゥカティ', candidate_article_name=['[ドゥカティ]']),
+        ]
+        cls.lattice_array = LatticeArrayObject(score_buffer=numpy.array([0.5, 0.25, 0.125, 1.0, 0.75, -0.5], dtype=numpy.float32),
+                                               score_offsets=numpy.array([0, 4, 6]),
+                                               state_offsets=numpy.array([0, 2, 4, 5]),
+                                               label_table=['[ヤマハ]', '[ヤマハ発動機]', '[スズキ_(企業)]', '[スズキ_(魚)]', '[ドゥカティ]'])
+
+    @classmethod
+    def tearDownClass(cls):
+        # procedures after tests are finished. This code block is executed only once
+        shutil.rmtree(cls.path_working_dir)
+
+    def setUp(self):
+        # procedures before every tests are started. This code block is executed every time
+        pass
+
+    def tearDown(self):
+        # procedures after every tests are finished. This code block is executed every time
+        pass
+
+    def test_sequence_scores(self):
+        lattice_object = LatticeObject(seq_wiki_article_name=self.seq_wiki_article_name, lattice_array=self.lattice_array)
+        seq_sequence_score_batch = [
+            lattice_object.get_score_routes(top_k=3),
+            [],
+            [SequenceScore(seq_words=['[ホンダ]', '[本田技研工業]'], seq_transition_score=[('[ホンダ]', '[本田技研工業]', 0.5)], sequence_score=0.5)],
+        ]
+        path_file = os.path.join(self.path_working_dir, 'sequence_scores.bin')
+        serialization.dump_sequence_scores(seq_sequence_score_batch, path_file)
+        for source in [path_file, serialization.dumps_sequence_scores(seq_sequence_score_batch)]:
+            reader = serialization.loads_sequence_scores(source)
+            self.assertEqual(len(reader), 3)
+            self.assertEqual(reader.get_route_scores(0).tolist(), [seq_obj.sequence_score for seq_obj in seq_sequence_score_batch[0]])
+            self.assertEqual(reader.get_article_names(reader.get_route_range(0)[0]),
+                             [wiki_obj.article_name for wiki_obj in seq_sequence_score_batch[0][0].seq_words])
+            for seq_restored_obj, seq_sequence_score in zip(reader, seq_sequence_score_batch):
+                self.assertEqual([(seq_obj.seq_transition_score, seq_obj.sequence_score) for seq_obj in seq_restored_obj],
+                                 [(seq_obj.seq_transition_score, seq_obj.sequence_score) for seq_obj in seq_sequence_score])
+                self.assertEqual([[wiki_obj if isinstance(wiki_obj, str) else wiki_obj.__dict__() for wiki_obj in seq_obj.seq_words]
+                                  for seq_obj in seq_restored_obj],
+                                 [[wiki_obj if isinstance(wiki_obj, str) else wiki_obj.__dict__() for wiki_obj in seq_obj.seq_words]
+                                  for seq_obj in seq_sequence_score])
+                self.assertEqual([seq_obj.get_tokens() for seq_obj in seq_restored_obj],
+                                 [seq_obj.get_tokens() for seq_obj in seq_sequence_score])
+        with self.assertRaises(IndexError):
+            reader[3]
+
+    def test_lattice(self):
+        lattice_object = LatticeObject(seq_wiki_article_name=self.seq_wiki_article_name, lattice_array=self.lattice_array)
+        path_file = os.path.join(self.path_working_dir, 'lattice.bin')
+        serialization.dump_lattice(lattice_object, path_file)
+        for source in [path_file, serialization.dumps_lattice(lattice_object)]:
+            restored_lattice = serialization.loads_lattice(source)
+            self.assertEqual(restored_lattice.lattice_array.score_buffer.tolist(), self.lattice_array.score_buffer.tolist())
+            self.assertEqual(list(restored_lattice.lattice_array.label_table), self.lattice_array.label_table)
+            self.assertEqual([wiki_obj.__dict__() for wiki_obj in restored_lattice.seq_wiki_article_name],
+                             [wiki_obj.__dict__() for wiki_obj in self.seq_wiki_article_name])
+            self.assertEqual([seq_obj.__dict__() for seq_obj in restored_lattice.get_score_routes()],
+                             [seq_obj.__dict__() for seq_obj in lattice_object.get_score_routes()])
+        self.assertTrue(isinstance(serialization.loads_lattice(path_file).lattice_array.score_buffer.base, numpy.memmap))
+
+        # input articles are made from the arrays when they're accessed
+        seq_restored_article = serialization.loads_lattice(path_file).seq_wiki_article_name
+        self.assertTrue(isinstance(seq_restored_article, serialization.ArticleTableObject))
+        self.assertEqual(len(seq_restored_article), 3)
+        self.assertEqual(seq_restored_article[-1].__dict__(), self.seq_wiki_article_name[-1].__dict__())
+        with self.assertRaises(AttributeError):
+            seq_restored_article[0].article_name = '[ヤマハ]'
+        with self.assertRaises(IndexError):
+            seq_restored_article[3]
+
+        with self.assertRaises(Exception):
+            serialization.loads_sequence_scores(path_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+from word2vec_wikification_py.models import WikipediaArticleObject, SequenceScore
+from word2vec_wikification_py.interface import predict_japanese_wiki_names_with_wikidump, compute_wiki_node_probability, add_article_symbol
+from word2vec_wikification_py.local_wiki_index import LocalWikipediaIndex
+from word2vec_wikification_py.cache_objects import ResultCacheObject, CandidateCacheObject
+from word2vec_wikification_py import search_wiki_pages
+from concurrent.futures import Executor
+from typing import List, Any, Dict
+from functools import partial
+import asyncio
+
+
+def is_async_connector(wikipedia_db_connector)->bool:
+    """* What you can do
+    - You check if wikipedia_db_connector is aiomysql.Pool or aiomysql.Connection.
+    """
+    if aiomysql is None:
+        return False
+    return isinstance(wikipedia_db_connector, (aiomysql.Pool, aiomysql.Connection))
+
+
+async def __fetch_all_async(wikipedia_db_connector, query:str, args:Any)->List[tuple]:
+    if isinstance(wikipedia_db_connector, aiomysql.Pool):
+        async with wikipedia_db_connector.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, args)
+                return list(await cursor.fetchall())
+    else:
+        async with wikipedia_db_connector.cursor() as cursor:
+            await cursor.execute(query, args)
+            return list(await cursor.fetchall())
+
+
+async def __search_chunk_async(seq_chunk_token:List[str],
+                               wikipedia_db_connector,
+                               page_table_name:str,
+                               page_table_redirect:str,
+                               token2article_names:Dict[str,List[str]]):
+    page_query, page_query_args = search_wiki_pages.make_bulk_page_query(page_table_name, seq_chunk_token)
+    fetched_records = search_wiki_pages.decode_page_records(
+        await __fetch_all_async(wikipedia_db_connector, page_query, page_query_args))
+    redirect_ids = search_wiki_pages.get_redirect_page_ids(fetched_records)
+    if redirect_ids == []:
+        seq_redirect_record = []
+    else:
+        seq_redirect_record = await __fetch_all_async(wikipedia_db_connector,
+                                                      search_wiki_pages.make_bulk_redirect_query(page_table_redirect),
+                                                      (redirect_ids,))
+    search_wiki_pages.merge_bulk_search_records(seq_chunk_token, fetched_records, seq_redirect_record, token2article_names)
+
+
+async def search_tokens_async(seq_token:List[str],
+                              wikipedia_db_connector,
+                              page_table_name:str='page',
+                              page_table_redirect:str='redirect',
+                              chunk_size:int=1000,
+                              executor:Executor=None,
+                              candidate_cache:CandidateCacheObject=None)->List[List[str]]:
+    """* What you can do
+    - It's the async version of search_function_from_wikipedia_database_bulk()
+    - With aiomysql.Pool, queries of chunks run concurrently on the event loop. With aiomysql.Connection, they run one by one.
+    - With other connectors (pymysql.Connection, MysqlConnectionPool, LocalWikipediaIndex), the sync function runs in executor.
+    - With candidate_cache, only tokens missing in the cache are searched. Their results are put into the cache.
+    """
+    if not candidate_cache is None:
+        seq_candidate = candidate_cache.get_many_candidates(seq_token)
+        seq_missing_token = list(dict.fromkeys(token for token, article_names in zip(seq_token, seq_candidate) if article_names is None))
+        if len(seq_missing_token) > 0:
+            seq_missing_result = await search_tokens_async(seq_token=seq_missing_token,
+                                                           wikipedia_db_connector=wikipedia_db_connector,
+                                                           page_table_name=page_table_name,
+                                                           page_table_redirect=page_table_redirect,
+                                                           chunk_size=chunk_size,
+                                                           executor=executor)
+            token2article_names = dict(zip(seq_missing_token, seq_missing_result))
+            candidate_cache.put_many_candidates(token2article_names.items())
+            seq_candidate = [list(token2article_names[token]) if article_names is None else article_names
+                             for token, article_names in zip(seq_token, seq_candidate)]
+        return seq_candidate
+
+    if is_async_connector(wikipedia_db_connector):
+        seq_unique_token = list(dict.fromkeys(seq_token))
+        token2article_names = {}  # type: Dict[str,List[str]]
+        seq_coroutine = [__search_chunk_async(seq_unique_token[chunk_start:chunk_start+chunk_size],
+                                              wikipedia_db_connector,
+                                              page_table_name,
+                                              page_table_redirect,
+                                              token2article_names)
+                         for chunk_start in range(0, len(seq_unique_token), chunk_size)]
+        if isinstance(wikipedia_db_connector, aiomysql.Pool):
+            await asyncio.gather(*seq_coroutine)
+        else:
+            # a connection can't run queries concurrently
+            for coroutine in seq_coroutine:
+                await coroutine
+        return search_wiki_pages.collect_bulk_search_result(seq_token, token2article_names)
+
+    if isinstance(wikipedia_db_connector, LocalWikipediaIndex):
+        function_search_tokens = search_wiki_pages.search_function_from_local_index_bulk
+    else:
+        function_search_tokens = search_wiki_pages.search_function_from_wikipedia_database_bulk
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(function_search_tokens,
+                                                        seq_token=seq_token,
+                                                        wikipedia_db_connector=wikipedia_db_connector,
+                                                        page_table_name=page_table_name,
+                                                        page_table_redirect=page_table_redirect,
+                                                        chunk_size=chunk_size))
+
+
+async def predict_japanese_wiki_names_async(input_tokens,
+                                            wikipedia_db_connector,
+                                            entity_vector_model,
+                                            is_use_cache=False,
+                                            is_sort_object=True,
+                                            page_table_name='page',
+                                            page_table_redirect='redirect',
+                                            search_method='complete',
+                                            similarity_cache=None,
+                                            title_trie=None,
+                                            top_k=None,
+                                            max_candidates=None,
+                                            candidate_prior=None,
+                                            result_cache=None,
+                                            candidate_cache=None,
+                                            executor=None) -> List[SequenceScore]:
+    """* What you can do
+    - It's the async version of predict_japanese_wiki_names_with_wikidump(). Params are the same except executor.
+    - Lattice scoring and decoding run in executor, so the event loop isn't blocked.
+
+    * Params
+    - wikipedia_db_connector: aiomysql.Pool, aiomysql.Connection, or a connector of predict_japanese_wiki_names_with_wikidump()
+    - candidate_cache: CandidateCacheObject. It's looked up on the event loop, and only missing tokens are searched.
+    - executor: concurrent.futures.Executor. The default executor of the event loop is used if None.
+    """
+    # type: (List[str],Any,Any,bool,bool,str,str,str,Any,Any,int,int,Dict[str,float],ResultCacheObject,CandidateCacheObject,Executor)->List[SequenceScore]
+    loop = asyncio.get_running_loop()
+    if search_method == 'partial':
+        if is_async_connector(wikipedia_db_connector):
+            raise Exception('search_method=partial is not available with an async connector. Use search_method=complete.')
+        return await loop.run_in_executor(executor, partial(predict_japanese_wiki_names_with_wikidump,
+                                                            input_tokens=input_tokens,
+                                                            wikipedia_db_connector=wikipedia_db_connector,
+                                                            entity_vector_model=entity_vector_model,
+                                                            is_use_cache=is_use_cache,
+                                                            is_sort_object=is_sort_object,
+                                                            page_table_name=page_table_name,
+                                                            page_table_redirect=page_table_redirect,
+                                                            search_method=search_method,
+                                                            similarity_cache=similarity_cache,
+                                                            title_trie=title_trie,
+                                                            top_k=top_k,
+                                                            max_candidates=max_candidates,
+                                                            candidate_prior=candidate_prior,
+                                                            result_cache=result_cache,
+                                                            candidate_cache=candidate_cache))
+    elif search_method == 'complete':
+        search_result = await search_tokens_async(seq_token=input_tokens,
+                                                  wikipedia_db_connector=wikipedia_db_connector,
+                                                  page_table_name=page_table_name,
+                                                  page_table_redirect=page_table_redirect,
+                                                  executor=executor,
+                                                  candidate_cache=candidate_cache)
+        seq_wiki_article_name = [
+            WikipediaArticleObject(page_title=token, candidate_article_name=[add_article_symbol(string) for string in results])
+            for token, results in zip(input_tokens, search_result) if not results == []]
+        return await loop.run_in_executor(executor, partial(compute_wiki_node_probability,
+                                                            seq_wiki_article_name=seq_wiki_article_name,
+                                                            entity_vector_model=entity_vector_model,
+                                                            is_use_cache=is_use_cache,
+                                                            is_sort_object=is_sort_object,
+                                                            similarity_cache=similarity_cache,
+                                                            top_k=top_k,
+                                                            max_candidates=max_candidates,
+                                                            candidate_prior=candidate_prior,
+                                                            result_cache=result_cache))
+    else:
+        raise Exception('There is no search method named {}'.format(search_method))
+
+
+async def predict_sentences_async(seq_input_tokens:List[List[str]],
+                                  wikipedia_db_connector,
+                                  entity_vector_model,
+                                  max_concurrency:int=8,
+                                  **kwargs)->List[List[SequenceScore]]:
+    """* What you can do
+    - You wikify many sentences concurrently. Lookups of a sentence overlap with scoring of other sentences.
+    - At most max_concurrency sentences are processed at the same time. The output is in the order of seq_input_tokens.
+    - kwargs are given to predict_japanese_wiki_names_async()
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def predict(input_tokens):
+        async with semaphore:
+            return await predict_japanese_wiki_names_async(input_tokens=input_tokens,
+                                                           wikipedia_db_connector=wikipedia_db_connector,
+                                                           entity_vector_model=entity_vector_model,
+                                                           **kwargs)
+
+    return list(await asyncio.gather(*[predict(input_tokens) for input_tokens in seq_input_tokens]))
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from word2vec_wikification_py.models import SequenceScore
+from word2vec_wikification_py.entity_vector_store import EntityVectorStore
+from word2vec_wikification_py.interface import search_wiki_article_objects, compute_wiki_node_probability
+from word2vec_wikification_py import init_logger
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import List, Iterable, Iterator, Callable, Any, Union, Dict
+import logging
+logger = logging.getLogger(name=init_logger.LOGGER_NAME)
+
+# resources of a worker process. They are set once by __initialize_worker()
+__worker_resource = {}  # type: Dict[str,Any]
+
+
+def __initialize_worker(path_entity_vector_store:str, connector_factory:Callable[[], Any]):
+    """* What you can do
+    - You attach entity vectors and open a connector once in a worker process.
+    - Vectors are memory-mapped, so all workers share the same pages of the store file.
+    """
+    __worker_resource['entity_vector_model'] = EntityVectorStore(path_entity_vector_store, mmap_mode='r')
+    __worker_resource['wikipedia_db_connector'] = connector_factory()
+
+
+def predict_chunk(seq_input_tokens:List[List[str]],
+                  wikipedia_db_connector,
+                  entity_vector_model,
+                  search_method:str='complete',
+                  top_k:int=None,
+                  is_sort_object:bool=True,
+                  page_table_name:str='page',
+                  page_table_redirect:str='redirect')->List[List[SequenceScore]]:
+    """* What you can do
+    - You wikify sentences one by one in the current process.
+
+    * Params
+    - top_k: the number of routes of a sentence. If None, it returns all routes.
+    """
+    seq_result = []
+    for input_tokens in seq_input_tokens:
+        seq_wiki_article_name = search_wiki_article_objects(input_tokens=input_tokens,
+                                                            wikipedia_db_connector=wikipedia_db_connector,
+                                                            page_table_name=page_table_name,
+                                                            page_table_redirect=page_table_redirect,
+                                                            search_method=search_method)
+        sequence_score_objects = compute_wiki_node_probability(seq_wiki_article_name=seq_wiki_article_name,
+                                                               entity_vector_model=entity_vector_model,
+                                                               is_sort_object=is_sort_object,
+                                                               top_k=top_k)
+        seq_result.append(sequence_score_objects)
+    return seq_result
+
+
+def __predict_chunk_in_worker(seq_input_tokens:List[List[str]], **kwargs)->List[List[SequenceScore]]:
+    return predict_chunk(seq_input_tokens,
+                         wikipedia_db_connector=__worker_resource['wikipedia_db_connector'],
+                         entity_vector_model=__worker_resource['entity_vector_model'],
+                         **kwargs)
+
+
+def iterate_chunks(iterable_input_tokens:Iterable[List[str]], chunk_size:int)->Iterator[List[List[str]]]:
+    chunk = []
+    for input_tokens in iterable_input_tokens:
+        chunk.append(input_tokens)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
+def predict_japanese_wiki_names_batch(iterable_input_tokens:Iterable[List[str]],
+                                      entity_vector_store:Union[str, EntityVectorStore],
+                                      connector_factory:Callable[[], Any],
+                                      n_process:int=4,
+                                      chunk_size:int=16,
+                                      max_in_flight:int=None,
+                                      search_method:str='complete',
+                                      top_k:int=None,
+                                      is_sort_object:bool=True,
+                                      page_table_name:str='page',
+                                      page_table_redirect:str='redirect')->Iterator[List[SequenceScore]]:
+    """* What you can do
+    - You wikify a stream of tokenized sentences with a process pool.
+    - It yields a list of SequenceScore per sentence in the order of iterable_input_tokens.
+    - Each worker memory-maps the entity vector store once. The model is never pickled into tasks.
+
+    * Params
+    - entity_vector_store: EntityVectorStore or a path to its directory. Make it with load_entity_model(is_use_cache=True)
+    - connector_factory: a picklable callable which returns a connector in a worker.
+        e.g. functools.partial(LocalWikipediaIndex, path_index_file) or functools.partial(initialize_pymysql_connector, ...)
+    - n_process: the number of worker processes. If 0, sentences are processed in the current process.
+    - chunk_size: the number of sentences in one task
+    - max_in_flight: the max number of tasks submitted but not yielded yet. Default is 2 * n_process.
+        Input is read lazily, so memory usage is bounded even for an endless stream.
+    - top_k: the number of routes of a sentence. If None, it returns all routes.
+    """
+    path_entity_vector_store = entity_vector_store.path_store_dir if isinstance(entity_vector_store, EntityVectorStore) else entity_vector_store
+    task_params = dict(search_method=search_method,
+                       top_k=top_k,
+                       is_sort_object=is_sort_object,
+                       page_table_name=page_table_name,
+                       page_table_redirect=page_table_redirect)
+
+    if n_process == 0:
+        entity_vector_model = EntityVectorStore(path_entity_vector_store)
+        wikipedia_db_connector = connector_factory()
+        for chunk in iterate_chunks(iterable_input_tokens, chunk_size):
+            for result in predict_chunk(chunk, wikipedia_db_connector, entity_vector_model, **task_params):
+                yield result
+        return
+
+    if max_in_flight is None:
+        max_in_flight = 2 * n_process
+    with ProcessPoolExecutor(max_workers=n_process,
+                             initializer=__initialize_worker,
+                             initargs=(path_entity_vector_store, connector_factory)) as executor:
+        futures = deque()
+        for chunk in iterate_chunks(iterable_input_tokens, chunk_size):
+            futures.append(executor.submit(__predict_chunk_in_worker, chunk, **task_params))
+            if len(futures) >= max_in_flight:
+                for result in futures.popleft().result():
+                    yield result
+        while len(futures) > 0:
+            for result in futures.popleft().result():
+                yield result
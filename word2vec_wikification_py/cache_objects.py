@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+from word2vec_wikification_py.models import WikipediaArticleObject, WikipediaArticleView, SequenceScore
+from word2vec_wikification_py import serialization
+from collections import OrderedDict
+from numpy import ndarray
+from typing import List, Tuple, Any, Dict, Hashable, Iterable, Callable
+import numpy
+import threading
+import hashlib
+import sqlite3
+import shutil
+import json
+import time
+import sys
+import os
+
+
+DEFAULT_SIMILARITY_CACHE_BYTES = 64 * 1024 * 1024
+# approximate bytes of a node and a hash slot of OrderedDict per entry
+ENTRY_OVERHEAD_BYTES = 104
+
+
+class LruCacheObject(object):
+    """Size-bounded LRU cache. It's safe to use from multiple threads.
+    It counts hit, miss, eviction and expiration. get_statistics() returns them.
+    With max_bytes, it's also bounded by approximate bytes of entries. See get_entry_bytes()
+    A subclass can expire entries by is_expired().
+    """
+    def __init__(self, max_size:int=100000, max_bytes:int=None):
+        if max_size < 1:
+            raise Exception('max_size must be more than 0. max_size={}'.format(max_size))
+        if not max_bytes is None and max_bytes < 1:
+            raise Exception('max_bytes must be more than 0. max_bytes={}'.format(max_bytes))
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.__lock = threading.Lock()
+        self.__data = OrderedDict()  # type: OrderedDict
+        self.__n_bytes = 0
+        self.__n_hit = 0
+        self.__n_miss = 0
+        self.__n_eviction = 0
+        self.__n_expiration = 0
+
+    def get_entry_bytes(self, key:Hashable, value:Any)->int:
+        """* What you can do
+        - You get approximate bytes of an entry. It's used only with max_bytes. A subclass can override it.
+        """
+        return ENTRY_OVERHEAD_BYTES + sys.getsizeof(key) + sys.getsizeof(value)
+
+    def is_expired(self, key:Hashable, value:Any)->bool:
+        """* What you can do
+        - A subclass returns True for an entry which must not be returned any more. It's called in the lock.
+        - get_many() removes an expired entry and counts it as a miss, not a hit.
+        """
+        return False
+
+    def __len__(self)->int:
+        return len(self.__data)
+
+    def __contains__(self, key:Hashable)->bool:
+        return key in self.__data
+
+    def get(self, key:Hashable, default:Any=None)->Any:
+        return self.get_many([key], default=default)[0]
+
+    def get_many(self, seq_key:List[Hashable], default:Any=None)->List[Any]:
+        """* What you can do
+        - You get values of keys with one lock. default is put for missing keys.
+        """
+        seq_value = [default] * len(seq_key)
+        with self.__lock:
+            for index, key in enumerate(seq_key):
+                if key in self.__data and self.is_expired(key, self.__data[key]):
+                    # the check and the deletion are in one lock, so an entry put by another thread is never deleted
+                    self.__pop_entry(key)
+                    self.__n_expiration += 1
+                if key in self.__data:
+                    self.__data.move_to_end(key)
+                    seq_value[index] = self.__data[key]
+                    self.__n_hit += 1
+                else:
+                    self.__n_miss += 1
+        return seq_value
+
+    def put(self, key:Hashable, value:Any):
+        self.put_many([(key, value)])
+
+    def put_many(self, seq_key_value:Iterable[Tuple[Hashable, Any]]):
+        """* What you can do
+        - You put key-value pairs with one lock. The least recently used keys are evicted over max_size.
+        """
+        with self.__lock:
+            for key, value in seq_key_value:
+                if not self.max_bytes is None:
+                    if key in self.__data:
+                        self.__n_bytes -= self.get_entry_bytes(key, self.__data[key])
+                    self.__n_bytes += self.get_entry_bytes(key, value)
+                self.__data[key] = value
+                self.__data.move_to_end(key)
+            while len(self.__data) > self.max_size or (not self.max_bytes is None and self.__n_bytes > self.max_bytes):
+                self.__pop_entry(next(iter(self.__data)))
+                self.__n_eviction += 1
+
+    def __pop_entry(self, key:Hashable):
+        """* What you can do
+        - You remove a key in the lock and update bytes of entries.
+        """
+        value = self.__data.pop(key)
+        if not self.max_bytes is None:
+            self.__n_bytes -= self.get_entry_bytes(key, value)
+
+    def delete(self, key:Hashable):
+        with self.__lock:
+            if key in self.__data:
+                self.__pop_entry(key)
+
+    def items(self)->List[Tuple[Hashable, Any]]:
+        """* What you can do
+        - You get a snapshot of key-value pairs from the least recently used one. It doesn't change the order.
+        """
+        with self.__lock:
+            return list(self.__data.items())
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+            self.__n_bytes = 0
+            self.__n_hit = 0
+            self.__n_miss = 0
+            self.__n_eviction = 0
+            self.__n_expiration = 0
+
+    def get_statistics(self)->Dict[str,int]:
+        with self.__lock:
+            statistics = {
+                'hits': self.__n_hit,
+                'misses': self.__n_miss,
+                'evictions': self.__n_eviction,
+                'expirations': self.__n_expiration,
+                'size': len(self.__data),
+                'max_size': self.max_size
+            }
+            if not self.max_bytes is None:
+                statistics['bytes'] = self.__n_bytes
+                statistics['max_bytes'] = self.max_bytes
+            return statistics
+
+
+class SimilarityCacheObject(LruCacheObject):
+    """LRU cache of similarity between 2 entities. A key is an unordered pair of entity names.
+    A score block between 2 positions is made from pair entries, so a block is reused even if tokens are swapped
+    or a candidate is added or pruned.
+    It's bounded by max_size pairs and max_bytes bytes.
+    The same object can be shared among calls of interface.compute_wiki_node_probability()
+    """
+    def __init__(self, max_size:int=1000000, max_bytes:int=DEFAULT_SIMILARITY_CACHE_BYTES):
+        LruCacheObject.__init__(self, max_size=max_size, max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(entity_name_1:str, entity_name_2:str)->Tuple[str, str]:
+        if entity_name_1 <= entity_name_2:
+            return (entity_name_1, entity_name_2)
+        else:
+            return (entity_name_2, entity_name_1)
+
+    def get_entry_bytes(self, key:Tuple[str, str], value:float)->int:
+        return ENTRY_OVERHEAD_BYTES + sys.getsizeof(key) + sys.getsizeof(key[0]) + sys.getsizeof(key[1]) + sys.getsizeof(value)
+
+    def get_similarity(self, entity_name_1:str, entity_name_2:str)->float:
+        return self.get(self.make_key(entity_name_1, entity_name_2))
+
+    def put_similarity(self, entity_name_1:str, entity_name_2:str, similarity:float):
+        self.put(self.make_key(entity_name_1, entity_name_2), float(similarity))
+
+    def get_many_similarity(self, seq_entity_pair:List[Tuple[str, str]])->List[float]:
+        """* What you can do
+        - You get similarities of entity pairs. None is put for missing pairs.
+        """
+        return self.get_many([self.make_key(name_1, name_2) for name_1, name_2 in seq_entity_pair])
+
+    def put_many_similarity(self, seq_entity_pair_similarity:Iterable[Tuple[str, str, float]]):
+        self.put_many((self.make_key(name_1, name_2), float(similarity)) for name_1, name_2, similarity in seq_entity_pair_similarity)
+
+    def get_block(self, seq_label_t:List[str], seq_label_t_plus:List[str])->Tuple[ndarray, ndarray]:
+        """* What you can do
+        - You get scores between labels at t and t+1 from pair entries with one lock. A pair is counted as a hit or a miss.
+
+        * Output
+        - tuple of (score matrix, is_cached). Both have shape (len(seq_label_t), len(seq_label_t_plus)).
+        - is_cached is True for cached pairs. A score of a missing pair is 0.0.
+        """
+        seq_similarity = self.get_many([self.make_key(label_t, label_t_plus)
+                                        for label_t in seq_label_t for label_t_plus in seq_label_t_plus])
+        shape = (len(seq_label_t), len(seq_label_t_plus))
+        is_cached = numpy.array([not similarity is None for similarity in seq_similarity], dtype=numpy.bool_).reshape(shape)
+        score_matrix = numpy.array([0.0 if similarity is None else similarity for similarity in seq_similarity],
+                                   dtype=numpy.float32).reshape(shape)
+        return score_matrix, is_cached
+
+    def put_block(self, seq_label_t:List[str], seq_label_t_plus:List[str], score_matrix:ndarray, is_cached:ndarray=None):
+        """* What you can do
+        - You put scores between labels at t and t+1 as pair entries. Pairs whose is_cached is True are skipped.
+        """
+        self.put_many((self.make_key(label_t, label_t_plus), float(score_matrix[row, column]))
+                      for row, label_t in enumerate(seq_label_t)
+                      for column, label_t_plus in enumerate(seq_label_t_plus)
+                      if is_cached is None or not is_cached[row, column])
+
+
+class SqliteCacheObject(object):
+    """Persistent key-value cache on a sqlite file. Keys are str and values are bytes.
+    It has the same methods as LruCacheObject. It's safe to use from multiple threads.
+    Over max_size, the oldest keys are evicted. If max_size is None, it's not bounded.
+    """
+    def __init__(self, path_db_file:str, max_size:int=None):
+        if not max_size is None and max_size < 1:
+            raise Exception('max_size must be more than 0. max_size={}'.format(max_size))
+        self.path_db_file = path_db_file
+        self.max_size = max_size
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path_db_file, check_same_thread=False, timeout=30.0)
+        self.__connection.execute('CREATE TABLE IF NOT EXISTS cache (cache_key TEXT PRIMARY KEY, cache_value BLOB NOT NULL)')
+        self.__connection.commit()
+        self.__n_hit = 0
+        self.__n_miss = 0
+        self.__n_eviction = 0
+
+    def __len__(self)->int:
+        with self.__lock:
+            return self.__connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def __contains__(self, key:str)->bool:
+        with self.__lock:
+            return not self.__connection.execute('SELECT 1 FROM cache WHERE cache_key = ?', (key, )).fetchone() is None
+
+    def get(self, key:str, default:Any=None)->Any:
+        return self.get_many([key], default=default)[0]
+
+    def get_many(self, seq_key:List[str], default:Any=None)->List[Any]:
+        seq_value = [default] * len(seq_key)
+        with self.__lock:
+            for index, key in enumerate(seq_key):
+                record = self.__connection.execute('SELECT cache_value FROM cache WHERE cache_key = ?', (key, )).fetchone()
+                if record is None:
+                    self.__n_miss += 1
+                else:
+                    seq_value[index] = bytes(record[0])
+                    self.__n_hit += 1
+        return seq_value
+
+    def put(self, key:str, value:bytes):
+        self.put_many([(key, value)])
+
+    def put_many(self, seq_key_value:Iterable[Tuple[str, bytes]]):
+        with self.__lock:
+            # a replaced key gets a new rowid, so it's evicted as the newest key
+            self.__connection.executemany('INSERT OR REPLACE INTO cache (cache_key, cache_value) VALUES (?, ?)',
+                                          ((key, sqlite3.Binary(value)) for key, value in seq_key_value))
+            if not self.max_size is None:
+                n_record = self.__connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+                if n_record > self.max_size:
+                    self.__connection.execute('DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache ORDER BY rowid LIMIT ?)',
+                                              (n_record - self.max_size, ))
+                    self.__n_eviction += n_record - self.max_size
+            self.__connection.commit()
+
+    def delete(self, key:str):
+        with self.__lock:
+            self.__connection.execute('DELETE FROM cache WHERE cache_key = ?', (key, ))
+            self.__connection.commit()
+
+    def clear(self):
+        with self.__lock:
+            self.__connection.execute('DELETE FROM cache')
+            self.__connection.commit()
+            self.__n_hit = 0
+            self.__n_miss = 0
+            self.__n_eviction = 0
+
+    def get_statistics(self)->Dict[str,int]:
+        size = len(self)
+        with self.__lock:
+            return {
+                'hits': self.__n_hit,
+                'misses': self.__n_miss,
+                'evictions': self.__n_eviction,
+                'size': size,
+                'max_size': self.max_size
+            }
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+
+def make_result_cache_key(seq_wiki_article_name:List[WikipediaArticleObject],
+                          model_version:str,
+                          candidate_prior:Dict[str,float]=None,
+                          **params)->str:
+    """* What you can do
+    - You get a stable hash of a sentence. It's the same among processes and restarts.
+    - The key depends on the order of tokens, model_version and params, e.g. top_k.
+    - Candidates of a token are sorted, because search functions don't keep the order of candidates among processes.
+    - Only prior scores of candidates in the sentence are put into the key, because the others don't change the result.
+    """
+    seq_candidate = [[wiki_article_obj.page_title, sorted(wiki_article_obj.candidate_article_name)] for wiki_article_obj in seq_wiki_article_name]
+    if not candidate_prior is None:
+        params['candidate_prior'] = [[candidate_prior.get(article_name, 0.0) for article_name in candidate_article_name]
+                                     for page_title, candidate_article_name in seq_candidate]
+    key_source = json.dumps([model_version, seq_candidate, params], ensure_ascii=False, sort_keys=True, default=float)
+    return hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+
+
+class ResultCacheObject(object):
+    """Cache of results of interface.compute_wiki_node_probability() per sentence.
+    - Results are kept in LruCacheObject. With path_db_file, they are also kept in SqliteCacheObject, so they survive restarts.
+    - model_version must be changed when the entity vector model is changed. It's a part of every key.
+    - Routes are materialized when they're put, so a cached result never keeps its lattice.
+    - The memory cache keeps an immutable form of results. Every hit returns new SequenceScore objects.
+    """
+    def __init__(self,
+                 model_version:str,
+                 max_size:int=10000,
+                 path_db_file:str=None,
+                 max_db_size:int=None):
+        self.model_version = model_version
+        self.memory_cache = LruCacheObject(max_size=max_size)
+        if path_db_file is None:
+            self.db_cache = None
+        else:
+            self.db_cache = SqliteCacheObject(path_db_file, max_size=max_db_size)
+
+    def make_key(self, seq_wiki_article_name:List[WikipediaArticleObject], candidate_prior:Dict[str,float]=None, **params)->str:
+        return make_result_cache_key(seq_wiki_article_name, self.model_version, candidate_prior, **params)
+
+    @staticmethod
+    def freeze_result(seq_sequence_score:List[SequenceScore])->Tuple[Tuple]:
+        """* What you can do
+        - You get an immutable form of results. Articles become tuples of (page_title, candidate_article_name, article_name).
+        """
+        seq_frozen_result = []
+        for sequence_score_obj in seq_sequence_score:
+            seq_frozen_word = tuple(
+                (word.page_title, tuple(word.candidate_article_name), word.article_name) if isinstance(word, WikipediaArticleObject) else word
+                for word in sequence_score_obj.seq_words)
+            seq_frozen_result.append((seq_frozen_word, tuple(sequence_score_obj.seq_transition_score), sequence_score_obj.sequence_score))
+        return tuple(seq_frozen_result)
+
+    @staticmethod
+    def thaw_result(frozen_result:Tuple[Tuple])->List[SequenceScore]:
+        """* What you can do
+        - You get new SequenceScore objects from freeze_result() output. Changing them doesn't change the cache.
+        """
+        return [SequenceScore(seq_words=[WikipediaArticleView(page_title=word[0], candidate_article_name=list(word[1]), article_name=word[2])
+                                         if isinstance(word, tuple) else word for word in seq_frozen_word],
+                              seq_transition_score=list(seq_transition_score),
+                              sequence_score=sequence_score)
+                for seq_frozen_word, seq_transition_score, sequence_score in frozen_result]
+
+    def get_result(self, key:str)->List[SequenceScore]:
+        """* What you can do
+        - You get new SequenceScore objects of the cached result. None is returned for a missing key.
+        - The cache keeps an immutable form, so a caller can change returned objects.
+        """
+        frozen_result = self.memory_cache.get(key)
+        if frozen_result is None and not self.db_cache is None:
+            binary = self.db_cache.get(key)
+            if not binary is None:
+                frozen_result = self.freeze_result(serialization.loads_sequence_scores(binary)[0])
+                self.memory_cache.put(key, frozen_result)
+        if frozen_result is None:
+            return None
+        return self.thaw_result(frozen_result)
+
+    def put_result(self, key:str, seq_sequence_score:List[SequenceScore]):
+        for sequence_score_obj in seq_sequence_score:
+            sequence_score_obj.materialize()
+        self.memory_cache.put(key, self.freeze_result(seq_sequence_score))
+        if not self.db_cache is None:
+            self.db_cache.put(key, serialization.dumps_sequence_scores([seq_sequence_score]))
+
+    def clear(self):
+        self.memory_cache.clear()
+        if not self.db_cache is None:
+            self.db_cache.clear()
+
+    def get_statistics(self)->Dict[str,Dict[str,int]]:
+        return {
+            'memory': self.memory_cache.get_statistics(),
+            'db': None if self.db_cache is None else self.db_cache.get_statistics()
+        }
+
+    def close(self):
+        if not self.db_cache is None:
+            self.db_cache.close()
+
+
+class CandidateCacheObject(LruCacheObject):
+    """LRU cache of token -> article names of wikipedia-dump database. An entry expires after ttl seconds.
+    - A token without article names is also cached (negative cache). It expires after negative_ttl seconds.
+    - Use one object per database. Tokens of different databases must not be mixed in one object.
+    - With path_warm_start_file, entries in the file are loaded at start. save() writes current entries into the file.
+    """
+    def __init__(self,
+                 max_size:int=100000,
+                 ttl:float=3600.0,
+                 negative_ttl:float=None,
+                 path_warm_start_file:str=None):
+        LruCacheObject.__init__(self, max_size=max_size)
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.path_warm_start_file = path_warm_start_file
+        if not path_warm_start_file is None and os.path.exists(path_warm_start_file):
+            self.load(path_warm_start_file)
+
+    def is_expired(self, token:str, value:Tuple[float, Tuple[str, ...]])->bool:
+        return value[0] < time.monotonic()
+
+    def get_many_candidates(self, seq_token:List[str])->List[List[str]]:
+        """* What you can do
+        - You get article names of tokens. None is put for missing or expired tokens.
+        - An expired token is removed and counted as a miss.
+        """
+        return [None if cached_value is None else list(cached_value[1]) for cached_value in self.get_many(seq_token)]
+
+    def put_many_candidates(self, seq_token_candidate:Iterable[Tuple[str, List[str]]]):
+        now = time.monotonic()
+        self.put_many((token, (now + (self.ttl if len(article_names) > 0 else self.negative_ttl), tuple(article_names)))
+                      for token, article_names in seq_token_candidate)
+
+    def get_candidates(self, token:str)->List[str]:
+        return self.get_many_candidates([token])[0]
+
+    def put_candidates(self, token:str, article_names:List[str]):
+        self.put_many_candidates([(token, article_names)])
+
+    def wrap_search_function(self, search_function:Callable[..., List[str]])->Callable[..., List[str]]:
+        """* What you can do
+        - You get a search function of one token which looks up this cache first.
+          e.g. search_wiki_pages.search_function_from_wikipedia_database
+        """
+        def search_token(token:str, *args, **kwargs)->List[str]:
+            article_names = self.get_candidates(token)
+            if article_names is None:
+                article_names = search_function(token, *args, **kwargs)
+                self.put_candidates(token, article_names)
+            return article_names
+        return search_token
+
+    def wrap_bulk_search_function(self, bulk_search_function:Callable[..., List[List[str]]])->Callable[..., List[List[str]]]:
+        """* What you can do
+        - You get a search function of tokens which searches only tokens missing in this cache.
+          e.g. search_wiki_pages.search_function_from_wikipedia_database_bulk
+        """
+        def search_tokens(seq_token:List[str], *args, **kwargs)->List[List[str]]:
+            seq_candidate = self.get_many_candidates(seq_token)
+            seq_missing_token = list(dict.fromkeys(token for token, article_names in zip(seq_token, seq_candidate) if article_names is None))
+            if len(seq_missing_token) > 0:
+                token2article_names = dict(zip(seq_missing_token, bulk_search_function(seq_missing_token, *args, **kwargs)))
+                self.put_many_candidates(token2article_names.items())
+                seq_candidate = [list(token2article_names[token]) if article_names is None else article_names
+                                 for token, article_names in zip(seq_token, seq_candidate)]
+            return seq_candidate
+        return search_tokens
+
+    def save(self, path_file:str=None):
+        """* What you can do
+        - You write entries into a json file. Expired entries are not written.
+        - An entry is written as {token: [expire time in unix time, article names]}, so that remaining ttl is kept in other processes.
+        """
+        path_file = self.path_warm_start_file if path_file is None else path_file
+        if path_file is None:
+            raise Exception('path_file or path_warm_start_file must be given.')
+        now = time.monotonic()
+        now_unix_time = time.time()
+        token2entry = {token: [now_unix_time + (expire_time - now), list(article_names)]
+                       for token, (expire_time, article_names) in self.items() if expire_time >= now}
+        path_temporary_file = path_file + '.tmp'
+        with open(path_temporary_file, 'w', encoding='utf-8') as f:
+            json.dump(token2entry, f, ensure_ascii=False)
+        shutil.move(path_temporary_file, path_file)
+
+    def load(self, path_file:str):
+        """* What you can do
+        - You put entries of a json file made by save(). They expire at the time which was saved, and expired entries are skipped.
+        - An old file of {token: article names} is also accepted. Its entries expire after ttl (negative_ttl) from now.
+        """
+        with open(path_file, 'r', encoding='utf-8') as f:
+            token2entry = json.load(f)
+        now = time.monotonic()
+        now_unix_time = time.time()
+        seq_token_value = []
+        seq_token_candidate = []
+        for token, entry in token2entry.items():
+            if len(entry) == 2 and isinstance(entry[0], (int, float)) and isinstance(entry[1], list):
+                expire_unix_time, article_names = entry
+                if expire_unix_time >= now_unix_time:
+                    seq_token_value.append((token, (now + (expire_unix_time - now_unix_time), tuple(article_names))))
+            else:
+                seq_token_candidate.append((token, entry))
+        self.put_many(seq_token_value)
+        self.put_many_candidates(seq_token_candidate)
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Command line pipeline of wikification. Input and output are JSONL.
+
+Input: one sentence per line. A line is a list of tokens, or an object with "tokens" key.
+    ["ヤマハ", "バイク", "スズキ"]
+    {"id": "doc-1", "tokens": ["ヤマハ", "バイク", "スズキ"]}
+Output: one line per input line, in the same order.
+    {"line": 0, "id": "doc-1", "routes": [SequenceScore.__dict__(), ...]}
+
+word2vec-wikification input.jsonl --entity-model bin/entity_vector/entity_vector.model.bin --local-index jawiki.sqlite
+"""
+from word2vec_wikification_py.batch_interface import predict_japanese_wiki_names_batch
+from word2vec_wikification_py.load_entity_model import load_entity_model
+from word2vec_wikification_py.entity_vector_store import is_entity_vector_store
+from word2vec_wikification_py.local_wiki_index import LocalWikipediaIndex
+from word2vec_wikification_py.initialize_mysql_connector import initialize_pymysql_connector
+from word2vec_wikification_py.models import SequenceScore
+from typing import List, Iterator, Iterable, Tuple, Any, Dict, TextIO, Deque
+from collections import deque
+from functools import partial
+import configparser
+import argparse
+import itertools
+import json
+import time
+import sys
+
+
+def parse_input_line(line:str)->Tuple[Any, List[str]]:
+    """* What you can do
+    - You get (id, tokens) of an input line. id is None when the line is a list of tokens.
+    """
+    if line.strip() == '':
+        return None, []
+    record = json.loads(line)
+    if isinstance(record, dict):
+        return record.get('id'), record['tokens']
+    else:
+        return None, record
+
+
+def format_output_line(line_index:int, record_id:Any, seq_sequence_score:List[SequenceScore])->str:
+    output_record = {'line': line_index}  # type: Dict[str,Any]
+    if not record_id is None:
+        output_record['id'] = record_id
+    output_record['routes'] = [sequence_score.__dict__() for sequence_score in seq_sequence_score]
+    # scores are numpy scalars
+    return json.dumps(output_record, ensure_ascii=False, default=float)
+
+
+class ProgressReporter(object):
+    """It writes the number of processed sentences and throughput on one line of stream.
+    """
+    def __init__(self, stream:TextIO, interval:float=5.0, offset:int=0):
+        self.stream = stream
+        self.interval = interval
+        self.offset = offset
+        self.n_processed = 0
+        self.start_time = time.time()
+        self.last_report_time = self.start_time
+
+    def update(self, n_processed:int=1):
+        self.n_processed += n_processed
+        now = time.time()
+        if now - self.last_report_time >= self.interval:
+            self.last_report_time = now
+            self.report(end='\r')
+
+    def report(self, end:str='\n'):
+        elapsed_time = max(time.time() - self.start_time, 1e-9)
+        self.stream.write('{} sentences (line {}), {:.1f} sentences/sec{}'.format(
+            self.n_processed, self.offset + self.n_processed, self.n_processed / elapsed_time, end))
+        self.stream.flush()
+
+
+def make_connector_factory(args:argparse.Namespace):
+    """* What you can do
+    - You get a picklable callable which opens a connector in a worker process.
+    """
+    if not args.local_index is None:
+        return partial(LocalWikipediaIndex, args.local_index)
+    config_obj = configparser.ConfigParser(allow_no_value=True)
+    if len(config_obj.read(args.config)) == 0:
+        raise FileExistsError('There is no config file at {}'.format(args.config))
+    return partial(initialize_pymysql_connector,
+                   hostname=config_obj.get('Mysql', 'host'),
+                   user_name=config_obj.get('Mysql', 'user_name'),
+                   password=config_obj.get('Mysql', 'password'),
+                   dbname=config_obj.get('Mysql', 'database_name'))
+
+
+def parse_args(argv:List[str]=None)->argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', nargs='?', default='-', help='input JSONL file. "-" means stdin')
+    parser.add_argument('-o', '--output', default='-', help='output JSONL file. "-" means stdout. It is appended with --offset')
+    parser.add_argument('--entity-model', required=True,
+                        help='EntityVectorStore directory, or word2vec model file which is converted into "{path}.store" once')
+    connector_group = parser.add_mutually_exclusive_group(required=True)
+    connector_group.add_argument('--local-index', default=None, help='sqlite file made by local_wiki_index.build_local_index()')
+    connector_group.add_argument('--config', default=None, help='ini file with [Mysql] section. See configs/template.ini')
+    parser.add_argument('--search-method', default='complete', choices=['complete', 'partial'])
+    parser.add_argument('--top-k', type=int, default=1, help='the number of routes per sentence')
+    parser.add_argument('--n-process', type=int, default=4, help='the number of worker processes. 0 runs in this process')
+    parser.add_argument('--chunk-size', type=int, default=16, help='the number of sentences in one task')
+    parser.add_argument('--max-in-flight', type=int, default=None, help='the max number of pending tasks. Default is 2 * n-process')
+    parser.add_argument('--offset', type=int, default=0, help='the number of input lines to skip. Use it to resume after a crash')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='seconds between progress lines on stderr')
+    return parser.parse_args(argv)
+
+
+def main(argv:List[str]=None):
+    args = parse_args(argv)
+    if is_entity_vector_store(args.entity_model):
+        path_entity_vector_store = args.entity_model
+    else:
+        path_entity_vector_store = load_entity_model(args.entity_model, is_use_cache=True).path_store_dir
+
+    input_stream = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    output_mode = 'a' if args.offset > 0 else 'w'
+    output_stream = sys.stdout if args.output == '-' else open(args.output, output_mode, encoding='utf-8')
+    progress_reporter = ProgressReporter(stream=sys.stderr, interval=args.progress_interval, offset=args.offset)
+    try:
+        # ids are kept until their results are written, so memory is bounded by in-flight sentences
+        seq_record_id = deque()  # type: Deque[Any]
+
+        def iterate_tokens(iterable_line:Iterable[str])->Iterator[List[str]]:
+            for line in iterable_line:
+                record_id, tokens = parse_input_line(line)
+                seq_record_id.append(record_id)
+                yield tokens
+
+        iterator_result = predict_japanese_wiki_names_batch(
+            iterable_input_tokens=iterate_tokens(itertools.islice(input_stream, args.offset, None)),
+            entity_vector_store=path_entity_vector_store,
+            connector_factory=make_connector_factory(args),
+            n_process=args.n_process,
+            chunk_size=args.chunk_size,
+            max_in_flight=args.max_in_flight,
+            search_method=args.search_method,
+            top_k=args.top_k)
+        for line_index, seq_sequence_score in enumerate(iterator_result, start=args.offset):
+            output_stream.write(format_output_line(line_index, seq_record_id.popleft(), seq_sequence_score) + '\n')
+            output_stream.flush()
+            progress_reporter.update()
+        progress_reporter.report()
+    finally:
+        if not input_stream is sys.stdin: input_stream.close()
+        if not output_stream is sys.stdout: output_stream.close()
+
+
+if __name__ == '__main__':
+    main()
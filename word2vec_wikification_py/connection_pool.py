@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+from word2vec_wikification_py import init_logger
+from collections import deque
+from typing import Callable, Any, Dict, Tuple, Deque
+import threading
+import time
+import logging
+logger = logging.getLogger(name=init_logger.LOGGER_NAME)
+
+
+def is_connection_error(exception:Exception)->bool:
+    """* What you can do
+    - You check if exception is caused by a broken connection. Errors of SQL syntax are not connection errors.
+    """
+    try:
+        from pymysql.err import OperationalError, InterfaceError
+    except ImportError:
+        return False
+    return isinstance(exception, (OperationalError, InterfaceError))
+
+
+class PooledCursorObject(object):
+    """Cursor which borrows a connection from MysqlConnectionPool. The connection goes back to the pool by close().
+    If a connection is lost in execute(), it reconnects and executes the query once again.
+    Other methods (fetchall(), fetchone(), iteration...) are the same as the cursor of the connection.
+    """
+    def __init__(self, connection_pool, cursor_class=None):
+        # type: (MysqlConnectionPool,Any)->None
+        self.connection_pool = connection_pool
+        self.cursor_class = cursor_class
+        self.connection = connection_pool.acquire()
+        try:
+            self.cursor = self.__make_cursor()
+        except Exception:
+            self.connection_pool.release(self.connection, is_broken=True)
+            raise
+
+    def __make_cursor(self):
+        if self.cursor_class is None:
+            return self.connection.cursor()
+        else:
+            return self.connection.cursor(self.cursor_class)
+
+    def execute(self, query:str, args:Any=None)->int:
+        try:
+            return self.cursor.execute(query, args)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            logger.warning(msg='Connection is lost while a query is executed. It reconnects. Error={}'.format(e))
+            self.connection_pool.reconnect(self.connection)
+            self.cursor = self.__make_cursor()
+            return self.cursor.execute(query, args)
+
+    def close(self):
+        if self.connection is None:
+            return
+        try:
+            self.cursor.close()
+            is_broken = False
+        except Exception as e:
+            logger.warning(msg='Failed to close a cursor. The connection is discarded. Error={}'.format(e))
+            is_broken = True
+        self.connection_pool.release(self.connection, is_broken=is_broken)
+        self.connection = None
+
+    def __getattr__(self, name:str)->Any:
+        return getattr(self.cursor, name)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if not self.__dict__.get('connection') is None:
+            self.close()
+
+
+class MysqlConnectionPool(object):
+    """Size-bounded pool of database connections. It's safe to use from multiple threads.
+    It can be given to search functions and predict_japanese_wiki_names_with_wikidump() instead of pymysql.Connection,
+    because cursor() returns a cursor on a pooled connection.
+
+    - A connection which has been idle longer than health_check_interval is checked with ping() before it's used.
+    - A broken connection is reconnected. If reconnection fails, a new connection is made with connection_factory.
+    - acquire() waits for a free connection while max_size connections are used. It raises TimeoutError after timeout.
+    """
+    def __init__(self,
+                 connection_factory:Callable[[], Any],
+                 max_size:int=4,
+                 timeout:float=None,
+                 health_check_interval:float=30.0):
+        if max_size < 1:
+            raise Exception('max_size must be more than 0. max_size={}'.format(max_size))
+        self.connection_factory = connection_factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.__lock = threading.Lock()
+        self.__semaphore = threading.BoundedSemaphore(max_size)
+        self.__idle_connections = deque()  # type: Deque[Tuple[Any, float]]
+        self.__n_connection = 0
+        self.__n_reconnection = 0
+        self.is_closed = False
+
+    def __str__(self)->str:
+        return 'MysqlConnectionPool with max_size={}'.format(self.max_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __connect(self):
+        connection = self.connection_factory()
+        with self.__lock:
+            self.__n_connection += 1
+        return connection
+
+    @staticmethod
+    def __close_connection(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def __check_connection(self, connection):
+        """* What you can do
+        - You get a working connection. connection is reconnected or replaced when ping() fails.
+        """
+        try:
+            connection.ping(reconnect=True)
+            return connection
+        except Exception as e:
+            logger.warning(msg='Health check of a connection failed. A new connection is made. Error={}'.format(e))
+            self.__close_connection(connection)
+            with self.__lock:
+                self.__n_connection -= 1
+            return self.__connect()
+
+    def acquire(self):
+        """* What you can do
+        - You borrow a connection. You must give it back by release().
+        """
+        if self.is_closed:
+            raise Exception('{} is already closed.'.format(self))
+        is_acquired = self.__semaphore.acquire(timeout=self.timeout) if not self.timeout is None else self.__semaphore.acquire()
+        if not is_acquired:
+            raise TimeoutError('No connection is free in {} seconds. max_size={}'.format(self.timeout, self.max_size))
+        try:
+            with self.__lock:
+                idle_connection = self.__idle_connections.pop() if len(self.__idle_connections) > 0 else None
+            if idle_connection is None:
+                return self.__connect()
+            connection, released_time = idle_connection
+            if time.time() - released_time >= self.health_check_interval:
+                connection = self.__check_connection(connection)
+            return connection
+        except Exception:
+            self.__semaphore.release()
+            raise
+
+    def release(self, connection, is_broken:bool=False):
+        """* What you can do
+        - You give back a connection. A broken connection is closed and it's not reused.
+        """
+        try:
+            if is_broken or self.is_closed:
+                self.__close_connection(connection)
+                with self.__lock:
+                    self.__n_connection -= 1
+            else:
+                with self.__lock:
+                    self.__idle_connections.append((connection, time.time()))
+        finally:
+            self.__semaphore.release()
+
+    def reconnect(self, connection):
+        """* What you can do
+        - You reconnect a borrowed connection in place.
+        """
+        connection.ping(reconnect=True)
+        with self.__lock:
+            self.__n_reconnection += 1
+
+    def cursor(self, cursor_class=None)->PooledCursorObject:
+        return PooledCursorObject(self, cursor_class=cursor_class)
+
+    def get_statistics(self)->Dict[str,int]:
+        with self.__lock:
+            return {'connections': self.__n_connection,
+                    'idle_connections': len(self.__idle_connections),
+                    'reconnections': self.__n_reconnection,
+                    'max_size': self.max_size}
+
+    def close(self):
+        """* What you can do
+        - You close all idle connections. Borrowed connections are closed when they are released.
+        """
+        with self.__lock:
+            self.is_closed = True
+            seq_idle_connection = list(self.__idle_connections)
+            self.__idle_connections.clear()
+            self.__n_connection -= len(seq_idle_connection)
+        for connection, released_time in seq_idle_connection:
+            self.__close_connection(connection)
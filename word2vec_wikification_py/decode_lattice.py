@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+from typing import List, Tuple
+import numpy
+
+
+def __select_top_k_column(score_matrix:numpy.ndarray, top_k:int)->Tuple[numpy.ndarray, numpy.ndarray]:
+    """* What you can do
+    - You pick up top-k rows of each column in score_matrix. Selected rows are sorted by descending score.
+
+    * Output
+    - tuple of (selected_row_index, selected_score). Both of them have shape (n_selected, n_column)
+    """
+    n_row = score_matrix.shape[0]
+    n_selected = min(top_k, n_row)
+    if n_selected < n_row:
+        selected_index = numpy.argpartition(-score_matrix, n_selected - 1, axis=0)[:n_selected]
+    else:
+        selected_index = numpy.tile(numpy.arange(n_row)[:, None], (1, score_matrix.shape[1]))
+    selected_score = numpy.take_along_axis(score_matrix, selected_index, axis=0)
+    order = numpy.argsort(-selected_score, axis=0, kind='stable')
+
+    return (numpy.take_along_axis(selected_index, order, axis=0),
+            numpy.take_along_axis(selected_score, order, axis=0))
+
+
+def decode_k_best_routes(seq_score_block:List[numpy.ndarray], top_k:int=1)->List[Tuple[float, List[int]]]:
+    """* What you can do
+    - You get the k-best routes over lattice graph with Viterbi algorithm.
+    - It keeps k-best partial scores per state, so the cost is O(T * K^2 * k) instead of product of all edges.
+
+    * Params
+    - seq_score_block: list of score matrix. The t-th matrix has shape (K_t, K_t+1).
+        - score_matrix[i, j] is transition score from i-th state at t into j-th state at t+1.
+        - -inf means there is no edge between these states.
+    - top_k: the number of routes to return
+
+    * Output
+    - [(route_score, [state_index_at_0, state_index_at_1, ..., state_index_at_T])]
+        - It's sorted by descending route_score. Routes with -inf score are not included.
+    """
+    if top_k < 1:
+        raise Exception('top_k must be more than 0. top_k={}'.format(top_k))
+    if len(seq_score_block) == 0:
+        return []
+
+    # delta[j, m] is m-th best score of partial routes which end at j-th state
+    delta = numpy.zeros((seq_score_block[0].shape[0], 1), dtype=numpy.float64)
+    seq_back_pointer = []  # type: List[Tuple[int, numpy.ndarray]]
+    for score_matrix in seq_score_block:
+        n_state_t, n_state_t_plus = score_matrix.shape
+        n_rank = delta.shape[1]
+        if delta.shape[0] != n_state_t:
+            raise Exception('Shape of score matrix does not match with the previous one. shape={}'.format(score_matrix.shape))
+        # row index of candidate_score is (state_index_at_t * n_rank + rank_at_t)
+        candidate_score = (delta[:, :, None] + score_matrix[:, None, :]).reshape(n_state_t * n_rank, n_state_t_plus)
+        selected_index, selected_score = __select_top_k_column(candidate_score, top_k)
+        seq_back_pointer.append((n_rank, selected_index.T))
+        delta = selected_score.T
+
+    flat_delta = delta.ravel()
+    n_rank_last = delta.shape[1]
+    n_selected = min(top_k, flat_delta.shape[0])
+    seq_last_index = numpy.argsort(-flat_delta, kind='stable')[:n_selected]
+
+    seq_route = []
+    for last_index in seq_last_index:
+        route_score = flat_delta[last_index]
+        if numpy.isneginf(route_score):
+            continue
+        state_index, rank = divmod(int(last_index), n_rank_last)
+        route = [state_index]
+        for n_rank, back_pointer in reversed(seq_back_pointer):
+            state_index, rank = divmod(int(back_pointer[state_index, rank]), n_rank)
+            route.append(state_index)
+        seq_route.append((float(route_score), route[::-1]))
+
+    return seq_route
+
+
+def __get_score_rows(score_block, row_index:numpy.ndarray)->numpy.ndarray:
+    """* What you can do
+    - You get rows of score_block. score_block is numpy.ndarray, or an object with get_rows() which computes rows on demand.
+    """
+    if hasattr(score_block, 'get_rows'):
+        return score_block.get_rows(row_index)
+    else:
+        return score_block[row_index, :]
+
+
+def __select_initial_states(score_block, beam_width:int)->numpy.ndarray:
+    """* What you can do
+    - You get at most beam_width states at t=0. States are ranked by estimate_rows() of score_block if it has the method,
+      so that all rows are not computed. Otherwise they are ranked by their best score into t=1.
+    """
+    n_state = score_block.shape[0]
+    if n_state <= beam_width:
+        return numpy.arange(n_state)
+    if hasattr(score_block, 'estimate_rows'):
+        row_score = numpy.asarray(score_block.estimate_rows())
+    else:
+        row_score = numpy.max(__get_score_rows(score_block, numpy.arange(n_state)), axis=1)
+    return numpy.sort(numpy.argpartition(-row_score, beam_width - 1)[:beam_width])
+
+
+def decode_beam_search_routes(seq_score_block:List[numpy.ndarray],
+                              beam_width:int=10,
+                              top_k:int=None,
+                              score_threshold:float=None)->List[Tuple[float, List[int]]]:
+    """* What you can do
+    - You get routes over lattice graph with beam search. It's approximate.
+    - A step reads only rows of hypotheses in the beam, i.e. beam_width * K_t+1 scores.
+      The total cost is bounded only if scores are computed on demand (score blocks with get_rows()).
+      With dense score matrices, computing them already costs K_t * K_t+1 per step.
+    - The initial beam has at most beam_width states of t=0. See __select_initial_states()
+    - Hypotheses with the same state are not merged, so routes in the final beam are all different.
+
+    * Params
+    - seq_score_block: the same as decode_k_best_routes(), or objects which have shape and get_rows(row_index)
+        - get_rows(row_index) returns scores from states row_index at t, with shape (len(row_index), K_t+1)
+        - estimate_rows() is optional. It returns a score per state at t=0 which ranks the initial beam.
+        - e.g. models.LatticeScoreBlockObject
+    - beam_width: the max number of partial routes which are kept at each step
+    - top_k: the number of routes to return. If None, it returns all routes in the final beam.
+    - score_threshold: partial routes whose score is lower than (the best score at the step - score_threshold) are pruned.
+
+    * Output
+    - [(route_score, [state_index_at_0, state_index_at_1, ..., state_index_at_T])] sorted by descending route_score
+    """
+    if beam_width < 1:
+        raise Exception('beam_width must be more than 0. beam_width={}'.format(beam_width))
+    if not top_k is None and top_k < 1:
+        raise Exception('top_k must be more than 0. top_k={}'.format(top_k))
+    if len(seq_score_block) == 0:
+        return []
+
+    # states at t=0 have score 0.0
+    beam_state = __select_initial_states(seq_score_block[0], beam_width)
+    beam_score = numpy.zeros(beam_state.shape[0], dtype=numpy.float64)
+    # back_pointer[t][h] is the index of the parent hypothesis in the beam at t
+    seq_beam_state = [beam_state]
+    seq_back_pointer = []  # type: List[numpy.ndarray]
+    for score_block in seq_score_block:
+        n_state_t_plus = score_block.shape[1]
+        candidate_score = (beam_score[:, None] + __get_score_rows(score_block, beam_state)).ravel()
+        is_alive = ~numpy.isneginf(candidate_score)
+        if not score_threshold is None and numpy.any(is_alive):
+            is_alive &= candidate_score >= candidate_score[is_alive].max() - score_threshold
+        alive_index = numpy.flatnonzero(is_alive)
+        if alive_index.shape[0] > beam_width:
+            alive_index = alive_index[numpy.argpartition(-candidate_score[alive_index], beam_width - 1)[:beam_width]]
+        parent_index, beam_state = numpy.divmod(alive_index, n_state_t_plus)
+        beam_score = candidate_score[alive_index]
+        seq_back_pointer.append(parent_index)
+        seq_beam_state.append(beam_state)
+        if beam_state.shape[0] == 0:
+            return []
+
+    order = numpy.argsort(-beam_score, kind='stable')
+    if not top_k is None:
+        order = order[:top_k]
+
+    seq_route = []
+    for hypothesis_index in order:
+        route_score = beam_score[hypothesis_index]
+        route = [int(seq_beam_state[-1][hypothesis_index])]
+        for t in range(len(seq_back_pointer) - 1, -1, -1):
+            hypothesis_index = seq_back_pointer[t][hypothesis_index]
+            route.append(int(seq_beam_state[t][hypothesis_index]))
+        seq_route.append((float(route_score), route[::-1]))
+
+    return seq_route
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+from word2vec_wikification_py import init_logger
+from numpy.lib.format import open_memmap
+from tempfile import mkdtemp
+from typing import List, Tuple, Dict, Any, Callable, Union, Iterable
+from numpy import ndarray
+import numpy
+import shutil
+import hashlib
+import json
+import os
+import logging
+logger = logging.getLogger(name=init_logger.LOGGER_NAME)
+
+VECTOR_FILE_NAME = 'vectors.npy'
+SCALE_FILE_NAME = 'scales.npy'
+VOCABULARY_FILE_NAME = 'vocabulary.txt'
+STORE_INFO_FILE_NAME = 'store_info.json'
+VECTOR_DTYPES = ('float32', 'float16', 'int8')
+
+
+class EntityVectorStore(object):
+    """Read-only entity vector model on a memory-mapped file.
+    It has L2-normalized vectors, so a dot product of 2 vectors is cosine similarity.
+    Pages of the vector file are shared between processes which open the same store.
+
+    Vectors are kept in one of VECTOR_DTYPES.
+    - float32: normalized vectors as they are
+    - float16: normalized vectors in half precision
+    - int8: scalar-quantized vectors. The i-th vector is vectors[i] * scales[i].
+
+    Files in path_store_dir
+    - vectors.npy: matrix of normalized vectors. The i-th row is a vector of the i-th word in vocabulary.txt
+    - scales.npy: scale of each vector. Only int8 store has it.
+    - vocabulary.txt: words, one word per line
+    - store_info.json: information of the store
+    """
+    def __init__(self, path_store_dir:str, mmap_mode:str='r'):
+        if not is_entity_vector_store(path_store_dir):
+            raise FileExistsError('There is no entity vector store at {}'.format(path_store_dir))
+        self.path_store_dir = path_store_dir
+        self.mmap_mode = mmap_mode
+        with open(os.path.join(path_store_dir, STORE_INFO_FILE_NAME), 'r') as f:
+            self.store_info = json.load(f)  # type: Dict[str,Any]
+        self.vector_dtype = self.store_info.get('vector_dtype', 'float32')  # type: str
+        self.vectors = numpy.load(os.path.join(path_store_dir, VECTOR_FILE_NAME), mmap_mode=mmap_mode)  # type: ndarray
+        if self.vector_dtype == 'int8':
+            self.scales = numpy.load(os.path.join(path_store_dir, SCALE_FILE_NAME), mmap_mode=mmap_mode)  # type: ndarray
+        else:
+            self.scales = None
+        # newline='' keeps '\r' in words. Only '\n' separates words
+        with open(os.path.join(path_store_dir, VOCABULARY_FILE_NAME), 'r', encoding='utf-8', newline='') as f:
+            self.index2word = f.read().split('\n')[:self.vectors.shape[0]]  # type: List[str]
+        self.vocab = {word: index for index, word in enumerate(self.index2word)}  # type: Dict[str,int]
+
+    def __reduce__(self):
+        # a pickled store opens the same files again, e.g. in a worker of ProcessPoolExecutor. Vectors are not copied
+        return (self.__class__, (self.path_store_dir, self.mmap_mode))
+
+    def __str__(self)->str:
+        return 'EntityVectorStore with {} {} words at {}'.format(len(self.index2word), self.vector_dtype, self.path_store_dir)
+
+    def __len__(self)->int:
+        return len(self.index2word)
+
+    def __contains__(self, word:str)->bool:
+        return word in self.vocab
+
+    def __getitem__(self, word:str)->ndarray:
+        return self.get_vectors(self.vocab[word])
+
+    def get_vectors(self, row_index)->ndarray:
+        """* What you can do
+        - You get float32 vectors of rows. row_index is an int, a slice or an array of int.
+        - Quantized vectors are converted into float32 only for the given rows.
+        """
+        vector_matrix = numpy.asarray(self.vectors[row_index], dtype=numpy.float32)
+        if not self.scales is None:
+            scales = numpy.asarray(self.scales[row_index], dtype=numpy.float32)
+            vector_matrix *= scales[..., None]
+        return vector_matrix
+
+    def get_normalized_vector_matrix(self, seq_word:List[str])->ndarray:
+        """* What you can do
+        - You get matrix of normalized vectors. The i-th row is a vector of seq_word[i].
+        """
+        return self.get_vectors([self.vocab[word] for word in seq_word])
+
+    def similarity(self, word_1:str, word_2:str)->float:
+        vector_matrix = self.get_normalized_vector_matrix([word_1, word_2])
+        return float(numpy.dot(vector_matrix[0], vector_matrix[1]))
+
+    def most_similar(self, word:str, topn:int=10, chunk_size:int=100000)->List[Tuple[str, float]]:
+        """* What you can do
+        - You get words which are similar to word. It scans all vectors in the store chunk by chunk.
+        """
+        target_index = self.vocab[word]
+        target_vector = self.get_vectors(target_index)
+        seq_score = numpy.empty(len(self.index2word), dtype=numpy.float32)
+        for start_index in range(0, len(seq_score), chunk_size):
+            seq_score[start_index:start_index+chunk_size] = numpy.dot(self.get_vectors(slice(start_index, start_index+chunk_size)), target_vector)
+        seq_score[target_index] = -numpy.inf
+        n_selected = min(topn, len(seq_score) - 1)
+        if n_selected <= 0:
+            return []
+        seq_index = numpy.argpartition(-seq_score, n_selected - 1)[:n_selected]
+        seq_index = seq_index[numpy.argsort(-seq_score[seq_index])]
+        return [(self.index2word[index], float(seq_score[index])) for index in seq_index]
+
+    def get_memory_size(self)->int:
+        """* What you can do
+        - You get bytes of vectors (and scales) in the store.
+        """
+        return int(self.vectors.nbytes) + (0 if self.scales is None else int(self.scales.nbytes))
+
+
+def is_entity_vector_store(path_store_dir:str)->bool:
+    return os.path.isdir(path_store_dir) and \
+           all(os.path.exists(os.path.join(path_store_dir, file_name))
+               for file_name in (VECTOR_FILE_NAME, VOCABULARY_FILE_NAME, STORE_INFO_FILE_NAME))
+
+
+def is_article_name(word:str)->bool:
+    """* What you can do
+    - You judge if word is a wikipedia article name like "[ヤマハ発動機]", not a plain word.
+    """
+    return len(word) > 2 and word.startswith('[') and word.endswith(']')
+
+
+def make_key_filter(key_filter)->Callable[[str], bool]:
+    """* What you can do
+    - You get a predicate from key_filter. key_filter is a predicate or a collection of allowed words.
+    """
+    # type: (Union[Callable[[str],bool],Iterable[str]])->Callable[[str],bool]
+    if callable(key_filter):
+        return key_filter
+    else:
+        allow_list = key_filter if isinstance(key_filter, (set, frozenset, dict)) else set(key_filter)
+        return lambda word: word in allow_list
+
+
+def describe_key_filter(key_filter)->Union[str, None]:
+    """* What you can do
+    - You get an identifier of key_filter which is recorded in store_info.json.
+    - A predicate is identified by its qualified name, an allow-list is identified by a hash of its sorted words.
+    """
+    # type: (Union[Callable[[str],bool],Iterable[str],None])->Union[str,None]
+    if key_filter is None:
+        return None
+    elif callable(key_filter):
+        return 'predicate:{}.{}'.format(getattr(key_filter, '__module__', ''),
+                                        getattr(key_filter, '__qualname__', type(key_filter).__name__))
+    else:
+        hash_object = hashlib.sha1()
+        for word in sorted(set(key_filter)):
+            hash_object.update(word.encode('utf-8'))
+            hash_object.update(b'\n')
+        return 'allow_list:{}'.format(hash_object.hexdigest())
+
+
+def save_entity_vector_store(seq_word:List[str],
+                             vector_matrix:ndarray,
+                             path_store_dir:str,
+                             chunk_size:int=100000,
+                             store_info:Dict[str,Any]=None,
+                             row_index:ndarray=None,
+                             vector_dtype:str='float32')->EntityVectorStore:
+    """* What you can do
+    - You write words and vectors into the store format. Vectors are normalized chunk by chunk.
+    - Files are written into a temporary directory and moved into path_store_dir at the end.
+
+    * Params
+    - seq_word: words. The i-th word is a key of the i-th row of vector_matrix.
+    - vector_matrix: matrix of vectors. It can be memory-mapped array.
+    - path_store_dir: path to a directory of the store. It must not exist.
+    - row_index: rows of vector_matrix to save. If given, the i-th word is a key of row_index[i]-th row.
+    - vector_dtype: one of VECTOR_DTYPES. float16 and int8 make the store 1/2 and about 1/4 of float32.
+    """
+    if not vector_dtype in VECTOR_DTYPES:
+        raise Exception('vector_dtype must be one of {}. vector_dtype={}'.format(VECTOR_DTYPES, vector_dtype))
+    if os.path.exists(path_store_dir):
+        raise FileExistsError('There is already a file or directory at {}'.format(path_store_dir))
+    n_row = vector_matrix.shape[0] if row_index is None else len(row_index)
+    if len(seq_word) != n_row:
+        raise Exception('The number of words and vectors are different. words={} vectors={}'.format(len(seq_word), n_row))
+    for word in seq_word:
+        if '\n' in word:
+            raise Exception('A word with line break can not be saved. word={}'.format(word))
+
+    path_parent_dir = os.path.dirname(os.path.abspath(path_store_dir))
+    if not os.path.exists(path_parent_dir): os.makedirs(path_parent_dir)
+    path_temporary_dir = mkdtemp(prefix='.entity_vector_store_', dir=path_parent_dir)
+    try:
+        stored_vectors = open_memmap(os.path.join(path_temporary_dir, VECTOR_FILE_NAME), mode='w+',
+                                     dtype=vector_dtype, shape=(n_row, vector_matrix.shape[1]))
+        if vector_dtype == 'int8':
+            stored_scales = open_memmap(os.path.join(path_temporary_dir, SCALE_FILE_NAME), mode='w+',
+                                        dtype=numpy.float32, shape=(n_row,))
+        for start_index in range(0, n_row, chunk_size):
+            if row_index is None:
+                chunk = numpy.asarray(vector_matrix[start_index:start_index+chunk_size], dtype=numpy.float32)
+            else:
+                chunk = numpy.asarray(vector_matrix[row_index[start_index:start_index+chunk_size]], dtype=numpy.float32)
+            vector_norm = numpy.linalg.norm(chunk, axis=1, keepdims=True)
+            vector_norm[vector_norm == 0.0] = 1.0
+            chunk = chunk / vector_norm
+            if vector_dtype == 'int8':
+                # each vector is mapped into [-127, 127], and the scale makes the restored vector unit-length
+                max_value = numpy.max(numpy.abs(chunk), axis=1, keepdims=True)
+                max_value[max_value == 0.0] = 1.0
+                quantized_chunk = numpy.round(chunk * (127.0 / max_value))
+                quantized_norm = numpy.linalg.norm(quantized_chunk, axis=1)
+                quantized_norm[quantized_norm == 0.0] = 1.0
+                stored_vectors[start_index:start_index+chunk_size] = quantized_chunk.astype(numpy.int8)
+                stored_scales[start_index:start_index+chunk_size] = 1.0 / quantized_norm
+            else:
+                stored_vectors[start_index:start_index+chunk_size] = chunk
+        stored_vectors.flush()
+        del stored_vectors
+        if vector_dtype == 'int8':
+            stored_scales.flush()
+            del stored_scales
+
+        with open(os.path.join(path_temporary_dir, VOCABULARY_FILE_NAME), 'w', encoding='utf-8', newline='') as f:
+            f.write('\n'.join(seq_word))
+
+        info = {'n_word': len(seq_word), 'dimension': int(vector_matrix.shape[1]), 'vector_dtype': vector_dtype}
+        if not store_info is None: info.update(store_info)
+        with open(os.path.join(path_temporary_dir, STORE_INFO_FILE_NAME), 'w') as f:
+            json.dump(info, f, ensure_ascii=False)
+
+        os.rename(path_temporary_dir, path_store_dir)
+    except Exception:
+        shutil.rmtree(path_temporary_dir, True)
+        raise
+
+    logger.info(msg='Saved entity vector store with {} words at {}'.format(len(seq_word), path_store_dir))
+    return EntityVectorStore(path_store_dir)
+
+
+class StoreVectorMatrix(object):
+    """Array-like object of float32 vectors in EntityVectorStore. It's used to re-save a store.
+    """
+    __slots__ = ['entity_vector_store']
+
+    def __init__(self, entity_vector_store:EntityVectorStore):
+        self.entity_vector_store = entity_vector_store
+
+    @property
+    def shape(self)->Tuple[int, int]:
+        return self.entity_vector_store.vectors.shape
+
+    def __len__(self)->int:
+        return self.shape[0]
+
+    def __getitem__(self, row_index)->ndarray:
+        return self.entity_vector_store.get_vectors(row_index)
+
+
+def convert_entity_model(entity_vector_model, path_store_dir, store_info=None, key_filter=None, vector_dtype='float32'):
+    """* What you can do
+    - You convert gensim entity vector model into EntityVectorStore. You need to do it only once.
+    - If key_filter is given, only words which match key_filter are saved. See extract_entity_vector_subset()
+    - vector_dtype is one of VECTOR_DTYPES.
+    """
+    # type: (Union[Word2Vec,KeyedVectors,EntityVectorStore],str,Dict[str,Any],Union[Callable[[str],bool],Iterable[str]],str)->EntityVectorStore
+    if isinstance(entity_vector_model, EntityVectorStore):
+        seq_word = entity_vector_model.index2word
+        vector_matrix = StoreVectorMatrix(entity_vector_model)
+    else:
+        keyed_vectors = entity_vector_model.wv if hasattr(entity_vector_model, 'wv') else entity_vector_model
+        if hasattr(keyed_vectors, 'index2word'):
+            seq_word = keyed_vectors.index2word
+        else:
+            seq_word = keyed_vectors.index_to_key
+        if hasattr(keyed_vectors, 'vectors'):
+            vector_matrix = keyed_vectors.vectors
+        else:
+            vector_matrix = keyed_vectors.syn0
+
+    if key_filter is None:
+        row_index = None
+    else:
+        word_predicate = make_key_filter(key_filter)
+        row_index = numpy.array([index for index, word in enumerate(seq_word) if word_predicate(word)], dtype=numpy.int64)
+        logger.info(msg='{} words out of {} words are kept.'.format(len(row_index), len(seq_word)))
+        seq_word = [seq_word[index] for index in row_index]
+        store_info = dict(store_info or {})
+        store_info.update({'is_subset': True,
+                           'n_source_word': len(vector_matrix),
+                           'key_filter': describe_key_filter(key_filter)})
+
+    return save_entity_vector_store(seq_word=seq_word,
+                                    vector_matrix=vector_matrix,
+                                    path_store_dir=path_store_dir,
+                                    store_info=store_info,
+                                    row_index=row_index,
+                                    vector_dtype=vector_dtype)
+
+
+def extract_entity_vector_subset(entity_vector_model, path_store_dir, key_filter=is_article_name, vector_dtype='float32'):
+    """* What you can do
+    - You make a compact EntityVectorStore which has only words matching key_filter.
+    - Resident memory and loading time become smaller in proportion to the number of kept words.
+
+    * Params
+    - entity_vector_model: gensim model or EntityVectorStore
+    - key_filter: a predicate of word, or an allow-list of words.
+        - The default keeps only article names like "[ヤマハ発動機]"
+        - An allow-list from "page" table is given by search_wiki_pages.iterate_article_names()
+    """
+    # type: (Union[Word2Vec,KeyedVectors,EntityVectorStore],str,Union[Callable[[str],bool],Iterable[str]],str)->EntityVectorStore
+    return convert_entity_model(entity_vector_model, path_store_dir, key_filter=key_filter, vector_dtype=vector_dtype)
@@ -21,3 +21,25 @@ def initialize_pymysql_connector(hostname:str,
                                  db=dbname,
                                  charset='utf8')
     return connection
+
+
+def initialize_pymysql_connection_pool(hostname:str,
+                                       user_name:str,
+                                       password:str,
+                                       dbname:str,
+                                       max_size:int=4,
+                                       timeout:float=None,
+                                       health_check_interval:float=30.0):
+    """* What you can do
+    - You get MysqlConnectionPool. It's used in place of the connection of initialize_pymysql_connector()
+    """
+    from functools import partial
+    from word2vec_wikification_py.connection_pool import MysqlConnectionPool
+    return MysqlConnectionPool(connection_factory=partial(initialize_pymysql_connector,
+                                                          hostname=hostname,
+                                                          user_name=user_name,
+                                                          password=password,
+                                                          dbname=dbname),
+                               max_size=max_size,
+                               timeout=timeout,
+                               health_check_interval=health_check_interval)
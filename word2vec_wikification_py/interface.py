@@ -7,8 +7,11 @@ except ImportError:
 from word2vec_wikification_py.models import WikipediaArticleObject, LatticeObject, SequenceScore
 from word2vec_wikification_py.make_lattice import make_lattice_object
 from word2vec_wikification_py.load_entity_model import load_entity_model
+from word2vec_wikification_py.entity_vector_store import EntityVectorStore
+from word2vec_wikification_py.cache_objects import SimilarityCacheObject, ResultCacheObject, CandidateCacheObject
+from word2vec_wikification_py.local_wiki_index import LocalWikipediaIndex
 from word2vec_wikification_py import search_wiki_pages
-from typing import List, Any, Union
+from typing import List, Any, Union, Dict
 from functools import partial
 
 
@@ -23,87 +26,181 @@ def add_article_symbol(input_str:str)->str:
 def predict_japanese_wiki_names_with_wikidump(input_tokens,
                                               wikipedia_db_connector,
                                               entity_vector_model,
-                                              is_use_cache=True,
+                                              is_use_cache=False,
                                               is_sort_object=True,
                                               page_table_name='page',
                                               page_table_redirect='redirect',
-                                              search_method='complete') -> List[SequenceScore]:
+                                              search_method='complete',
+                                              similarity_cache=None,
+                                              title_trie=None,
+                                              top_k=None,
+                                              max_candidates=None,
+                                              candidate_prior=None,
+                                              result_cache=None,
+                                              candidate_cache=None) -> List[SequenceScore]:
     """* What you can do
     - You can run "Wikification" over your tokenized text
 
     * Params
     - input_tokens: list of tokens
-    - wikipedia_db_connector: mysql connector into wikipedia-dump database
-    - entity_vector_model: wikipedia entity vector of word2vec model
-    - is_use_cache: a boolean flag for keeping huge-object on disk
+    - wikipedia_db_connector: mysql connector into wikipedia-dump database, MysqlConnectionPool, or LocalWikipediaIndex
+    - entity_vector_model: wikipedia entity vector of word2vec model, or EntityVectorStore
+    - is_use_cache: a boolean flag for keeping huge transition scores on disk while the lattice is alive
     - is_sort_object: a boolean flag for sorting SequenceScore object
     - page_table_name: the name of "page" table of wikipedia-dump database
     - page_table_redirect: the name of "redirect" table of wikipedia-dump database
     - search_method: a way to find candidates of wikipedia article name.
         - partial: It tries to find wikipedia article name by concatenating tokens
         - complete: It trusts the result of tokenizer.
+    - similarity_cache: SimilarityCacheObject which is shared among calls
+    - title_trie: TitleTrieObject of tokens in wikipedia. With "partial", it searches only spans which are in title_trie.
+    - top_k: the number of routes to return. If None, it returns all routes.
+    - max_candidates, candidate_prior: candidate pruning before the lattice is made. See compute_wiki_node_probability()
+    - result_cache: ResultCacheObject which is shared among calls. See compute_wiki_node_probability()
+    - candidate_cache: CandidateCacheObject which is shared among calls. Tokens in it are not searched in wikipedia_db_connector.
     """
-    # type: (List[str],Any,Union[Word2Vec,KeyedVectors],bool,bool,str,str,str)->List[SequenceScore]
+    # type: (List[str],Any,Union[Word2Vec,KeyedVectors,EntityVectorStore],bool,bool,str,str,str,SimilarityCacheObject,search_wiki_pages.TitleTrieObject,int,int,Dict[str,float],ResultCacheObject,CandidateCacheObject)->List[SequenceScore]
+    seq_wiki_article_name = search_wiki_article_objects(input_tokens=input_tokens,
+                                                        wikipedia_db_connector=wikipedia_db_connector,
+                                                        page_table_name=page_table_name,
+                                                        page_table_redirect=page_table_redirect,
+                                                        search_method=search_method,
+                                                        title_trie=title_trie,
+                                                        candidate_cache=candidate_cache)
+    return compute_wiki_node_probability(seq_wiki_article_name=seq_wiki_article_name,
+                                         entity_vector_model=entity_vector_model,
+                                         is_use_cache=is_use_cache,
+                                         is_sort_object=is_sort_object,
+                                         similarity_cache=similarity_cache,
+                                         top_k=top_k,
+                                         max_candidates=max_candidates,
+                                         candidate_prior=candidate_prior,
+                                         result_cache=result_cache)
+
+
+def search_wiki_article_objects(input_tokens,
+                                wikipedia_db_connector,
+                                page_table_name='page',
+                                page_table_redirect='redirect',
+                                search_method='complete',
+                                title_trie=None,
+                                candidate_cache=None) -> List[WikipediaArticleObject]:
+    """* What you can do
+    - You get WikipediaArticleObject of tokens which have candidates of wikipedia article name.
+    - Params are the same as predict_japanese_wiki_names_with_wikidump()
+    """
+    # type: (List[str],Any,str,str,str,search_wiki_pages.TitleTrieObject,CandidateCacheObject)->List[WikipediaArticleObject]
+    if isinstance(wikipedia_db_connector, LocalWikipediaIndex):
+        function_search_token = search_wiki_pages.search_function_from_local_index
+        function_search_tokens = search_wiki_pages.search_function_from_local_index_bulk
+    else:
+        function_search_token = search_wiki_pages.search_function_from_wikipedia_database
+        function_search_tokens = search_wiki_pages.search_function_from_wikipedia_database_bulk
+    if not candidate_cache is None:
+        function_search_token = candidate_cache.wrap_search_function(function_search_token)
+        function_search_tokens = candidate_cache.wrap_bulk_search_function(function_search_tokens)
+
     if search_method=='partial':
-        search_function = partial(search_wiki_pages.search_function_from_wikipedia_database,
+        search_function = partial(function_search_token,
                                   wikipedia_db_connector=wikipedia_db_connector,
                                   page_table_name=page_table_name,
                                   page_table_redirect=page_table_redirect)
 
-        search_result = search_wiki_pages.search_from_dictionary(target_tokens=input_tokens,
-                                                                 string_normalization_function=string_normalization_function,
-                                                                 partially_param_given_function=search_function)
-        seq_wiki_article_name = [
+        if title_trie is None:
+            search_result = search_wiki_pages.search_from_dictionary(target_tokens=input_tokens,
+                                                                     string_normalization_function=string_normalization_function,
+                                                                     partially_param_given_function=search_function)
+        else:
+            search_result = search_wiki_pages.search_from_dictionary_with_trie(target_tokens=input_tokens,
+                                                                               string_normalization_function=string_normalization_function,
+                                                                               partially_param_given_function=search_function,
+                                                                               title_trie=title_trie)
+        return [
             WikipediaArticleObject(page_title=token_name, candidate_article_name=[add_article_symbol(string) for string in results])
             for token_name, results in search_result.items() if not results == []]
-        return compute_wiki_node_probability(seq_wiki_article_name=seq_wiki_article_name,
-                                             entity_vector_model=entity_vector_model,
-                                             is_use_cache=is_use_cache,
-                                             is_sort_object=is_sort_object)
     elif search_method == 'complete':
-        search_result = [
-            search_wiki_pages.search_function_from_wikipedia_database(
-                token=token,
-                wikipedia_db_connector=wikipedia_db_connector,
-                page_table_name=page_table_name,
-                page_table_redirect=page_table_redirect
-            ) for token in input_tokens]
-        seq_wiki_article_name = [
+        search_result = function_search_tokens(
+            seq_token=input_tokens,
+            wikipedia_db_connector=wikipedia_db_connector,
+            page_table_name=page_table_name,
+            page_table_redirect=page_table_redirect)
+        return [
             WikipediaArticleObject(page_title=token, candidate_article_name=[add_article_symbol(string) for string in results])
             for token, results in zip(input_tokens, search_result) if not results == []]
-
-        return compute_wiki_node_probability(seq_wiki_article_name=seq_wiki_article_name,
-                                             entity_vector_model=entity_vector_model,
-                                             is_use_cache=is_use_cache,
-                                             is_sort_object=is_sort_object)
     else:
         raise Exception('There is no search method named {}'.format(search_method))
 
 
 def compute_wiki_node_probability(seq_wiki_article_name,
                                   entity_vector_model,
-                                  is_use_cache=True,
-                                  is_sort_object=True):
+                                  is_use_cache=False,
+                                  is_sort_object=True,
+                                  similarity_cache=None,
+                                  top_k=None,
+                                  decode_method='viterbi',
+                                  beam_width=10,
+                                  score_threshold=None,
+                                  max_candidates=None,
+                                  candidate_prior=None,
+                                  result_cache=None):
     """* What you can do
     - You can get sequence of wikipedia-article-names with its sequence-score
 
     * Params
-    - is_use_cache: a boolean flag for keeping huge-object on disk
+    - is_use_cache: a boolean flag for keeping huge transition scores on disk while the lattice is alive
     - is_sort_object: a boolean flag for sorting SequenceScore object
+    - similarity_cache: SimilarityCacheObject which is shared among calls. It keeps similarities of candidate pairs.
+    - top_k: the number of routes to return. If None, it returns all routes.
+        - With top_k, k-best routes are decoded on the lattice. Other routes are never generated.
+        - Routes are always sorted by descending score with top_k.
+    - decode_method: a way to decode routes on the lattice
+        - viterbi: It returns exact k-best routes. With top_k=None, it enumerates all routes.
+        - beam: It keeps beam_width partial routes at each step. The lattice computes only scores from states in the beam,
+          so a step costs beam_width * K_t+1 dot products instead of K_t * K_t+1.
+    - beam_width: the number of partial routes which are kept at each step of beam search
+    - score_threshold: with beam search, partial routes whose score is lower than (the best score - score_threshold) are pruned
+    - max_candidates: the max number of candidates per token. Other candidates are pruned before the lattice is made.
+    - candidate_prior: dict of article_name -> prior score (e.g. page-link counts). It ranks candidates in pruning.
+        If None, candidates are ranked by similarity with candidates of the other tokens.
+    - result_cache: ResultCacheObject which is shared among calls.
+        A sentence with the same page titles, candidates and params returns the cached result without the lattice.
 
     * Caution
     - You must proper wikipedia-article-name on WikipediaArticleObject.candidate_article_name attribute
     """
-    # type: (List[WikipediaArticleObject],Union[Word2Vec,KeyedVectors],bool,bool)->List[SequenceScore]
+    # type: (List[WikipediaArticleObject],Union[Word2Vec,KeyedVectors,EntityVectorStore],bool,bool,SimilarityCacheObject,int,str,int,float,int,Dict[str,float],ResultCacheObject)->List[SequenceScore]
+    if not result_cache is None:
+        # the key is made before the lattice, because filtering and pruning change candidates of input objects
+        cache_key = result_cache.make_key(seq_wiki_article_name,
+                                          candidate_prior=candidate_prior,
+                                          is_sort_object=is_sort_object,
+                                          top_k=top_k,
+                                          decode_method=decode_method,
+                                          beam_width=beam_width,
+                                          score_threshold=score_threshold,
+                                          max_candidates=max_candidates)
+        sequence_score_objects = result_cache.get_result(cache_key)
+        if not sequence_score_objects is None:
+            return sequence_score_objects
 
     # step1 it constructs array of transition-matrix(from state-t until state-t+1)
     lattice_object = make_lattice_object(
         seq_wiki_article_name=seq_wiki_article_name,
         entity_vector_model=entity_vector_model,
-        is_use_cache=is_use_cache
+        is_use_cache=is_use_cache,
+        similarity_cache=similarity_cache,
+        max_candidates=max_candidates,
+        candidate_prior=candidate_prior,
+        is_lazy_score=(decode_method == 'beam')
     )  # type: LatticeObject
     # step2 compute route-score on Lattice network
-    sequence_score_objects = lattice_object.get_score_routes()
-    if is_sort_object: sequence_score_objects.sort(key=lambda obj: obj.sequence_score, reverse=True)
+    sequence_score_objects = lattice_object.get_score_routes(top_k=top_k,
+                                                             decode_method=decode_method,
+                                                             beam_width=beam_width,
+                                                             score_threshold=score_threshold)
+    if is_sort_object and top_k is None and decode_method == 'viterbi':
+        sequence_score_objects.sort(key=lambda obj: obj.sequence_score, reverse=True)
+    if not result_cache is None:
+        result_cache.put_result(cache_key, sequence_score_objects)
 
     return sequence_score_objects
\ No newline at end of file
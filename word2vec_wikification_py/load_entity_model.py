@@ -6,23 +6,84 @@ except:
     # to meet api interface of old gensim version
     from gensim.models import Word2Vec
 from word2vec_wikification_py import init_logger
-from word2vec_wikification_py.models import PersistentDict
-from tempfile import mkdtemp
-from typing import Union
+from word2vec_wikification_py.entity_vector_store import EntityVectorStore, convert_entity_model, is_entity_vector_store, describe_key_filter
+from typing import Union, Callable, Iterable
+import hashlib
 import os
+import logging
+logger = logging.getLogger(name=init_logger.LOGGER_NAME)
 
 
+def make_store_dir_name(path_entity_model:str, key_filter_description:str=None, vector_dtype:str='float32')->str:
+    """* What you can do
+    - You get the default directory of EntityVectorStore for the model file.
+    - It's "{path_entity_model}.store" for the full float32 store. vector_dtype and key_filter are put in the name otherwise.
+    """
+    if key_filter_description is None and vector_dtype == 'float32':
+        return '{}.store'.format(path_entity_model)
+    suffix = [vector_dtype]
+    if not key_filter_description is None:
+        suffix.append(hashlib.sha1(key_filter_description.encode('utf-8')).hexdigest()[:12])
+    return '{}.{}.store'.format(path_entity_model, '.'.join(suffix))
+
+
+def validate_entity_vector_store(entity_vector_store:EntityVectorStore,
+                                 key_filter_description:str=None,
+                                 vector_dtype:str='float32')->EntityVectorStore:
+    """* What you can do
+    - You check that an existing EntityVectorStore was made with the requested vector_dtype and key_filter.
+    - It raises Exception on mismatch, because a store in use may be memory-mapped by other processes.
+    """
+    if entity_vector_store.vector_dtype != vector_dtype:
+        raise Exception('EntityVectorStore at {} has vector_dtype={}, but vector_dtype={} is requested. '
+                        'Give another path_working_dir.'.format(entity_vector_store.path_store_dir,
+                                                                 entity_vector_store.vector_dtype,
+                                                                 vector_dtype))
+    if entity_vector_store.store_info.get('key_filter') != key_filter_description:
+        raise Exception('EntityVectorStore at {} has key_filter={}, but key_filter={} is requested. '
+                        'Give another path_working_dir.'.format(entity_vector_store.path_store_dir,
+                                                                 entity_vector_store.store_info.get('key_filter'),
+                                                                 key_filter_description))
+    return entity_vector_store
+
 
 def load_entity_model(path_entity_model:str,
                       is_binary_file:bool=True,
                       is_use_cache:bool=False,
-                      path_working_dir:str=None)->Union[KeyedVectors, Word2Vec]:
+                      path_working_dir:str=None,
+                      key_filter:Union[Callable[[str], bool], Iterable[str]]=None,
+                      vector_dtype:str='float32')->Union[KeyedVectors, Word2Vec, EntityVectorStore]:
     """* What you can do
     - You load entity mode on memory.
+    - If is_use_cache is True, the model is converted into EntityVectorStore at the first time.
+      After that, the store is memory-mapped instead of parsing the model file.
+    - Note that is_use_cache=True WRITES the store into path_working_dir. By default, it's a directory next to the model file.
+      The directory is as large as the model file (vector_dtype=float32). Remove it by yourself if you don't need it anymore.
+    - An existing store is reused only if it was made with the same vector_dtype and key_filter. Exception is raised otherwise.
+
+    * Params
+    - path_entity_model: path to word2vec format file, or a directory of EntityVectorStore
+    - is_use_cache: a boolean flag for using EntityVectorStore
+    - path_working_dir: a directory of EntityVectorStore. If None, it's "{path_entity_model}.store".
+        vector_dtype and key_filter are put in the default name when they are not default. See make_store_dir_name()
+    - key_filter: a predicate or an allow-list of words to keep in EntityVectorStore. It needs is_use_cache=True.
+        - e.g. entity_vector_store.is_article_name keeps only article names.
+        - A predicate is identified by its qualified name. Give different names to different predicates.
+    - vector_dtype: dtype of vectors in EntityVectorStore. float32, float16 or int8 (scalar-quantized)
     """
     if not os.path.exists(path_entity_model):
         raise FileExistsError('There is no model file at {}'.format(path_entity_model))
-    if path_working_dir is None: path_working_dir = mkdtemp()
+    if not key_filter is None and not is_use_cache:
+        raise Exception('key_filter is available only with is_use_cache=True.')
+    if is_entity_vector_store(path_entity_model):
+        return EntityVectorStore(path_entity_model)
+
+    if is_use_cache:
+        key_filter_description = describe_key_filter(key_filter)
+        if path_working_dir is None:
+            path_working_dir = make_store_dir_name(path_entity_model, key_filter_description, vector_dtype)
+        if is_entity_vector_store(path_working_dir):
+            return validate_entity_vector_store(EntityVectorStore(path_working_dir), key_filter_description, vector_dtype)
 
     try:
         if is_binary_file:
@@ -35,10 +96,11 @@ def load_entity_model(path_entity_model:str,
         else:
             model = KeyedVectors.load_word2vec_format(path_entity_model, binary=False)
 
-
     if is_use_cache:
-        cache_obj = PersistentDict(os.path.join(path_working_dir, 'entity_model'), flag='c', format='pickle')
-        cache_obj = model
-        return cache_obj
+        logger.info(msg='Converting entity model into {}. It runs only once.'.format(path_working_dir))
+        return convert_entity_model(model, path_working_dir,
+                                    store_info={'source': os.path.abspath(path_entity_model)},
+                                    key_filter=key_filter,
+                                    vector_dtype=vector_dtype)
     else:
-        return model
\ No newline at end of file
+        return model
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+from word2vec_wikification_py import init_logger
+from typing import List, Tuple, Iterable, Iterator, Dict
+import threading
+import sqlite3
+import os
+import logging
+logger = logging.getLogger(name=init_logger.LOGGER_NAME)
+
+
+class LocalWikipediaIndex(object):
+    """Local index of token -> wikipedia article names. It replaces "page" and "redirect" tables of mysql.
+    The index is a sqlite file made by build_local_index(). It's opened as read-only.
+
+    A token of the index is
+    - a title of an article, or a title of a redirect page
+    - a title without disambiguation suffix. e.g. "スズキ" of "スズキ_(企業)"
+    An article name is a title of an article. A redirect page is resolved into its target article.
+    """
+    def __init__(self, path_index_file:str):
+        if not os.path.exists(path_index_file):
+            raise FileExistsError('There is no index file at {}'.format(path_index_file))
+        self.path_index_file = path_index_file
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect('file:{}?mode=ro'.format(path_index_file), uri=True, check_same_thread=False)
+
+    def __str__(self)->str:
+        return 'LocalWikipediaIndex at {}'.format(self.path_index_file)
+
+    def __contains__(self, token:str)->bool:
+        return len(self.search(token)) > 0
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def search(self, token:str)->List[str]:
+        """* What you can do
+        - You get article names of token. It's the same result as search_function_from_wikipedia_database()
+        """
+        with self.__lock:
+            cursor = self.__connection.execute('SELECT article_name FROM candidate WHERE token = ?', (token,))
+            return [record[0] for record in cursor.fetchall()]
+
+    def search_many(self, seq_token:List[str], chunk_size:int=500)->List[List[str]]:
+        """* What you can do
+        - You get article names of tokens. The i-th list is article names of seq_token[i].
+        """
+        seq_unique_token = list(dict.fromkeys(seq_token))
+        token2article_names = {}  # type: Dict[str,List[str]]
+        with self.__lock:
+            for chunk_start in range(0, len(seq_unique_token), chunk_size):
+                seq_chunk_token = seq_unique_token[chunk_start:chunk_start+chunk_size]
+                query = 'SELECT token, article_name FROM candidate WHERE token IN ({})'.format(','.join(['?'] * len(seq_chunk_token)))
+                for token, article_name in self.__connection.execute(query, seq_chunk_token):
+                    token2article_names.setdefault(token, []).append(article_name)
+        return [list(token2article_names.get(token, [])) for token in seq_token]
+
+    def iterate_tokens(self)->Iterator[str]:
+        """* What you can do
+        - You iterate all tokens in the index in sorted order.
+        """
+        connection = sqlite3.connect('file:{}?mode=ro'.format(self.path_index_file), uri=True)
+        try:
+            for record in connection.execute('SELECT DISTINCT token FROM candidate ORDER BY token'):
+                yield record[0]
+        finally:
+            connection.close()
+
+
+def generate_title_tokens(page_title:str)->List[str]:
+    """* What you can do
+    - You get tokens which find page_title. They are page_title itself and page_title without disambiguation suffix.
+    - It's the same condition as (page_title = token OR page_title LIKE 'token\\_(%)')
+    """
+    seq_token = [page_title]
+    if page_title.endswith(')'):
+        start_index = page_title.find('_(')
+        while start_index > 0 and start_index + 2 < len(page_title):
+            seq_token.append(page_title[:start_index])
+            start_index = page_title.find('_(', start_index + 1)
+    return seq_token
+
+
+def build_local_index(path_index_file:str,
+                      iterable_page_record:Iterable[Tuple[int, str, int]],
+                      iterable_redirect_record:Iterable[Tuple[int, str]],
+                      batch_size:int=100000)->LocalWikipediaIndex:
+    """* What you can do
+    - You build a local index file from records of "page" and "redirect" tables.
+
+    * Params
+    - iterable_page_record: (page_id, page_title, page_is_redirect) of articles in namespace 0
+    - iterable_redirect_record: (rd_from, rd_title)
+    """
+    if os.path.exists(path_index_file):
+        raise FileExistsError('There is already a file at {}'.format(path_index_file))
+    path_temporary_file = '{}.tmp'.format(path_index_file)
+    if os.path.exists(path_temporary_file): os.remove(path_temporary_file)
+
+    def iterate_batch(iterable_record):
+        batch = []
+        for record in iterable_record:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if len(batch) > 0:
+            yield batch
+
+    connection = sqlite3.connect(path_temporary_file)
+    try:
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.execute('CREATE TEMP TABLE page (page_id INTEGER PRIMARY KEY, page_title TEXT, page_is_redirect INTEGER)')
+        connection.execute('CREATE TEMP TABLE redirect (rd_from INTEGER PRIMARY KEY, rd_title TEXT)')
+        connection.execute('CREATE TABLE candidate (token TEXT, article_name TEXT, PRIMARY KEY (token, article_name)) WITHOUT ROWID')
+        for batch in iterate_batch(iterable_page_record):
+            connection.executemany('INSERT OR REPLACE INTO page VALUES (?, ?, ?)', batch)
+        for batch in iterate_batch(iterable_redirect_record):
+            connection.executemany('INSERT OR REPLACE INTO redirect VALUES (?, ?)', batch)
+
+        page_cursor = connection.cursor()
+        page_cursor.execute("""SELECT page.page_title, CASE WHEN page.page_is_redirect = 1 THEN redirect.rd_title ELSE page.page_title END
+                               FROM page LEFT JOIN redirect ON page.page_id = redirect.rd_from""")
+        iterable_candidate = ((token, article_name)
+                              for page_title, article_name in page_cursor
+                              if not page_title is None and not article_name is None
+                              for token in generate_title_tokens(page_title))
+        for batch in iterate_batch(iterable_candidate):
+            connection.executemany('INSERT OR IGNORE INTO candidate VALUES (?, ?)', batch)
+        page_cursor.close()
+        connection.commit()
+        connection.execute('DROP TABLE page')
+        connection.execute('DROP TABLE redirect')
+        connection.execute('VACUUM')
+        connection.close()
+        os.rename(path_temporary_file, path_index_file)
+    except Exception:
+        connection.close()
+        if os.path.exists(path_temporary_file): os.remove(path_temporary_file)
+        raise
+
+    logger.info(msg='Built local wikipedia index at {}'.format(path_index_file))
+    return LocalWikipediaIndex(path_index_file)
+
+
+def build_local_index_from_database(path_index_file,
+                                    wikipedia_db_connector,
+                                    page_table_name='page',
+                                    page_table_redirect='redirect',
+                                    batch_size=100000):
+    """* What you can do
+    - You build a local index file from wikipedia-dump database. Records are read with server-side cursors.
+    """
+    # type: (str,Connection,str,str,int)->LocalWikipediaIndex
+    from pymysql import cursors
+
+    def decode_string(string):
+        try:
+            return string.decode('utf-8') if isinstance(string, bytes) else string
+        except UnicodeDecodeError:
+            return None
+
+    def iterate_page_record():
+        cursor = wikipedia_db_connector.cursor(cursors.SSCursor)
+        try:
+            cursor.execute("""SELECT page_id, page_title, page_is_redirect FROM {} WHERE page_namespace = 0""".format(page_table_name))
+            for page_id, page_title, page_is_redirect in cursor:
+                yield (page_id, decode_string(page_title), page_is_redirect)
+        finally:
+            cursor.close()
+
+    def iterate_redirect_record():
+        cursor = wikipedia_db_connector.cursor(cursors.SSCursor)
+        try:
+            cursor.execute("""SELECT rd_from, rd_title FROM {}""".format(page_table_redirect))
+            for rd_from, rd_title in cursor:
+                yield (rd_from, decode_string(rd_title))
+        finally:
+            cursor.close()
+
+    return build_local_index(path_index_file=path_index_file,
+                             iterable_page_record=iterate_page_record(),
+                             iterable_redirect_record=iterate_redirect_record(),
+                             batch_size=batch_size)
@@ -8,149 +8,193 @@ except ImportError:
 # matrix object
 from numpy import ndarray
 from word2vec_wikification_py import init_logger
-from word2vec_wikification_py.models import WikipediaArticleObject, PersistentDict, LatticeObject, IndexDictionaryObject, EdgeObject
+from word2vec_wikification_py.entity_vector_store import EntityVectorStore
+from word2vec_wikification_py.cache_objects import SimilarityCacheObject
+from word2vec_wikification_py.models import WikipediaArticleObject, LatticeObject, IndexDictionaryObject, TransitionBlockObject, StateIndexDictionary, \
+    LatticeArrayObject
 from typing import List, Tuple, Union, Any, Dict, Set
 from tempfile import mkdtemp
 from scipy.sparse import csr_matrix
+from numpy.lib.format import open_memmap
+import numpy
 import os
 import logging
 logger = logging.getLogger(name=init_logger.LOGGER_NAME)
 
-
-class TransitionEdgeObject(object):
-    __slots__ = ['row_index', 'column_index', 'transition_score']
-
-    def __init__(self,
-                 row_index:int,
-                 column_index:int,
-                 transition_score:float):
-        self.row_index = row_index
-        self.column_index = column_index
-        self.transition_score = transition_score
+TRANSITION_SCORE_DTYPE = numpy.float32
+DEFAULT_CACHE_THRESHOLD_BYTES = 64 * 1024 * 1024
 
 
 def __update_index_dictionary(key:Tuple[int,str], index_dictionary:Dict[Tuple[int,str],int])->Dict[Tuple[int,str],int]:
-    """
+    """* What you can do
+    - You add a new key with the next index. Indices are dense, so the next index is the size of index_dictionary.
     """
     if key in index_dictionary:
         raise Exception('The key is already existing in index_dictionary. key={}'.format(key))
+    elif isinstance(index_dictionary, StateIndexDictionary):
+        index_dictionary.add_state(key)
     else:
-        if len(index_dictionary)==0:
-            index_dictionary[key] = 0
-        else:
-            latest_index_number = max(index_dictionary.values())
-            index_dictionary[key] = latest_index_number + 1
+        index_dictionary[key] = len(index_dictionary)
 
-        return index_dictionary
+    return index_dictionary
 
 
-def make_state_transition_edge(state_t_word_tuple,
-                               state_t_plus_word_tuple,
-                               state2index_obj,
-                               entity_vector):
+def get_vocabulary(entity_vector_model):
     """* What you can do
-    - tの単語xからt+1の単語x'への遷移スコアを計算する
-
-    * Output
-    - tuple object whose element is (transition_element, row2index, column2index)
-    - transition_element is (row_index, column_index, transition_score)
+    - You get vocabulary object of entity vector model. It supports `in` operator.
     """
-    # type: (Tuple[int,str],Tuple[int,str],IndexDictionaryObject,Union[Word2Vec,KeyedVectors])->Tuple[TransitionEdgeObject, IndexDictionaryObject]
-    if isinstance(entity_vector, Word2Vec):
-        if not state_t_word_tuple[1] in entity_vector.wv.vocab:
-            raise Exception('Element does not exist in entity_voctor model. element={}'.format(state_t_word_tuple))
-        if not state_t_plus_word_tuple[1] in entity_vector.wv.vocab:
-            raise Exception('Element does not exist in entity_voctor model. element={}'.format(state_t_plus_word_tuple))
-    elif isinstance(entity_vector, KeyedVectors):
-        if not state_t_word_tuple[1] in entity_vector.vocab:
-            raise Exception('Element does not exist in entity_voctor model. element={}'.format(state_t_word_tuple))
-        if not state_t_plus_word_tuple[1] in entity_vector.vocab:
-            raise Exception('Element does not exist in entity_voctor model. element={}'.format(state_t_plus_word_tuple))
+    # type: (Union[Word2Vec,KeyedVectors,EntityVectorStore])->Dict[str,Any]
+    if isinstance(entity_vector_model, Word2Vec):
+        return entity_vector_model.wv.vocab
+    elif isinstance(entity_vector_model, (KeyedVectors, EntityVectorStore)):
+        return entity_vector_model.vocab
     else:
         raise Exception()
 
-    transition_score = entity_vector.similarity(state_t_word_tuple[1], state_t_plus_word_tuple[1])  # type: float
-
-    if state_t_word_tuple in state2index_obj.state2index['row2index']:
-        row_index = state2index_obj.state2index['row2index'][state_t_word_tuple]  # type: int
-    else:
-        state2index_obj.state2index['row2index'] = __update_index_dictionary(state_t_word_tuple, state2index_obj.state2index['row2index'])
-        row_index = state2index_obj.state2index['row2index'][state_t_word_tuple]  # type: int
 
-    if state_t_plus_word_tuple in state2index_obj.state2index['column2index']:
-        column_index = state2index_obj.state2index['column2index'][state_t_plus_word_tuple]  # type: int
+def get_normalized_vector_matrix(seq_label, entity_vector_model):
+    """* What you can do
+    - You get matrix of L2-normalized vectors. The i-th row is a vector of seq_label[i].
+    - A dot product of 2 rows is the same value as entity_vector_model.similarity()
+    """
+    # type: (List[str],Union[Word2Vec,KeyedVectors,EntityVectorStore])->ndarray
+    if isinstance(entity_vector_model, EntityVectorStore):
+        vocabulary = entity_vector_model.vocab
+        for label in seq_label:
+            if not label in vocabulary:
+                raise Exception('Element does not exist in entity_voctor model. element={}'.format(label))
+        # vectors in EntityVectorStore are already normalized
+        return entity_vector_model.get_normalized_vector_matrix(seq_label)
+    elif isinstance(entity_vector_model, Word2Vec):
+        keyed_vectors = entity_vector_model.wv
+    elif isinstance(entity_vector_model, KeyedVectors):
+        keyed_vectors = entity_vector_model
     else:
-        state2index_obj.state2index['column2index'] = __update_index_dictionary(state_t_plus_word_tuple, state2index_obj.state2index['column2index'])
-        column_index = state2index_obj.state2index['column2index'][state_t_plus_word_tuple]  # type: int
+        raise Exception()
 
-    transition_edge_obj = TransitionEdgeObject(row_index=row_index,
-                                               column_index=column_index,
-                                               transition_score=transition_score)
+    vocabulary = get_vocabulary(entity_vector_model)
+    for label in seq_label:
+        if not label in vocabulary:
+            raise Exception('Element does not exist in entity_voctor model. element={}'.format(label))
 
-    return (transition_edge_obj, state2index_obj)
+    vector_matrix = numpy.vstack([keyed_vectors[label] for label in seq_label])
+    vector_norm = numpy.linalg.norm(vector_matrix, axis=1, keepdims=True)
+    vector_norm[vector_norm == 0.0] = 1.0
+    return vector_matrix / vector_norm
 
 
-def make_state_transition(index:int,
-                          seq_wiki_article_name:List[WikipediaArticleObject],
-                          state2index_obj:IndexDictionaryObject,
-                          entity_vector_model:Word2Vec)->Tuple[List[EdgeObject], List[TransitionEdgeObject]]:
+def make_lattice_array(seq_wiki_article_name,
+                       entity_vector_model,
+                       path_working_dir=None,
+                       similarity_cache=None,
+                       is_lazy_score=False):
     """* What you can do
-    - You make all state-information between state_index and state_index_plus_1
+    - You make a compact lattice of a sequence. All transition scores are kept in one buffer with offset arrays.
+    - Transition scores between t and t+1 are computed by one matrix product of normalized vectors.
+    - If path_working_dir is given, the buffer is a memory-mapped npy file in the directory.
+    - If similarity_cache is given, scores between t and t+1 are taken from the cache by pairs of candidate labels.
+      Only rows with missing pairs are computed, and their missing pairs are put into the cache.
+    - If is_lazy_score is True, no score is computed here. The lattice keeps normalized vectors,
+      and a row of scores is computed when it's accessed first. Beam search accesses only rows of its hypotheses.
+      Rows whose pairs are all in similarity_cache are still used, but computed rows are not put into it.
     """
-    edge_group = []  # type: List[EdgeObject]
-    seq_transition_element = []  # type: List[TransitionEdgeObject]
-
-    for candidate_wikipedia_article_name in seq_wiki_article_name[index].candidate_article_name:
-        for candiate_wikipedia_article_name_state_plus in seq_wiki_article_name[index + 1].candidate_article_name:
-            state_t_word_tuple = (index, candidate_wikipedia_article_name)
-            state_t_plus_word_tuple = (index + 1, candiate_wikipedia_article_name_state_plus)
-            transition_element, state2index_obj = make_state_transition_edge(
-                state_t_word_tuple=state_t_word_tuple,
-                state_t_plus_word_tuple=state_t_plus_word_tuple,
-                state2index_obj=state2index_obj,
-                entity_vector=entity_vector_model
-            )
-            seq_transition_element.append(transition_element)
-            edge_group.append( EdgeObject(state2index_obj.state2index['row2index'][state_t_word_tuple],
-                                          state2index_obj.state2index['column2index'][state_t_plus_word_tuple])
-                               )
-
-    return (edge_group, seq_transition_element)
-
-
-def make_state_transition_sequence(seq_wiki_article_name:List[WikipediaArticleObject],
-                                   entity_vector_model:Word2Vec,
-                                   state2index_obj: IndexDictionaryObject)->Tuple[IndexDictionaryObject,
-                                                                                  List[List[EdgeObject]],
-                                                                                  csr_matrix]:
-    """系列での遷移行列を作成する
+    # type: (List[WikipediaArticleObject],Union[Word2Vec,KeyedVectors,EntityVectorStore],str,SimilarityCacheObject,bool)->LatticeArrayObject
+    seq_label = [list(dict.fromkeys(wiki_article_obj.candidate_article_name)) for wiki_article_obj in seq_wiki_article_name]
+    seq_n_state = [len(labels) for labels in seq_label]
+    n_step = max(len(seq_label) - 1, 0)
+    state_offsets = numpy.concatenate([[0], numpy.cumsum(seq_n_state, dtype=numpy.int64)]).astype(numpy.int64)
+    score_offsets = numpy.concatenate([[0], numpy.cumsum([seq_n_state[t] * seq_n_state[t+1] for t in range(0, n_step)],
+                                                         dtype=numpy.int64)]).astype(numpy.int64)
+
+    n_score = int(score_offsets[-1])
+    if path_working_dir is None:
+        score_buffer = numpy.empty(n_score, dtype=TRANSITION_SCORE_DTYPE)
+    else:
+        score_buffer = open_memmap(os.path.join(path_working_dir, 'transition_score.npy'), mode='w+',
+                                   dtype=TRANSITION_SCORE_DTYPE, shape=(n_score,))
+    label_table = [label for labels in seq_label for label in labels]
+    if is_lazy_score:
+        lattice_array = LatticeArrayObject(score_buffer=score_buffer,
+                                           score_offsets=score_offsets,
+                                           state_offsets=state_offsets,
+                                           label_table=label_table,
+                                           vector_matrix=get_normalized_vector_matrix(label_table, entity_vector_model)
+                                           if len(label_table) > 0 else None)
+        if not similarity_cache is None:
+            for t in range(0, n_step):
+                cached_matrix, is_cached = similarity_cache.get_block(seq_label[t], seq_label[t+1])
+                cached_rows = numpy.flatnonzero(is_cached.all(axis=1))
+                if cached_rows.shape[0] > 0:
+                    lattice_array.set_score_rows(t, cached_rows, cached_matrix[cached_rows])
+        return lattice_array
+
+    lattice_array = LatticeArrayObject(score_buffer=score_buffer,
+                                       score_offsets=score_offsets,
+                                       state_offsets=state_offsets,
+                                       label_table=label_table)
+
+    # vectors are gathered only for positions which need computation. It keeps positions t and t+1.
+    position2vector_matrix = {}  # type: Dict[int,ndarray]
+    def get_vector_matrix(position:int)->ndarray:
+        if not position in position2vector_matrix:
+            position2vector_matrix[position] = get_normalized_vector_matrix(seq_label[position], entity_vector_model)
+        return position2vector_matrix[position]
+
+    for t in range(0, n_step):
+        score_matrix = lattice_array.get_score_matrix(t)
+        if similarity_cache is None:
+            score_matrix[:, :] = numpy.dot(get_vector_matrix(t), get_vector_matrix(t+1).T)
+        else:
+            cached_matrix, is_cached = similarity_cache.get_block(seq_label[t], seq_label[t+1])
+            score_matrix[:, :] = cached_matrix
+            missing_rows = numpy.flatnonzero(~is_cached.all(axis=1))
+            if missing_rows.shape[0] > 0:
+                score_matrix[missing_rows, :] = numpy.dot(get_vector_matrix(t)[missing_rows], get_vector_matrix(t+1).T)
+                similarity_cache.put_block(seq_label[t], seq_label[t+1], score_matrix, is_cached)
+        position2vector_matrix.pop(t, None)
+
+    return lattice_array
+
+
+def make_state_transition_block(seq_wiki_article_name,
+                                entity_vector_model,
+                                state2index_obj,
+                                path_working_dir=None,
+                                similarity_cache=None):
+    """* What you can do
+    - You make transition-matrix of a sequence in batch. Scores are computed by make_lattice_array()
+    - The score buffer is used as data array of csr_matrix without per-edge objects.
+
+    * Output
+    - tuple object whose element is (state2index_obj, seq_transition_block, transition_matrix)
     """
-    # TODO 関数ごとcython化を検討
-    # TODO sequence系列も作成する
-    seq_transition_element = []  # type: List[TransitionEdgeObject]
-    seq_edge_group = []
-    for index in range(0, len(seq_wiki_article_name)-1):
-        edge_group, seq_transition_edge_object = make_state_transition(
-            index=index,
-            seq_wiki_article_name=seq_wiki_article_name,
-            state2index_obj=state2index_obj,
-            entity_vector_model=entity_vector_model)
-        seq_edge_group.append(edge_group)
-        seq_transition_element += seq_transition_edge_object
-
-    # TODO cythonの場合は、numpyのまま処理してしまう
-    data = [transition_tuple.transition_score for transition_tuple in seq_transition_element]
-    row = [transition_tuple.row_index for transition_tuple in seq_transition_element]
-    column = [transition_tuple.column_index for transition_tuple in seq_transition_element]
-
-    transition_matrix = csr_matrix(
-        (data, (row, column)),
-        shape=(len(state2index_obj.state2index['row2index']), len(state2index_obj.state2index['column2index']))
-    )
-    return (state2index_obj, seq_edge_group, transition_matrix)
+    # type: (List[WikipediaArticleObject],Union[Word2Vec,KeyedVectors,EntityVectorStore],IndexDictionaryObject,str,SimilarityCacheObject)->Tuple[IndexDictionaryObject,List[TransitionBlockObject],csr_matrix]
+    lattice_array = make_lattice_array(seq_wiki_article_name=seq_wiki_article_name,
+                                       entity_vector_model=entity_vector_model,
+                                       path_working_dir=path_working_dir,
+                                       similarity_cache=similarity_cache)
+
+    # rows are states at 0...T-2, columns are states at 1...T-1. Both of them are numbered in order of positions.
+    row2index = state2index_obj.state2index['row2index']
+    column2index = state2index_obj.state2index['column2index']
+    n_step = lattice_array.n_step
+    for position in range(0, lattice_array.n_position):
+        for candidate_id in range(int(lattice_array.state_offsets[position]), int(lattice_array.state_offsets[position+1])):
+            label = lattice_array.label_table[candidate_id]
+            if position < n_step: __update_index_dictionary((position, label), row2index)
+            if position > 0: __update_index_dictionary((position, label), column2index)
+
+    if path_working_dir is None:
+        indices = None
+    else:
+        indices = open_memmap(os.path.join(path_working_dir, 'transition_column_index.npy'), mode='w+',
+                              dtype=numpy.int32, shape=(len(lattice_array.score_buffer),))
+    transition_matrix = lattice_array.to_csr_matrix(indices)
 
+    return (state2index_obj, lattice_array.to_transition_blocks(), transition_matrix)
 
-def filter_out_of_vocabulary_word(wikipedia_article_obj: WikipediaArticleObject, vocabulary_words:Set)->Union[bool, WikipediaArticleObject]:
+
+def filter_out_of_vocabulary_word(wikipedia_article_obj: WikipediaArticleObject, vocabulary_words:Union[Set, Dict[str,Any]])->Union[bool, WikipediaArticleObject]:
     """* What you can do
     - You remove out-of-vocabulary word from wikipedia_article_obj.candidate_article_name
     """
@@ -168,60 +212,115 @@ def filter_out_of_vocabulary_word(wikipedia_article_obj: WikipediaArticleObject,
         return wikipedia_article_obj
 
 
-def make_lattice_object(seq_wiki_article_name,
-                        entity_vector_model,
-                        path_wordking_dir=None,
-                        is_use_cache=True):
+def prune_candidates(seq_wiki_article_name, entity_vector_model, max_candidates, candidate_prior=None):
     """* What you can do
-
+    - You keep at most max_candidates candidates in each WikipediaArticleObject. It shrinks the lattice before scoring.
+    - Input objects are not changed. A pruned position is a new WikipediaArticleObject in the returned list.
+    - Candidates are ranked by
+        1. exact title match. e.g. "[ロバート]" of page_title "ロバート"
+        2. candidate_prior[article_name] if candidate_prior is given, e.g. page-link counts in wikipedia-dump.
+           Otherwise, similarity with the centroid of candidates at the other positions.
+    - Candidates with the same rank keep the original order.
+
+    * Params
+    - seq_wiki_article_name: WikipediaArticleObject whose candidates are all in entity_vector_model
+    - candidate_prior: dict of article_name -> score. A missing article_name is 0.0
     """
-    # type: (List[WikipediaArticleObject],Union[Word2Vec,KeyedVectors],str,bool)->LatticeObject
-    if path_wordking_dir is None: path_wordking_dir = mkdtemp()
-    if is_use_cache:
-        persistent_state2index = PersistentDict(os.path.join(path_wordking_dir, 'column2index.json'), flag='c', format='json')
-        persistent_state2index['row2index'] = {}
-        persistent_state2index['column2index'] = {}
-    else:
-        persistent_state2index = {}
-        persistent_state2index['row2index'] = {}
-        persistent_state2index['column2index'] = {}
+    # type: (List[WikipediaArticleObject],Union[Word2Vec,KeyedVectors,EntityVectorStore],int,Dict[str,float])->List[WikipediaArticleObject]
+    if max_candidates < 1:
+        raise Exception('max_candidates must be more than 0. max_candidates={}'.format(max_candidates))
+    if all(len(wiki_article_obj.candidate_article_name) <= max_candidates for wiki_article_obj in seq_wiki_article_name):
+        return list(seq_wiki_article_name)
+
+    if candidate_prior is None:
+        seq_vector_matrix = [get_normalized_vector_matrix(wiki_article_obj.candidate_article_name, entity_vector_model)
+                             for wiki_article_obj in seq_wiki_article_name]
+        seq_position_mean = [vector_matrix.mean(axis=0) for vector_matrix in seq_vector_matrix]
+        sum_position_mean = numpy.sum(seq_position_mean, axis=0)
+
+    seq_pruned_article = list(seq_wiki_article_name)
+    for position, wiki_article_obj in enumerate(seq_wiki_article_name):
+        if len(wiki_article_obj.candidate_article_name) <= max_candidates:
+            continue
+        if candidate_prior is None:
+            # the norm of context vector doesn't change the order
+            context_vector = sum_position_mean - seq_position_mean[position]
+            seq_score = numpy.dot(seq_vector_matrix[position], context_vector).tolist()
+        else:
+            seq_score = [candidate_prior.get(article_name, 0.0) for article_name in wiki_article_obj.candidate_article_name]
+        exact_article_name = '[{}]'.format(wiki_article_obj.page_title)
+        seq_rank = sorted(range(0, len(wiki_article_obj.candidate_article_name)),
+                          key=lambda index: (wiki_article_obj.candidate_article_name[index] != exact_article_name, -seq_score[index]))
+        logger.debug(msg='Candidates of {} are pruned from {} into {}'.format(
+            wiki_article_obj.page_title, len(wiki_article_obj.candidate_article_name), max_candidates))
+        seq_pruned_article[position] = WikipediaArticleObject(
+            page_title=wiki_article_obj.page_title,
+            candidate_article_name=[wiki_article_obj.candidate_article_name[index] for index in seq_rank[:max_candidates]],
+            article_name=wiki_article_obj.article_name)
 
-    state2dict_obj = IndexDictionaryObject(
-        state2index=persistent_state2index,
-        index2state={})
+    return seq_pruned_article
+
+
+def count_transition_score(seq_wiki_article_name:List[WikipediaArticleObject])->int:
+    """* What you can do
+    - You get the number of transition scores which a lattice of seq_wiki_article_name keeps.
+    """
+    seq_n_state = [len(set(wiki_article_obj.candidate_article_name)) for wiki_article_obj in seq_wiki_article_name]
+    return sum(seq_n_state[t] * seq_n_state[t+1] for t in range(0, len(seq_n_state)-1))
 
-    if isinstance(entity_vector_model, Word2Vec):
-        vocabulary_words = set(entity_vector_model.wv.vocab.keys())
-    elif isinstance(entity_vector_model, KeyedVectors):
-        vocabulary_words = set(entity_vector_model.vocab.keys())
-    else:
-        raise Exception()
 
+def make_lattice_object(seq_wiki_article_name,
+                        entity_vector_model,
+                        path_wordking_dir=None,
+                        is_use_cache=False,
+                        cache_threshold_bytes=DEFAULT_CACHE_THRESHOLD_BYTES,
+                        similarity_cache=None,
+                        max_candidates=None,
+                        candidate_prior=None,
+                        is_lazy_score=False):
+    """* What you can do
+    - You make LatticeObject of seq_wiki_article_name.
+
+    * Params
+    - path_wordking_dir: a directory where a disk-backed lattice is put. If None, a temporary directory is used.
+    - is_use_cache: a boolean flag for keeping transition scores on disk.
+        - If False, the lattice is kept on memory and nothing is written to disk.
+        - If True, transition scores larger than cache_threshold_bytes are kept in memory-mapped npy files.
+          The files are removed when the LatticeObject is closed or garbage-collected.
+    - cache_threshold_bytes: the size of transition scores which is allowed to be kept on memory in cache mode.
+    - similarity_cache: SimilarityCacheObject shared among calls. If None, all scores are computed.
+    - max_candidates: the max number of candidates per position. If None, all candidates are kept. See prune_candidates()
+    - candidate_prior: dict of article_name -> prior score which ranks candidates in pruning
+    - is_lazy_score: a boolean flag for computing transition scores when they're accessed. See make_lattice_array()
+        - It's for beam search. Viterbi decoding and exhaustive enumeration access all scores anyway.
+    """
+    # type: (List[WikipediaArticleObject],Union[Word2Vec,KeyedVectors,EntityVectorStore],str,bool,int,SimilarityCacheObject,int,Dict[str,float],bool)->LatticeObject
+    vocabulary_words = get_vocabulary(entity_vector_model)
     seq_wiki_article_name = [
         wiki_article_name
         for wiki_article_name in seq_wiki_article_name
         if not filter_out_of_vocabulary_word(wiki_article_name, vocabulary_words) is False]
+    if not max_candidates is None:
+        seq_wiki_article_name = prune_candidates(seq_wiki_article_name, entity_vector_model, max_candidates, candidate_prior)
+
+    n_transition_score_bytes = count_transition_score(seq_wiki_article_name) * TRANSITION_SCORE_DTYPE().itemsize
+    if is_use_cache and n_transition_score_bytes > cache_threshold_bytes:
+        if not path_wordking_dir is None and not os.path.exists(path_wordking_dir): os.makedirs(path_wordking_dir)
+        path_lattice_dir = mkdtemp(prefix='lattice_', dir=path_wordking_dir)
+        logger.debug(msg='Transition scores are kept on disk. size={} path={}'.format(n_transition_score_bytes, path_lattice_dir))
+    else:
+        path_lattice_dir = None
 
-    updated_state2dict_obj, seq_edge_group, transition_matrix = make_state_transition_sequence(
+    lattice_array = make_lattice_array(
         seq_wiki_article_name=seq_wiki_article_name,
         entity_vector_model=entity_vector_model,
-        state2index_obj=state2dict_obj
+        path_working_dir=path_lattice_dir,
+        similarity_cache=similarity_cache,
+        is_lazy_score=is_lazy_score
     )
 
-    if is_use_cache:
-        """If is_use_cache is True, use disk-drive for keeping object
-        """
-        index2state = PersistentDict(os.path.join(path_wordking_dir, 'index2row.json'), flag='c', format='json')
-        updated_state2dict_obj.index2state = index2state
-    else:
-        updated_state2dict_obj.index2state = {}
-
-    updated_state2dict_obj.index2state['index2row'] = {value: key for key, value in updated_state2dict_obj.state2index['row2index'].items()}
-    updated_state2dict_obj.index2state['index2column'] = {value: key for key, value in updated_state2dict_obj.state2index['column2index'].items()}
-
     return LatticeObject(
-        transition_matrix=transition_matrix,
-        index_dictionary_obj=updated_state2dict_obj,
-        seq_edge_groups=seq_edge_group,
-        seq_wiki_article_name=seq_wiki_article_name
-    )
\ No newline at end of file
+        seq_wiki_article_name=seq_wiki_article_name,
+        path_working_dir=path_lattice_dir,
+        lattice_array=lattice_array
+    )
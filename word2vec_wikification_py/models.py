@@ -1,10 +1,13 @@
 from typing import List, Tuple, Any, Union, Dict
 from numpy.core import ndarray
 from scipy.sparse import csr_matrix
+from numpy.lib.format import open_memmap
 from itertools import product
-import pickle, json, csv, os, shutil
-import copy
+from word2vec_wikification_py.decode_lattice import decode_k_best_routes, decode_beam_search_routes
+import pickle, json, csv, os, shutil, sys
 import itertools
+import numpy
+import weakref
 
 # this class is from https://code.activestate.com/recipes/576642/
 class PersistentDict(dict):
@@ -92,6 +95,10 @@ class WikipediaArticleObject(object):
     def __str__(self)->str:
         return self.page_title
 
+    def __reduce__(self):
+        # __dict__ is overridden by a method, so pickle needs the constructor arguments
+        return (self.__class__, (self.page_title, self.candidate_article_name, self.article_name))
+
     def __dict__(self)->Dict[str,Any]:
         return {
             'page_title': self.page_title,
@@ -113,17 +120,92 @@ class WikipediaArticleObject(object):
         )
 
 
+class WikipediaArticleView(WikipediaArticleObject):
+    """Immutable WikipediaArticleObject of a disambiguated result.
+    It shares page_title and candidate_article_name with the input object, so it's made without copy.
+    A view is shared among routes which select the same label at the same position.
+    """
+    __slots__ = []
+
+    def __init__(self,
+                 page_title:str,
+                 candidate_article_name:List[str],
+                 article_name:str=None):
+        object.__setattr__(self, 'page_title', page_title)
+        object.__setattr__(self, 'candidate_article_name', candidate_article_name)
+        object.__setattr__(self, 'article_name', article_name)
+
+    def __setattr__(self, name:str, value:Any):
+        raise AttributeError('WikipediaArticleView is immutable. name={}'.format(name))
+
+    def __delattr__(self, name:str):
+        raise AttributeError('WikipediaArticleView is immutable. name={}'.format(name))
+
+    @classmethod
+    def from_article_object(cls, wiki_article_obj:WikipediaArticleObject, article_name:str):
+        return cls(wiki_article_obj.page_title, wiki_article_obj.candidate_article_name, article_name)
+
+
 class SequenceScore(object):
     """計算された記事系列のスコアを保持するオブジェクト
 
+    A result of LatticeObject keeps only its route and a reference to the lattice.
+    seq_words and seq_transition_score are generated at the first access, and then the lattice is released.
     """
+    __slots__ = ['_seq_words', '_seq_transition_score', 'sequence_score', '_lattice_object', '_index_tuple_route', '__weakref__']
+
     def __init__(self,
                  seq_words:List[WikipediaArticleObject],
                  seq_transition_score:List[Tuple[str, str, float]],
                  sequence_score:float):
-        self.seq_words = seq_words
-        self.seq_transition_score = seq_transition_score
+        self._seq_words = seq_words
+        self._seq_transition_score = seq_transition_score
         self.sequence_score = sequence_score
+        self._lattice_object = None
+        self._index_tuple_route = None
+
+    @classmethod
+    def from_route(cls, lattice_object, index_tuple_route:Tuple[Tuple[int,int]], sequence_score:float):
+        """* What you can do
+        - You make SequenceScore whose labels and articles are generated from lattice_object when they're accessed.
+
+        * Params
+        - lattice_object: an object with materialize_route(index_tuple_route), e.g. LatticeObject or serialization.SequenceScoreBatchReader
+        """
+        # type: (LatticeObject,Tuple[Tuple[int,int]],float)->SequenceScore
+        sequence_score_obj = cls(seq_words=None, seq_transition_score=None, sequence_score=sequence_score)
+        sequence_score_obj._lattice_object = lattice_object
+        sequence_score_obj._index_tuple_route = index_tuple_route
+        return sequence_score_obj
+
+    def materialize(self):
+        """* What you can do
+        - You generate seq_words and seq_transition_score from the lattice. Nothing happens if they are already generated.
+        """
+        if not self._lattice_object is None:
+            self._seq_words, self._seq_transition_score = self._lattice_object.materialize_route(self._index_tuple_route)
+            self._lattice_object = None
+            self._index_tuple_route = None
+
+    @property
+    def seq_words(self)->List[WikipediaArticleObject]:
+        self.materialize()
+        return self._seq_words
+
+    @seq_words.setter
+    def seq_words(self, seq_words:List[WikipediaArticleObject]):
+        self.materialize()
+        self._seq_words = seq_words
+
+    @property
+    def seq_transition_score(self)->List[Tuple[str, str, float]]:
+        self.materialize()
+        return self._seq_transition_score
+
+    @seq_transition_score.setter
+    def seq_transition_score(self, seq_transition_score:List[Tuple[str, str, float]]):
+        self.materialize()
+        self._seq_transition_score = seq_transition_score
 
     def __dict__(self):
         return {
@@ -135,6 +217,9 @@ class SequenceScore(object):
     def __str__(self):
         return """SequenceScore object with score={}""".format(self.sequence_score)
 
+    def __reduce__(self):
+        return (self.__class__, (self.seq_words, self.seq_transition_score, self.sequence_score))
+
     def __generate_label_sequence(self, seq_score_tuple:List[Tuple[str, str, float]])->List[str]:
         """* What you can do
         - You generate list of label
@@ -177,6 +262,38 @@ class EdgeObject(object):
         return (self.index_at_t, self.index_at_t_plus)
 
 
+class StateIndexDictionary(dict):
+    """dict object of state_name -> index. It assigns dense index 0, 1, 2... to new state_name in O(1).
+    The reverse relation index -> state_name is kept in index2state list, it's always in sync with the dict.
+    """
+
+    def __init__(self, seq_state:List[Tuple[int,str]]=None):
+        dict.__init__(self)
+        self.index2state = []  # type: List[Tuple[int,str]]
+        if not seq_state is None:
+            for state in seq_state:
+                self.add_state(state)
+
+    def add_state(self, state:Tuple[int,str])->int:
+        """* What you can do
+        - You get index of state. If state is new, it assigns the next index.
+        """
+        if state in self:
+            return dict.__getitem__(self, state)
+        index = len(self.index2state)
+        dict.__setitem__(self, state, index)
+        self.index2state.append(state)
+        return index
+
+    def __setitem__(self, state:Tuple[int,str], index:int):
+        if state in self or index != len(self.index2state):
+            raise Exception('StateIndexDictionary accepts only a new state with the next index. state={}, index={}'.format(state, index))
+        self.add_state(state)
+
+    def __reduce__(self):
+        return (self.__class__, (self.index2state, ))
+
+
 class IndexDictionaryObject(object):
     """Class object for keeping a relation of state_name and index.
     state2index attribute must have 2 key names.
@@ -187,6 +304,8 @@ class IndexDictionaryObject(object):
     - index2row
     - index2column
 
+    When state2index values are StateIndexDictionary, index2state values are its index2state lists.
+
     """
     __slots__ = ['state2index', 'index2state']
 
@@ -197,32 +316,428 @@ class IndexDictionaryObject(object):
         self.index2state = index2state
 
 
+class TransitionBlockObject(object):
+    """Class object for keeping transition scores between position t and position t+1 as a dense block.
+    - row_indices: row index in transition_matrix of each state at t
+    - column_indices: column index in transition_matrix of each state at t+1
+    - score_matrix: matrix with shape (len(row_indices), len(column_indices)). -inf means no edge.
+    """
+    __slots__ = ['row_indices', 'column_indices', 'score_matrix']
+
+    def __init__(self,
+                 row_indices:ndarray,
+                 column_indices:ndarray,
+                 score_matrix:ndarray):
+        self.row_indices = row_indices
+        self.column_indices = column_indices
+        self.score_matrix = score_matrix
+
+
+class LatticeArrayObject(object):
+    """Class object for keeping a lattice as flat arrays. There is no per-edge or per-state python object.
+    - score_buffer: 1-d array of all transition scores.
+        The block between position t and t+1 is score_buffer[score_offsets[t]:score_offsets[t+1]] with shape (K_t, K_t+1)
+    - score_offsets: int array with (n_position - 1) + 1 elements
+    - state_offsets: int array with n_position + 1 elements. K_t is state_offsets[t+1] - state_offsets[t]
+    - label_table: list of labels. A candidate id of the i-th state at position t is state_offsets[t] + i
+    - vector_matrix: L2-normalized vectors of all candidates. The i-th row is a vector of candidate id i.
+        If it's given, a row of score_buffer is computed at the first access. score_buffer can be numpy.empty() then.
+        If None, score_buffer must be filled already.
+
+    A candidate id is also a row index of transition_matrix, and (candidate id - K_0) is a column index of it.
+    """
+    __slots__ = ['score_buffer', 'score_offsets', 'state_offsets', 'label_table', 'vector_matrix', 'is_row_computed']
+
+    def __init__(self,
+                 score_buffer:ndarray,
+                 score_offsets:ndarray,
+                 state_offsets:ndarray,
+                 label_table:List[str],
+                 vector_matrix:ndarray=None):
+        self.score_buffer = score_buffer
+        self.score_offsets = score_offsets
+        self.state_offsets = state_offsets
+        self.label_table = label_table
+        self.vector_matrix = vector_matrix
+        if vector_matrix is None:
+            self.is_row_computed = None
+        else:
+            # a flag per candidate id at 0...T-2. It's True when scores from the candidate are in score_buffer
+            self.is_row_computed = numpy.zeros(int(state_offsets[self.n_step]) if self.n_step > 0 else 0, dtype=numpy.bool_)
+
+    @property
+    def n_position(self)->int:
+        return len(self.state_offsets) - 1
+
+    @property
+    def n_step(self)->int:
+        return max(self.n_position - 1, 0)
+
+    @property
+    def column_offset(self)->int:
+        """K_0. A column index of transition_matrix is (candidate id - column_offset)
+        """
+        return int(self.state_offsets[1]) if self.n_position > 0 else 0
+
+    def get_n_state(self, position:int)->int:
+        return int(self.state_offsets[position+1] - self.state_offsets[position])
+
+    def __get_block_view(self, t:int)->ndarray:
+        return self.score_buffer[self.score_offsets[t]:self.score_offsets[t+1]].reshape(self.get_n_state(t), self.get_n_state(t+1))
+
+    def __compute_rows(self, t:int, state_rows:ndarray):
+        """* What you can do
+        - You put scores from states state_rows at t into score_buffer, if they are not computed yet.
+        """
+        if self.vector_matrix is None:
+            return
+        candidate_ids = numpy.asarray(state_rows, dtype=numpy.int64) + int(self.state_offsets[t])
+        missing_ids = numpy.unique(candidate_ids[~self.is_row_computed[candidate_ids]])
+        if missing_ids.shape[0] == 0:
+            return
+        vector_matrix_t_plus = self.vector_matrix[self.state_offsets[t+1]:self.state_offsets[t+2]]
+        self.__get_block_view(t)[missing_ids - int(self.state_offsets[t]), :] = numpy.dot(self.vector_matrix[missing_ids],
+                                                                                          vector_matrix_t_plus.T)
+        self.is_row_computed[missing_ids] = True
+
+    def set_score_rows(self, t:int, state_rows:ndarray, score_rows:ndarray):
+        """* What you can do
+        - You put scores from states state_rows at t, e.g. rows from SimilarityCacheObject. They are not computed again.
+        """
+        self.__get_block_view(t)[state_rows, :] = score_rows
+        if not self.is_row_computed is None:
+            self.is_row_computed[numpy.asarray(state_rows, dtype=numpy.int64) + int(self.state_offsets[t])] = True
+
+    def get_score_matrix(self, t:int)->ndarray:
+        """* What you can do
+        - You get a view of scores between position t and t+1. It doesn't copy score_buffer.
+        - Rows which are not computed yet are computed.
+        """
+        self.__compute_rows(t, numpy.arange(self.get_n_state(t)))
+        return self.__get_block_view(t)
+
+    def get_score_rows(self, t:int, state_rows:ndarray)->ndarray:
+        """* What you can do
+        - You get scores from states state_rows at t into all states at t+1. Shape is (len(state_rows), K_t+1)
+        - Only rows of state_rows are computed. Beam search uses it, so it never fills the whole lattice.
+        """
+        self.__compute_rows(t, state_rows)
+        return self.__get_block_view(t)[state_rows, :]
+
+    def estimate_row_scores(self, t:int)->ndarray:
+        """* What you can do
+        - You get a score per state at t which ranks states before their rows are computed.
+        - It's a similarity with the centroid of states at t+1 (K_t + K_t+1 dot products), or the best score of a computed row.
+        """
+        if self.vector_matrix is None:
+            return self.__get_block_view(t).max(axis=1)
+        vector_matrix_t = self.vector_matrix[self.state_offsets[t]:self.state_offsets[t+1]]
+        centroid = self.vector_matrix[self.state_offsets[t+1]:self.state_offsets[t+2]].mean(axis=0)
+        return numpy.dot(vector_matrix_t, centroid)
+
+    def fill_scores(self):
+        """* What you can do
+        - You compute all rows which are not computed yet. After that, score_buffer is the same as a dense lattice.
+        """
+        for t in range(0, self.n_step):
+            self.__compute_rows(t, numpy.arange(self.get_n_state(t)))
+
+    def get_transition_score(self, t:int, candidate_id_t:int, candidate_id_t_plus:int):
+        state_index_t = candidate_id_t - self.state_offsets[t]
+        state_index_t_plus = candidate_id_t_plus - self.state_offsets[t+1]
+        self.__compute_rows(t, numpy.array([state_index_t]))
+        return self.score_buffer[self.score_offsets[t] + state_index_t * self.get_n_state(t+1) + state_index_t_plus]
+
+    def get_state(self, candidate_id:int)->Tuple[int,str]:
+        """* What you can do
+        - You get (position, label) of a candidate id
+        """
+        position = int(numpy.searchsorted(self.state_offsets, candidate_id, side='right')) - 1
+        return (position, self.label_table[candidate_id])
+
+    def to_index_dictionary(self)->IndexDictionaryObject:
+        """* What you can do
+        - You get IndexDictionaryObject whose indices are the same as rows and columns of to_csr_matrix()
+        """
+        n_row_state = int(self.state_offsets[self.n_step]) if self.n_step > 0 else 0
+        seq_state = [(position, self.label_table[candidate_id])
+                     for position in range(0, self.n_position)
+                     for candidate_id in range(int(self.state_offsets[position]), int(self.state_offsets[position+1]))]
+        row2index = StateIndexDictionary(seq_state[:n_row_state])
+        column2index = StateIndexDictionary(seq_state[self.column_offset:] if self.n_step > 0 else [])
+        return IndexDictionaryObject(state2index={'row2index': row2index, 'column2index': column2index},
+                                     index2state={'index2row': row2index.index2state, 'index2column': column2index.index2state})
+
+    def to_transition_blocks(self)->List[TransitionBlockObject]:
+        n_state_0 = self.column_offset
+        return [TransitionBlockObject(
+            row_indices=numpy.arange(self.state_offsets[t], self.state_offsets[t+1], dtype=numpy.int32),
+            column_indices=numpy.arange(self.state_offsets[t+1] - n_state_0, self.state_offsets[t+2] - n_state_0, dtype=numpy.int32),
+            score_matrix=self.get_score_matrix(t))
+            for t in range(0, self.n_step)]
+
+    def to_csr_matrix(self, indices:ndarray=None)->csr_matrix:
+        """* What you can do
+        - You get transition_matrix which shares score_buffer as its data array.
+
+        * Params
+        - indices: int32 buffer with the same length as score_buffer for column indices, e.g. a memory-mapped array.
+            If None, it's allocated on memory.
+        """
+        self.fill_scores()
+        seq_n_state = numpy.diff(self.state_offsets)
+        n_row = int(seq_n_state[:self.n_step].sum())
+        n_column = int(seq_n_state[1:].sum())
+        if indices is None:
+            indices = numpy.empty(len(self.score_buffer), dtype=numpy.int32)
+        for t in range(0, self.n_step):
+            column_indices = numpy.arange(self.state_offsets[t+1] - self.column_offset, self.state_offsets[t+2] - self.column_offset, dtype=numpy.int32)
+            indices[self.score_offsets[t]:self.score_offsets[t+1]] = numpy.tile(column_indices, int(seq_n_state[t]))
+        row_length = numpy.repeat(seq_n_state[1:], seq_n_state[:self.n_step]) if self.n_step > 0 else numpy.array([], dtype=numpy.int64)
+        indptr = numpy.concatenate([[0], numpy.cumsum(row_length)]).astype(numpy.int32)
+        return csr_matrix((self.score_buffer, indices, indptr), shape=(n_row, n_column), copy=False)
+
+    @property
+    def nbytes(self)->int:
+        """* What you can do
+        - You get the size of arrays and labels. Label strings are shared with WikipediaArticleObject, so they are not counted.
+        """
+        nbytes = self.score_buffer.nbytes + self.score_offsets.nbytes + self.state_offsets.nbytes + sys.getsizeof(self.label_table)
+        if not self.vector_matrix is None:
+            nbytes += self.vector_matrix.nbytes + self.is_row_computed.nbytes
+        return nbytes
+
+
+class LatticeScoreBlockObject(object):
+    """Score block between position t and t+1 of LatticeArrayObject. Rows are computed when decode_beam_search_routes() asks them.
+    """
+    __slots__ = ['lattice_array', 't']
+
+    def __init__(self, lattice_array:LatticeArrayObject, t:int):
+        self.lattice_array = lattice_array
+        self.t = t
+
+    @property
+    def shape(self)->Tuple[int, int]:
+        return (self.lattice_array.get_n_state(self.t), self.lattice_array.get_n_state(self.t + 1))
+
+    def get_rows(self, row_index:ndarray)->ndarray:
+        return self.lattice_array.get_score_rows(self.t, row_index)
+
+    def estimate_rows(self)->ndarray:
+        return self.lattice_array.estimate_row_scores(self.t)
+
+
 class LatticeObject(object):
     def __init__(self,
-                 transition_matrix:Union[csr_matrix, ndarray],
-                 index_dictionary_obj:IndexDictionaryObject,
-                 seq_edge_groups:List[List[EdgeObject]],
-                 seq_wiki_article_name: List[WikipediaArticleObject]=None):
+                 transition_matrix:Union[csr_matrix, ndarray]=None,
+                 index_dictionary_obj:IndexDictionaryObject=None,
+                 seq_edge_groups:List[List[EdgeObject]]=None,
+                 seq_wiki_article_name: List[WikipediaArticleObject]=None,
+                 seq_transition_block: List[TransitionBlockObject]=None,
+                 path_working_dir: str=None,
+                 lattice_array: LatticeArrayObject=None):
         """*
+        - seq_edge_groups, seq_transition_block or lattice_array must be given. The others are generated from it when they're needed.
+        - With lattice_array, decoders work on its score buffer directly.
+          transition_matrix, index_dictionary_obj, seq_edge_groups and seq_transition_block are generated only when they're accessed.
+        - path_working_dir is a directory which keeps disk-backed arrays of this lattice.
+            - The directory is removed when close() is called or the object is garbage-collected.
         """
-        self.transition_matrix = transition_matrix
-        self.index_dictionary_obj = index_dictionary_obj
-        self.seq_edge_groups = seq_edge_groups
-        self.index_tuple_route = self.__generate_edge_routes()
+        if seq_edge_groups is None and seq_transition_block is None and lattice_array is None:
+            raise Exception('seq_edge_groups, seq_transition_block or lattice_array must be given.')
+        self.lattice_array = lattice_array
+        self.__transition_matrix = transition_matrix
+        self.__index_dictionary_obj = index_dictionary_obj
+        self.__seq_edge_groups = seq_edge_groups
+        self.__index_tuple_route = None
+        self.__seq_transition_block = seq_transition_block
+        self.__label2WikiArticleObj = None
+        # (position, label) -> WikipediaArticleView
+        self.__position_label2article = {}  # type: Dict[Tuple[int,str],WikipediaArticleView]
+        # SequenceScore objects which are not materialized yet. They are materialized before close()
+        self.__lazy_sequence_score = weakref.WeakSet()
+        self.path_working_dir = path_working_dir
+        if path_working_dir is None:
+            self.__finalizer = None
+        else:
+            self.__finalizer = weakref.finalize(self, shutil.rmtree, path_working_dir, True)
         self.seq_wiki_article_name = seq_wiki_article_name
-        if not seq_wiki_article_name is None:
+
+    def close(self):
+        """* What you can do
+        - You remove disk-backed arrays of this lattice. The lattice is not available after this.
+        - SequenceScore objects from this lattice are materialized before arrays are removed.
+        """
+        for sequence_score_obj in list(self.__lazy_sequence_score):
+            sequence_score_obj.materialize()
+        self.__lazy_sequence_score.clear()
+        self.lattice_array = None
+        self.transition_matrix = None
+        self.__seq_transition_block = None
+        if not self.__finalizer is None:
+            self.__finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def transition_matrix(self)->Union[csr_matrix, ndarray]:
+        """Matrix of (states at 0...T-2) * (states at 1...T-1). It's generated from lattice_array at the first access.
+        """
+        if self.__transition_matrix is None and not self.lattice_array is None:
+            if self.path_working_dir is None:
+                indices = None
+            else:
+                indices = open_memmap(os.path.join(self.path_working_dir, 'transition_column_index.npy'), mode='w+',
+                                      dtype=numpy.int32, shape=(len(self.lattice_array.score_buffer), ))
+            self.__transition_matrix = self.lattice_array.to_csr_matrix(indices)
+        return self.__transition_matrix
+
+    @transition_matrix.setter
+    def transition_matrix(self, transition_matrix:Union[csr_matrix, ndarray]):
+        self.__transition_matrix = transition_matrix
+
+    @property
+    def index_dictionary_obj(self)->IndexDictionaryObject:
+        """Relation of (position, label) and indices of transition_matrix. It's generated from lattice_array at the first access.
+        """
+        if self.__index_dictionary_obj is None and not self.lattice_array is None:
+            self.__index_dictionary_obj = self.lattice_array.to_index_dictionary()
+        return self.__index_dictionary_obj
+
+    @index_dictionary_obj.setter
+    def index_dictionary_obj(self, index_dictionary_obj:IndexDictionaryObject):
+        self.__index_dictionary_obj = index_dictionary_obj
+
+    @property
+    def label2WikiArticleObj(self)->Dict[str,List[Tuple[int, WikipediaArticleObject]]]:
+        """dict of wiki-article-name -> [(index-in-list, wiki-article-object)]. It's generated at the first access.
+        """
+        if self.__label2WikiArticleObj is None and not self.seq_wiki_article_name is None:
             ## It constructs dict of wiki-article-name <-> (index-in-list, wiki-article-object) ##
             function_key = lambda tuple_wikilabel_wikiobj: tuple_wikilabel_wikiobj[0]
             seq_tuple_wikilabel_wikiobj = [(wiki_article_name, wiki_obj_index, wiki_article_obj)
                                            for wiki_obj_index, wiki_article_obj in enumerate(self.seq_wiki_article_name)
                                            for wiki_article_name in wiki_article_obj.candidate_article_name]
-            self.label2WikiArticleObj = {}  # type: Dict[str,List[Tuple[int, WikipediaArticleObject]]]
+            self.__label2WikiArticleObj = {}
             for wiki_label_name, g_obj in itertools.groupby(sorted(seq_tuple_wikilabel_wikiobj, key=function_key), key=function_key):
-                self.label2WikiArticleObj[wiki_label_name] = [(tuple_wikilabel_wiki_obj[1], tuple_wikilabel_wiki_obj[2])
-                                                              for tuple_wikilabel_wiki_obj in g_obj]
+                self.__label2WikiArticleObj[wiki_label_name] = [(tuple_wikilabel_wiki_obj[1], tuple_wikilabel_wiki_obj[2])
+                                                                for tuple_wikilabel_wiki_obj in g_obj]
+        return self.__label2WikiArticleObj
+
+    @property
+    def index_tuple_route(self)->List[Tuple[Tuple[int,int]]]:
+        """All routes over lattice graph. It's generated at the first access because it's a product of all edges.
+        """
+        if self.__index_tuple_route is None:
+            self.__index_tuple_route = self.__generate_edge_routes()
+        return self.__index_tuple_route
+
+    @property
+    def seq_edge_groups(self)->List[List[EdgeObject]]:
+        """Edges between position t and t+1. They are generated from seq_transition_block if they are not given.
+        """
+        if self.__seq_edge_groups is None:
+            self.__seq_edge_groups = [
+                [EdgeObject(int(block.row_indices[i]), int(block.column_indices[j]))
+                 for i, j in zip(*numpy.nonzero(~numpy.isneginf(block.score_matrix)))]
+                for block in self.seq_transition_block]
+        return self.__seq_edge_groups
+
+    @property
+    def seq_transition_block(self)->List[TransitionBlockObject]:
+        """Dense score blocks between position t and t+1. They are inputs of decoders.
+        """
+        if self.__seq_transition_block is None:
+            if self.lattice_array is None:
+                self.__seq_transition_block = self.__generate_transition_blocks()
+            else:
+                self.__seq_transition_block = self.lattice_array.to_transition_blocks()
+        return self.__seq_transition_block
+
+    def __generate_transition_blocks(self)->List[TransitionBlockObject]:
+        """* What you can do
+        - You convert edges into dense score blocks.
+        - States at position t+1 are ordered in the same way between a block at t and a block at t+1.
+        """
+        row2index = self.index_dictionary_obj.state2index['row2index']
+        index2row = self.index_dictionary_obj.index2state['index2row']
+        index2column = self.index_dictionary_obj.index2state['index2column']
+
+        seq_transition_block = []
+        seq_state_at_t = None  # type: List[Tuple[int,str]]
+        for edge_group in self.seq_edge_groups:
+            if seq_state_at_t is None:
+                seq_state_at_t = list(dict.fromkeys(index2row[edge_obj.index_at_t] for edge_obj in edge_group))
+            column_indices = list(dict.fromkeys(edge_obj.index_at_t_plus for edge_obj in edge_group))
+            row_indices = [row2index[state] if state in row2index else -1 for state in seq_state_at_t]
+
+            state_position_at_t = {row_index: position for position, row_index in enumerate(row_indices)}
+            column_position = {column_index: position for position, column_index in enumerate(column_indices)}
+            edge_rows = [edge_obj.index_at_t for edge_obj in edge_group]
+            edge_columns = [edge_obj.index_at_t_plus for edge_obj in edge_group]
+            score_matrix = numpy.full((len(row_indices), len(column_indices)), -numpy.inf, dtype=numpy.float64)
+            if len(edge_group) > 0:
+                edge_scores = numpy.asarray(self.transition_matrix[edge_rows, edge_columns]).ravel()
+                score_matrix[[state_position_at_t[row] for row in edge_rows],
+                             [column_position[column] for column in edge_columns]] = edge_scores
+
+            seq_transition_block.append(TransitionBlockObject(row_indices=numpy.array(row_indices, dtype=numpy.int64),
+                                                              column_indices=numpy.array(column_indices, dtype=numpy.int64),
+                                                              score_matrix=score_matrix))
+            seq_state_at_t = [index2column[column_index] for column_index in column_indices]
+
+        return seq_transition_block
+
+    def __generate_best_routes(self,
+                               top_k:int,
+                               decode_method:str='viterbi',
+                               beam_width:int=10,
+                               score_threshold:float=None)->List[Tuple[float, Tuple[Tuple[int,int]]]]:
+        """* What you can do
+        - You get k-best routes with Viterbi algorithm or beam search instead of enumerating all routes.
+
+        * Output
+        - [(route_score, ( (row_index_matrix, column_index_matrix) ))]
+        """
+        if self.lattice_array is None:
+            seq_transition_block = self.seq_transition_block
+            seq_score_block = [block.score_matrix for block in seq_transition_block]
+        elif decode_method == 'beam':
+            # beam search asks only rows of its hypotheses. Other rows of a lazy lattice are never computed
+            seq_score_block = [LatticeScoreBlockObject(self.lattice_array, t) for t in range(0, self.lattice_array.n_step)]
+        else:
+            seq_score_block = [self.lattice_array.get_score_matrix(t) for t in range(0, self.lattice_array.n_step)]
+        if len(seq_score_block) == 0:
+            return [(0.0, tuple())]
+
+        if decode_method == 'viterbi':
+            seq_route = decode_k_best_routes(seq_score_block, top_k=top_k)
+        elif decode_method == 'beam':
+            seq_route = decode_beam_search_routes(seq_score_block, beam_width=beam_width, top_k=top_k, score_threshold=score_threshold)
         else:
-            self.label2WikiArticleObj = None
+            raise Exception('There is no decode method named {}'.format(decode_method))
+        if self.lattice_array is None:
+            return [(route_score,
+                     tuple((int(block.row_indices[route[t]]), int(block.column_indices[route[t+1]]))
+                           for t, block in enumerate(seq_transition_block)))
+                    for route_score, route in seq_route]
+        else:
+            return [(route_score, self.__state_route_to_index_tuple(route)) for route_score, route in seq_route]
 
+    def __state_route_to_index_tuple(self, route:List[int])->Tuple[Tuple[int,int]]:
+        """* What you can do
+        - You convert a route of state indices at each position into (row_index, column_index) of transition_matrix.
+          A row index is a candidate id at t, and a column index is (candidate id at t+1) - K_0
+        """
+        state_offsets = self.lattice_array.state_offsets
+        n_state_0 = self.lattice_array.column_offset
+        return tuple((int(state_offsets[t]) + route[t], int(state_offsets[t+1]) + route[t+1] - n_state_0)
+                     for t in range(0, len(route) - 1))
 
     def __generate_edge_routes(self)->List[Tuple[Tuple[int,int]]]:
         """* What you can do
@@ -245,6 +760,13 @@ class LatticeObject(object):
 
             return judge_flag
 
+        if not self.lattice_array is None:
+            # every pair of states between t and t+1 has an edge, so routes are products of states
+            seq_state_range = [range(0, self.lattice_array.get_n_state(position)) for position in range(0, self.lattice_array.n_position)]
+            if len(seq_state_range) < 2:
+                return [tuple()]
+            return [self.__state_route_to_index_tuple(route) for route in product(*seq_state_range)]
+
         index_tuple_of_edge = [[edge_obj.to_tuple() for edge_obj in list_edge_candidate]
                                for list_edge_candidate in self.seq_edge_groups]
         index_tuple_of_route_candidates = product(*index_tuple_of_edge)
@@ -252,25 +774,34 @@ class LatticeObject(object):
         index_tuple_of_route = list(filter(judge_proper_route, index_tuple_of_route_candidates))
         return index_tuple_of_route
 
-    def __get_score(self, row:int, column:int)->float:
-        return self.transition_matrix[row, column]
+    def __get_score(self, t:int, row:int, column:int)->float:
+        if self.lattice_array is None:
+            return self.transition_matrix[row, column]
+        else:
+            return self.lattice_array.get_transition_score(t, row, column + self.lattice_array.column_offset)
 
     def __compute_route_score(self, index_tuple_route:Tuple[Tuple[int,int]])->float:
         """* What you can do
         - You get score of a route
         """
-        seq_score = [self.__get_score(index_tuple[0], index_tuple[1]) for index_tuple in index_tuple_route]
+        seq_score = [self.__get_score(t, index_tuple[0], index_tuple[1]) for t, index_tuple in enumerate(index_tuple_route)]
         return sum(seq_score)
 
     def __generate_state_name_sequence(self, index_tuple_route:Tuple[Tuple[int,int]])->List[Tuple[str, str, float]]:
         """* What you can do
         - You get sequence of label & score tuple (label_t, label_t_plus_1, score)
         """
+        if not self.lattice_array is None:
+            label_table = self.lattice_array.label_table
+            n_state_0 = self.lattice_array.column_offset
+            return [(label_table[index_tuple[0]], label_table[index_tuple[1] + n_state_0], self.__get_score(t, index_tuple[0], index_tuple[1]))
+                    for t, index_tuple in enumerate(index_tuple_route)]
+
         seq_state_name_score = [
             (self.index_dictionary_obj.index2state['index2row'][index_tuple[0]][1],
              self.index_dictionary_obj.index2state['index2column'][index_tuple[1]][1],
-             self.__get_score(index_tuple[0], index_tuple[1]))
-            for index_tuple in index_tuple_route]
+             self.__get_score(t, index_tuple[0], index_tuple[1]))
+            for t, index_tuple in enumerate(index_tuple_route)]
         return seq_state_name_score
 
     def __generate_label_sequence(self, seq_score_tuple:List[Tuple[str, str, float]])->List[str]:
@@ -289,39 +820,66 @@ class LatticeObject(object):
 
         return seq_label
 
+    def __get_article_view(self, position:int, label:str)->WikipediaArticleView:
+        """* What you can do
+        - You get a disambiguated article of (position, label). A view is made once per lattice and reused.
+        """
+        key = (position, label)
+        if not key in self.__position_label2article:
+            self.__position_label2article[key] = WikipediaArticleView.from_article_object(self.seq_wiki_article_name[position], label)
+        return self.__position_label2article[key]
+
     def __generate_wiki_article_object_sequence(self, seq_label_name:List[str])->List[WikipediaArticleObject]:
         """* What you can do
         - You generate list of WikipediaArticleObject. They are already disambiguated.
         """
-        seq_wiki_article_obj = [None] * len(seq_label_name)
-        for l_index, label in enumerate(seq_label_name):
-            seq_tuple_index_wikiobj = copy.deepcopy(self.label2WikiArticleObj[label])
-            wiki_article_obj_in_index = [tuple_index_wikiobj for tuple_index_wikiobj in seq_tuple_index_wikiobj if tuple_index_wikiobj[0]==l_index][0][1]  # type: WikipediaArticleObject
-            wiki_article_obj_in_index.article_name = label
-            seq_wiki_article_obj[l_index] = wiki_article_obj_in_index
+        return [self.__get_article_view(position, label) for position, label in enumerate(seq_label_name)]
 
-        return list(filter(lambda element: True if not element is None else False, seq_wiki_article_obj))
+    def materialize_route(self, index_tuple_route:Tuple[Tuple[int,int]])->Tuple[List[WikipediaArticleObject], List[Tuple[str, str, float]]]:
+        """* What you can do
+        - You get articles (or labels without seq_wiki_article_name) and (label_t, label_t_plus_1, score) tuples of a route.
+        """
+        seq_score_tuple = self.__generate_state_name_sequence(index_tuple_route)
+        seq_label_name = self.__generate_label_sequence(seq_score_tuple=seq_score_tuple)
 
-    def get_score_routes(self)->List[SequenceScore]:
+        if not self.seq_wiki_article_name is None:
+            label_object = self.__generate_wiki_article_object_sequence(seq_label_name)
+        else:
+            label_object = seq_label_name
+        return (label_object, seq_score_tuple)
+
+    def get_score_routes(self,
+                         top_k:int=None,
+                         decode_method:str='viterbi',
+                         beam_width:int=10,
+                         score_threshold:float=None)->List[SequenceScore]:
         """* What you can do
         - You generate list of SequenceScore.
             - Each SequenceScore has information of one-route and its score.
+            - Labels and articles of a route are generated when they're accessed first. See SequenceScore.materialize()
+
+        * Params
+        - top_k: the number of routes to return. If None, it returns all routes over lattice graph.
+            - With top_k, routes are decoded by decode_method and sorted by descending score.
+        - decode_method: "viterbi" (exact k-best) or "beam" (approximate beam search)
+            - With "beam", top_k=None returns all routes left in the final beam.
+        - beam_width: the max number of partial routes at each step of beam search
+        - score_threshold: partial routes lower than (the best partial score - score_threshold) are pruned in beam search
         """
-        ### make list beforehand to make this process faster ###
-        sequence_score_objects = [None] * len(self.index_tuple_route)
-        for l_index, route in enumerate(self.index_tuple_route):
-            route_score = self.__compute_route_score(route)
-            seq_score_tuple = self.__generate_state_name_sequence(route)
-            seq_label_name = self.__generate_label_sequence(seq_score_tuple=seq_score_tuple)
-
-            if not self.seq_wiki_article_name is None:
-                label_object = self.__generate_wiki_article_object_sequence(seq_label_name)
-            else:
-                label_object = seq_label_name
+        if top_k is None and decode_method == 'viterbi':
+            seq_score_route = [(self.__compute_route_score(route), route) for route in self.index_tuple_route]
+        else:
+            seq_score_route = self.__generate_best_routes(top_k=top_k,
+                                                          decode_method=decode_method,
+                                                          beam_width=beam_width,
+                                                          score_threshold=score_threshold)
 
-            sequence_score_objects[l_index] = SequenceScore(seq_words=label_object,
-                              seq_transition_score=seq_score_tuple,
-                              sequence_score=route_score)
+        ### make list beforehand to make this process faster ###
+        sequence_score_objects = [None] * len(seq_score_route)
+        for l_index, (route_score, route) in enumerate(seq_score_route):
+            sequence_score_obj = SequenceScore.from_route(lattice_object=self, index_tuple_route=route, sequence_score=route_score)
+            self.__lazy_sequence_score.add(sequence_score_obj)
+            sequence_score_objects[l_index] = sequence_score_obj
 
         seq_result_score_object = list(filter(lambda element_obj: True if not element_obj is None else False, sequence_score_objects))
         return seq_result_score_object
\ No newline at end of file
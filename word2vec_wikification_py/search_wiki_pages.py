@@ -1,6 +1,8 @@
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Iterator, Iterable
 from pymysql import Connection, cursors
 from typing import Tuple
+from word2vec_wikification_py.local_wiki_index import LocalWikipediaIndex
+import bisect
 
 def __generate_window_size(target_token:List[str])->List[int]:
     return [i for i in range(1, len(target_token)+1)]
@@ -17,6 +19,20 @@ def __generate_index_range(list_index:List[int], window_size:int)->List[List[int
     return search_index
 
 
+def escape_like_string(token:str)->str:
+    """* What you can do
+    - You escape "\\", "%" and "_" in token, so that LIKE matches them literally as Python does.
+    """
+    return token.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def make_disambiguation_pattern(token:str)->str:
+    """* What you can do
+    - You get a LIKE pattern of "token_(...)", which is a title with disambiguation suffix.
+    """
+    return '{}\\_(%)'.format(escape_like_string(token))
+
+
 def search_function_from_wikipedia_database(token: str,
                                             wikipedia_db_connector: Connection,
                                             page_table_name: str = 'page',
@@ -35,7 +51,7 @@ def search_function_from_wikipedia_database(token: str,
     # It searches article name with exact same name as token
     cursor = wikipedia_db_connector.cursor()  # type: cursors
     page_query = """SELECT page_id, page_title, page_is_redirect FROM {} WHERE (page_title = %s OR page_title LIKE %s) AND page_namespace = 0""".format(page_table_name)
-    cursor.execute(page_query, (token, '{}\_(%)'.format(token)))
+    cursor.execute(page_query, (token, make_disambiguation_pattern(token)))
     fetched_records = list(cursor.fetchall())
     page_names = [page_id_title[1] for page_id_title in fetched_records if page_id_title[2]==0]
     redirect_names = [page_id_title[0] for page_id_title in fetched_records if page_id_title[2]==1]
@@ -50,12 +66,188 @@ def search_function_from_wikipedia_database(token: str,
     else:
         article_page_names = []
 
-    article_name_string = list(set([decode_string(article_name) for article_name in page_names+article_page_names
-                           if not decode_string(article_name) is None]))
+    article_name_string = sorted(set([decode_string(article_name) for article_name in page_names+article_page_names
+                             if not decode_string(article_name) is None]))
 
     return article_name_string
 
 
+def __decode_title(title)->str:
+    if isinstance(title, bytes):
+        try:
+            return title.decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+    else:
+        return title
+
+
+def __is_matched_title(token:str, page_title:str)->bool:
+    """It's the same condition as (page_title = token OR page_title LIKE 'token\\_(%)')
+    """
+    return page_title == token or \
+           (page_title.startswith('{}_('.format(token)) and page_title.endswith(')') and len(page_title) > len(token) + 2)
+
+
+def make_bulk_page_query(page_table_name:str, seq_chunk_token:List[str])->Tuple[str, List[Any]]:
+    """* What you can do
+    - You get a query and its arguments to find pages of all tokens in seq_chunk_token.
+    """
+    like_condition = ' OR '.join(['page_title LIKE %s'] * len(seq_chunk_token))
+    page_query = """SELECT page_id, page_title, page_is_redirect FROM {} WHERE (page_title IN %s OR {}) AND page_namespace = 0""".format(
+        page_table_name, like_condition)
+    return page_query, [tuple(seq_chunk_token)] + [make_disambiguation_pattern(token) for token in seq_chunk_token]
+
+
+def make_bulk_redirect_query(page_table_redirect:str)->str:
+    return """SELECT rd_from, rd_title FROM {} WHERE rd_from IN %s""".format(page_table_redirect)
+
+
+def decode_page_records(seq_page_record:List[Tuple[int, Any, int]])->List[Tuple[int, str, int]]:
+    return [(page_id, __decode_title(page_title), page_is_redirect) for page_id, page_title, page_is_redirect in seq_page_record]
+
+
+def get_redirect_page_ids(fetched_records:List[Tuple[int, str, int]])->List[int]:
+    return [page_id for page_id, page_title, page_is_redirect in fetched_records if page_is_redirect == 1]
+
+
+def merge_bulk_search_records(seq_chunk_token:List[str],
+                              fetched_records:List[Tuple[int, str, int]],
+                              seq_redirect_record:List[Tuple[int, Any]],
+                              token2article_names:Dict[str,List[str]]):
+    """* What you can do
+    - You put article names of page and redirect records into token2article_names.
+    """
+    redirect_id2title = {}  # type: Dict[int,List[str]]
+    for rd_from, rd_title in seq_redirect_record:
+        redirect_id2title.setdefault(rd_from, []).append(__decode_title(rd_title))
+
+    # title -> tokens. A title matches the token itself or the token with disambiguation suffix
+    token_set = set(seq_chunk_token)
+    for page_id, page_title, page_is_redirect in fetched_records:
+        if page_title is None:
+            continue
+        if page_title in token_set:
+            seq_matched_token = [page_title]
+        else:
+            seq_matched_token = [token for token in seq_chunk_token if __is_matched_title(token, page_title)]
+        if page_is_redirect == 0:
+            seq_article_name = [page_title]
+        else:
+            seq_article_name = redirect_id2title.get(page_id, [])
+        for token in seq_matched_token:
+            token2article_names.setdefault(token, []).extend(seq_article_name)
+
+
+def collect_bulk_search_result(seq_token:List[str], token2article_names:Dict[str,List[str]])->List[List[str]]:
+    return [sorted(set(article_name for article_name in token2article_names.get(token, []) if not article_name is None))
+            for token in seq_token]
+
+
+def search_function_from_wikipedia_database_bulk(seq_token: List[str],
+                                                 wikipedia_db_connector: Connection,
+                                                 page_table_name: str = 'page',
+                                                 page_table_redirect: str = 'redirect',
+                                                 chunk_size: int = 1000) -> List[List[str]]:
+    """* What you can do
+    - You search article names of all tokens with 2 queries (page and redirect) per chunk_size tokens.
+    - The i-th list is the same as search_function_from_wikipedia_database(seq_token[i])
+
+    * Params
+    - seq_token: tokens of a sentence, or tokens of many sentences
+    - wikipedia_db_connector: pymysql.Connection or MysqlConnectionPool
+    - chunk_size: the max number of distinct tokens in one query
+    """
+    seq_unique_token = list(dict.fromkeys(seq_token))
+    token2article_names = {}  # type: Dict[str,List[str]]
+    for chunk_start in range(0, len(seq_unique_token), chunk_size):
+        seq_chunk_token = seq_unique_token[chunk_start:chunk_start+chunk_size]
+        page_query, page_query_args = make_bulk_page_query(page_table_name, seq_chunk_token)
+        cursor = wikipedia_db_connector.cursor()  # type: cursors
+        try:
+            cursor.execute(page_query, page_query_args)
+            fetched_records = decode_page_records(cursor.fetchall())
+        finally:
+            cursor.close()
+
+        redirect_ids = get_redirect_page_ids(fetched_records)
+        seq_redirect_record = []
+        if not redirect_ids == []:
+            cursor = wikipedia_db_connector.cursor()  # type: cursors
+            try:
+                cursor.execute(make_bulk_redirect_query(page_table_redirect), (redirect_ids,))
+                seq_redirect_record = list(cursor.fetchall())
+            finally:
+                cursor.close()
+        merge_bulk_search_records(seq_chunk_token, fetched_records, seq_redirect_record, token2article_names)
+
+    return collect_bulk_search_result(seq_token, token2article_names)
+
+
+def search_sentences_from_wikipedia_database(seq_input_tokens: List[List[str]],
+                                             wikipedia_db_connector: Connection,
+                                             page_table_name: str = 'page',
+                                             page_table_redirect: str = 'redirect',
+                                             chunk_size: int = 1000) -> List[List[List[str]]]:
+    """* What you can do
+    - You search article names of tokens in many sentences together.
+    - Output has the same shape as seq_input_tokens. Each element is a list of article names.
+    """
+    seq_flat_token = [token for input_tokens in seq_input_tokens for token in input_tokens]
+    seq_flat_result = search_function_from_wikipedia_database_bulk(seq_flat_token,
+                                                                   wikipedia_db_connector=wikipedia_db_connector,
+                                                                   page_table_name=page_table_name,
+                                                                   page_table_redirect=page_table_redirect,
+                                                                   chunk_size=chunk_size)
+    seq_result = []
+    offset = 0
+    for input_tokens in seq_input_tokens:
+        seq_result.append(seq_flat_result[offset:offset+len(input_tokens)])
+        offset += len(input_tokens)
+    return seq_result
+
+
+def search_function_from_local_index(token: str,
+                                     wikipedia_db_connector: LocalWikipediaIndex,
+                                     page_table_name: str = 'page',
+                                     page_table_redirect: str = 'redirect') -> List[str]:
+    """* What you can do
+    - You search article names from LocalWikipediaIndex without database server.
+    - It has the same signature as search_function_from_wikipedia_database(). Table names are not used.
+    """
+    return wikipedia_db_connector.search(token)
+
+
+def search_function_from_local_index_bulk(seq_token: List[str],
+                                          wikipedia_db_connector: LocalWikipediaIndex,
+                                          page_table_name: str = 'page',
+                                          page_table_redirect: str = 'redirect',
+                                          chunk_size: int = 500) -> List[List[str]]:
+    """* What you can do
+    - It has the same signature as search_function_from_wikipedia_database_bulk(). Table names are not used.
+    """
+    return wikipedia_db_connector.search_many(seq_token, chunk_size=chunk_size)
+
+
+def iterate_article_names(wikipedia_db_connector: Connection,
+                          page_table_name: str = 'page',
+                          article_symbol_format: str = '[{}]') -> Iterator[str]:
+    """* What you can do
+    - You iterate names of all articles (not redirect pages) in "page" table.
+    - Names are formatted with article_symbol_format, so they are same as keys of entity vector model.
+    - It's used as allow-list of entity_vector_store.extract_entity_vector_subset()
+    """
+    cursor = wikipedia_db_connector.cursor(cursors.SSCursor)  # type: cursors.SSCursor
+    page_query = """SELECT page_title FROM {} WHERE page_namespace = 0 AND page_is_redirect = 0""".format(page_table_name)
+    cursor.execute(page_query)
+    try:
+        for record in cursor:
+            page_title = record[0].decode('utf-8') if isinstance(record[0], bytes) else record[0]
+            yield article_symbol_format.format(page_title)
+    finally:
+        cursor.close()
+
+
 def search_from_dictionary(target_tokens:List[str],
                            string_normalization_function,
                            partially_param_given_function)->Dict[str,Any]:
@@ -98,5 +290,109 @@ def search_from_dictionary(target_tokens:List[str],
     return found_token_tuple_object
 
 
+class TitleTrieObject(object):
+    """Prefix index of titles. It's built once and used by search_from_dictionary_with_trie()
+    Titles are tokens which have search results, e.g. LocalWikipediaIndex.iterate_tokens()
+
+    Titles are kept in one sorted list, not in a node-per-character trie. A prefix is a range of the list found by bisect.
+    It costs one str object per title (about 80 bytes + 2-4 bytes per character in CPython).
+    Titles of Japanese Wikipedia (a few million) need a few hundred MB. Build it only once per process and share it.
+    """
+    __slots__ = ['seq_title']
+    # the largest character. "prefix + MAX_CHARACTER" is larger than any title which starts with prefix.
+    MAX_CHARACTER = '\U0010ffff'
+
+    def __init__(self, iterable_title:Iterable[str]):
+        self.seq_title = sorted(set(iterable_title))  # type: List[str]
+
+    def __len__(self)->int:
+        return len(self.seq_title)
+
+    @property
+    def n_title(self)->int:
+        return len(self.seq_title)
+
+    def add_title(self, title:str):
+        """* What you can do
+        - You add a title. It's O(n) insertion, so give all titles to __init__() if you can.
+        """
+        index = bisect.bisect_left(self.seq_title, title)
+        if index == len(self.seq_title) or not self.seq_title[index] == title:
+            self.seq_title.insert(index, title)
+
+    def find_range(self, prefix:str, start_index:int=0, end_index:int=None)->Tuple[int, int]:
+        """* What you can do
+        - You get a range [start, end) of titles which start with prefix. If no title starts with prefix, start == end.
+        - If (start_index, end_index) is the range of a shorter prefix of prefix, it searches only in the range.
+        """
+        if end_index is None: end_index = len(self.seq_title)
+        start_index = bisect.bisect_left(self.seq_title, prefix, start_index, end_index)
+        end_index = bisect.bisect_left(self.seq_title, prefix + self.MAX_CHARACTER, start_index, end_index)
+        return start_index, end_index
+
+    def is_title(self, title:str, start_index:int=0, end_index:int=None)->bool:
+        """* What you can do
+        - You judge if title is in the index. (start_index, end_index) is the same as find_range()
+        """
+        start_index, end_index = self.find_range(title, start_index, end_index)
+        return start_index < end_index and self.seq_title[start_index] == title
+
+    def __contains__(self, title:str)->bool:
+        return self.is_title(title)
+
+
+def find_title_spans(target_tokens:List[str],
+                     string_normalization_function,
+                     title_trie:TitleTrieObject)->List[Tuple[int, int]]:
+    """* What you can do
+    - You find all spans of tokens whose concatenated string is a title in title_trie.
+    - From each start position, it extends a span while the string is a prefix of some title.
+    - Each token is normalized once. An extension narrows the range of the previous prefix by the appended token only,
+      so it never searches from the whole titles again.
+      string_normalization_function must give the same string for a concatenation and for concatenated normalized tokens.
+
+    * Output
+    - [(start_index, end_index)] end_index is exclusive.
+    """
+    seq_normalized_token = [string_normalization_function(token) for token in target_tokens]
+    seq_span = []
+    for start_index in range(0, len(target_tokens)):
+        prefix = ''
+        range_start, range_end = 0, len(title_trie)
+        for end_index in range(start_index + 1, len(target_tokens) + 1):
+            prefix += seq_normalized_token[end_index - 1]
+            range_start, range_end = title_trie.find_range(prefix, range_start, range_end)
+            if range_start == range_end:
+                break
+            if title_trie.seq_title[range_start] == prefix:
+                seq_span.append((start_index, end_index))
+    return seq_span
+
+
+def search_from_dictionary_with_trie(target_tokens:List[str],
+                                     string_normalization_function,
+                                     partially_param_given_function,
+                                     title_trie:TitleTrieObject)->Dict[str,Any]:
+    """* What you can do
+    - It returns the same result as search_from_dictionary().
+    - Spans are found by title_trie, so partially_param_given_function is called only for spans which hit a title.
+    - The longest span is selected first, and the left one is selected first among spans with the same length.
+    """
+    seq_span = find_title_spans(target_tokens, string_normalization_function, title_trie)
+    seq_span.sort(key=lambda span: (span[0] - span[1], span[0]))
+
+    is_found_index = [False] * len(target_tokens)
+    found_token_tuple_object = {}
+    for start_index, end_index in seq_span:
+        if any(is_found_index[start_index:end_index]): continue
+        normalized_search_token = string_normalization_function(''.join(target_tokens[start_index:end_index]))
+        search_result = partially_param_given_function(normalized_search_token)
+        if len(search_result) > 0:
+            found_token_tuple_object.update({normalized_search_token: search_result})
+            is_found_index[start_index:end_index] = [True] * (end_index - start_index)
+
+    return found_token_tuple_object
+
+
 def complete_search():
     pass
\ No newline at end of file
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+from word2vec_wikification_py.models import WikipediaArticleObject, WikipediaArticleView, SequenceScore
+from word2vec_wikification_py.make_lattice import make_lattice_object, get_vocabulary, filter_out_of_vocabulary_word, \
+    prune_candidates, get_normalized_vector_matrix, TRANSITION_SCORE_DTYPE
+from word2vec_wikification_py import init_logger
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import List, Tuple, Dict
+import numpy
+import logging
+logger = logging.getLogger(name=init_logger.LOGGER_NAME)
+
+
+def make_segment_ranges(n_position:int,
+                        segment_size:int,
+                        overlap:int=0,
+                        seq_boundary:List[int]=None)->List[Tuple[int, int]]:
+    """* What you can do
+    - You split positions 0...n_position-1 into segments. A segment is (start, end), end is exclusive.
+    - Without seq_boundary, segments are fixed windows of segment_size. Neighbouring windows share overlap positions.
+    - With seq_boundary, consecutive sentences are put into one segment while it's not longer than segment_size.
+      A sentence longer than segment_size is split into windows with overlap.
+    - Every segment has 2 positions at least, if n_position is more than 1.
+      A segment with 1 position is merged into its neighbour, so a segment can have segment_size + 1 positions.
+
+    * Params
+    - seq_boundary: end positions (exclusive) of sentences. e.g. [3, 7] means sentences [0, 3), [3, 7), [7, n_position)
+    """
+    if segment_size < 2:
+        raise Exception('segment_size must be more than 1. segment_size={}'.format(segment_size))
+    if overlap < 0 or overlap >= segment_size:
+        raise Exception('overlap must be in [0, segment_size). overlap={}'.format(overlap))
+    if n_position == 0:
+        return []
+
+    seq_unit_end = sorted(set([end for end in (seq_boundary or []) if 0 < end < n_position] + [n_position]))
+    seq_chunk = []  # type: List[Tuple[int, int]]
+    chunk_start = unit_start = 0
+    for unit_end in seq_unit_end:
+        if unit_end - chunk_start > segment_size and unit_start > chunk_start:
+            seq_chunk.append((chunk_start, unit_start))
+            chunk_start = unit_start
+        unit_start = unit_end
+    seq_chunk.append((chunk_start, n_position))
+
+    seq_segment = []  # type: List[Tuple[int, int]]
+    for chunk_start, chunk_end in seq_chunk:
+        start = chunk_start
+        while True:
+            end = min(start + segment_size, chunk_end)
+            seq_segment.append((start, end))
+            if end == chunk_end:
+                break
+            start = end - overlap
+
+    # a segment with 1 position has no transition. It's merged into a neighbour.
+    seq_merged_segment = []  # type: List[Tuple[int, int]]
+    for start, end in seq_segment:
+        if end - start == 1 and len(seq_merged_segment) > 0:
+            seq_merged_segment[-1] = (seq_merged_segment[-1][0], max(seq_merged_segment[-1][1], end))
+        elif len(seq_merged_segment) > 0 and seq_merged_segment[-1][1] - seq_merged_segment[-1][0] == 1:
+            seq_merged_segment[-1] = (seq_merged_segment[-1][0], end)
+        else:
+            seq_merged_segment.append((start, end))
+    return seq_merged_segment
+
+
+def __decode_segment(seq_wiki_article_name:List[WikipediaArticleObject],
+                     entity_vector_model,
+                     similarity_cache,
+                     decode_method:str,
+                     beam_width:int,
+                     score_threshold:float,
+                     max_candidates:int,
+                     candidate_prior:Dict[str,float])->Tuple[List[str], List[float]]:
+    """* What you can do
+    - You get the best labels of a segment and transition scores between them.
+    - Candidates are pruned within the segment, so the cost doesn't grow with document length.
+    - The lattice of the segment is closed before it returns. Only labels are kept.
+    - It's a module-level function, so it can be sent to a worker of ProcessPoolExecutor.
+    """
+    if not max_candidates is None:
+        seq_wiki_article_name = prune_candidates(seq_wiki_article_name, entity_vector_model, max_candidates, candidate_prior)
+    with make_lattice_object(seq_wiki_article_name=seq_wiki_article_name,
+                             entity_vector_model=entity_vector_model,
+                             similarity_cache=similarity_cache,
+                             is_lazy_score=(decode_method == 'beam')) as lattice_object:
+        seq_sequence_score = lattice_object.get_score_routes(top_k=1,
+                                                             decode_method=decode_method,
+                                                             beam_width=beam_width,
+                                                             score_threshold=score_threshold)
+    if len(seq_sequence_score) == 0:
+        raise Exception('There is no route in a segment. page_titles={}'.format([obj.page_title for obj in seq_wiki_article_name]))
+    seq_transition_score = seq_sequence_score[0].seq_transition_score
+    seq_label = [label_t for label_t, label_t_plus, score in seq_transition_score] + [seq_transition_score[-1][1]]
+    return seq_label, [score for label_t, label_t_plus, score in seq_transition_score]
+
+
+def compute_wiki_node_probability_segmented(seq_wiki_article_name,
+                                            entity_vector_model,
+                                            segment_size=50,
+                                            overlap=10,
+                                            seq_boundary=None,
+                                            similarity_cache=None,
+                                            decode_method='viterbi',
+                                            beam_width=10,
+                                            score_threshold=None,
+                                            max_candidates=None,
+                                            candidate_prior=None,
+                                            executor=None)->List[SequenceScore]:
+    """* What you can do
+    - You get the best route of a long sequence, e.g. a whole document, by decoding segments independently.
+    - Only one lattice per running segment is alive, so memory doesn't grow with document length.
+    - Overlapping segments are stitched at the midpoint of the overlap.
+      Positions before the midpoint come from the left segment, and the others from the right segment.
+    - The score of a stitched route is the sum of its transition scores, the same as compute_wiki_node_probability()
+
+    * Params
+    - segment_size: the max number of positions in a segment
+    - overlap: the number of positions shared by neighbouring windows. Larger overlap makes boundaries more accurate.
+    - seq_boundary: end positions (exclusive) of sentences in seq_wiki_article_name. See make_segment_ranges()
+    - executor: concurrent.futures.Executor which decodes segments in parallel. If None, segments are decoded one by one.
+        - ThreadPoolExecutor: threads share entity_vector_model and similarity_cache. SimilarityCacheObject is thread-safe.
+        - ProcessPoolExecutor: segments and entity_vector_model are pickled into workers.
+          EntityVectorStore is opened again in a worker without copying vectors. similarity_cache must be None.
+    - max_candidates: the max number of candidates per position. Candidates are pruned in each segment.
+    - Other params are the same as compute_wiki_node_probability()
+
+    * Output
+    - list with one SequenceScore. Positions are ones which have candidates in entity_vector_model.
+    """
+    # type: (List[WikipediaArticleObject],Any,int,int,List[int],Any,str,int,float,int,Dict[str,float],Executor)->List[SequenceScore]
+    if isinstance(executor, ProcessPoolExecutor) and not similarity_cache is None:
+        raise Exception('similarity_cache can not be shared among processes. Use ThreadPoolExecutor or similarity_cache=None.')
+    vocabulary_words = get_vocabulary(entity_vector_model)
+    seq_position = [position for position, wiki_article_name in enumerate(seq_wiki_article_name)
+                    if not filter_out_of_vocabulary_word(wiki_article_name, vocabulary_words) is False]
+    # boundaries are moved onto positions after the filter
+    if not seq_boundary is None:
+        seq_boundary = [sum(1 for position in seq_position if position < boundary) for boundary in seq_boundary]
+    seq_wiki_article_name = [seq_wiki_article_name[position] for position in seq_position]
+    if len(seq_wiki_article_name) < 2:
+        with make_lattice_object(seq_wiki_article_name, entity_vector_model) as lattice_object:
+            return lattice_object.get_score_routes(top_k=1)
+
+    seq_segment = make_segment_ranges(len(seq_wiki_article_name), segment_size, overlap, seq_boundary)
+
+    decode_segment = partial(__decode_segment,
+                             entity_vector_model=entity_vector_model,
+                             similarity_cache=similarity_cache,
+                             decode_method=decode_method,
+                             beam_width=beam_width,
+                             score_threshold=score_threshold,
+                             max_candidates=max_candidates,
+                             candidate_prior=candidate_prior)
+    # a slice has only references to input objects. A worker gets its own segment, not the whole document
+    iterable_segment_article = (seq_wiki_article_name[start:end] for start, end in seq_segment)
+    if executor is None:
+        iterable_segment_route = map(decode_segment, iterable_segment_article)
+    else:
+        iterable_segment_route = executor.map(decode_segment, iterable_segment_article)
+
+    seq_label = []  # type: List[str]
+    seq_score = []  # type: List[float]
+    for segment_index, (segment_label, segment_score) in enumerate(iterable_segment_route):
+        start, end = seq_segment[segment_index]
+        keep_start = len(seq_label)
+        if segment_index + 1 < len(seq_segment):
+            next_start = seq_segment[segment_index + 1][0]
+            keep_end = (next_start + end) // 2 if next_start < end else end
+        else:
+            keep_end = end
+        if len(seq_label) > 0:
+            # the transition from the left segment into this segment
+            boundary_vectors = get_normalized_vector_matrix([seq_label[-1], segment_label[keep_start - start]], entity_vector_model)
+            seq_score.append(float(TRANSITION_SCORE_DTYPE(numpy.dot(boundary_vectors[0], boundary_vectors[1]))))
+        seq_label += segment_label[keep_start - start:keep_end - start]
+        seq_score += segment_score[keep_start - start:keep_end - start - 1]
+
+    seq_words = [WikipediaArticleView.from_article_object(wiki_article_obj, label)
+                 for wiki_article_obj, label in zip(seq_wiki_article_name, seq_label)]
+    seq_transition_score = [(seq_label[t], seq_label[t+1], seq_score[t]) for t in range(0, len(seq_label) - 1)]
+    return [SequenceScore(seq_words=seq_words,
+                          seq_transition_score=seq_transition_score,
+                          sequence_score=sum(seq_score))]
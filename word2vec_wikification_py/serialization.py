@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""Columnar binary format of SequenceScore batches and LatticeObject.
+
+A file (or bytes) is
+- MAGIC (8 bytes)
+- header size (little-endian uint64)
+- header in json. It has format name, meta data, and dtype/shape/offset of each array.
+- arrays. Each array starts at an offset aligned with ALIGNMENT bytes.
+
+Strings are kept in a string table, which is one utf-8 byte array and an offset array.
+Other fields are numpy arrays of string ids, offsets and scores, so a reader memory-maps a file and decodes only fields it accesses.
+"""
+from word2vec_wikification_py.models import WikipediaArticleObject, WikipediaArticleView, SequenceScore, LatticeObject, LatticeArrayObject
+from word2vec_wikification_py import init_logger
+from typing import List, Tuple, Dict, Any, Union, Iterator
+from numpy import ndarray
+import numpy
+import json
+import os
+import logging
+logger = logging.getLogger(name=init_logger.LOGGER_NAME)
+
+MAGIC = b'W2VWCOL1'
+ALIGNMENT = 64
+FORMAT_SEQUENCE_SCORE_BATCH = 'sequence_score_batch'
+FORMAT_LATTICE = 'lattice'
+# string id of a missing string, e.g. article_name=None
+NULL_STRING_ID = -1
+
+
+class StringTableObject(object):
+    """Read-only list-like object of strings on a utf-8 byte array. A string is decoded when it's accessed.
+    - string_bytes: uint8 array of concatenated utf-8 strings
+    - string_offsets: int64 array with n_string + 1 elements. The i-th string is string_bytes[string_offsets[i]:string_offsets[i+1]]
+    """
+    __slots__ = ['string_bytes', 'string_offsets']
+
+    def __init__(self, string_bytes:ndarray, string_offsets:ndarray):
+        self.string_bytes = string_bytes
+        self.string_offsets = string_offsets
+
+    def __len__(self)->int:
+        return len(self.string_offsets) - 1
+
+    def __getitem__(self, string_id:int)->str:
+        if string_id == NULL_STRING_ID:
+            return None
+        return self.string_bytes[self.string_offsets[string_id]:self.string_offsets[string_id+1]].tobytes().decode('utf-8')
+
+    def __iter__(self)->Iterator[str]:
+        for string_id in range(0, len(self)):
+            yield self[string_id]
+
+
+class StringTableBuilder(object):
+    """It assigns a string id to each distinct string, and makes arrays of StringTableObject.
+    """
+    def __init__(self):
+        self.string2id = {}  # type: Dict[str,int]
+        self.seq_string = []  # type: List[str]
+
+    def add_string(self, string:str)->int:
+        if string is None:
+            return NULL_STRING_ID
+        if not string in self.string2id:
+            self.string2id[string] = len(self.seq_string)
+            self.seq_string.append(string)
+        return self.string2id[string]
+
+    def to_arrays(self)->Tuple[ndarray, ndarray]:
+        seq_encoded_string = [string.encode('utf-8') for string in self.seq_string]
+        string_offsets = numpy.zeros(len(seq_encoded_string) + 1, dtype='<i8')
+        numpy.cumsum([len(encoded_string) for encoded_string in seq_encoded_string], out=string_offsets[1:])
+        return (numpy.frombuffer(b''.join(seq_encoded_string), dtype=numpy.uint8), string_offsets)
+
+
+def __align(offset:int)->int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def encode_arrays(format_name:str, dict_array:Dict[str, ndarray], meta:Dict[str,Any]=None)->bytes:
+    """* What you can do
+    - You encode arrays into the columnar binary format. Arrays are written in little-endian.
+    """
+    header = {'format': format_name, 'meta': meta or {}, 'arrays': {}}
+    seq_array = []  # type: List[Tuple[int, ndarray]]
+    offset = 0
+    for array_name, array in dict_array.items():
+        array = numpy.ascontiguousarray(array, dtype=numpy.asarray(array).dtype.newbyteorder('<'))
+        offset = __align(offset)
+        header['arrays'][array_name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        seq_array.append((offset, array))
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = __align(len(MAGIC) + 8 + len(header_bytes))
+    buffer = bytearray(data_start + offset)
+    buffer[:len(MAGIC)] = MAGIC
+    buffer[len(MAGIC):len(MAGIC) + 8] = numpy.array([data_start], dtype='<u8').tobytes()
+    buffer[len(MAGIC) + 8:len(MAGIC) + 8 + len(header_bytes)] = header_bytes
+    for array_offset, array in seq_array:
+        buffer[data_start + array_offset:data_start + array_offset + array.nbytes] = array.tobytes()
+    return bytes(buffer)
+
+
+def decode_arrays(source:Union[str, bytes, bytearray, memoryview], format_name:str=None)->Tuple[Dict[str,Any], Dict[str, ndarray]]:
+    """* What you can do
+    - You get (header, dict of array_name -> array) of the columnar binary format without copy.
+
+    * Params
+    - source: a path to a file, or bytes. A file is memory-mapped, so arrays are read from disk when they're accessed.
+    - format_name: if given, it raises Exception when the format of source is different.
+    """
+    if isinstance(source, str):
+        raw_buffer = numpy.memmap(source, dtype=numpy.uint8, mode='r')
+    else:
+        raw_buffer = numpy.frombuffer(source, dtype=numpy.uint8)
+    if raw_buffer[:len(MAGIC)].tobytes() != MAGIC:
+        raise Exception('It is not a columnar binary of word2vec_wikification_py. magic={}'.format(raw_buffer[:len(MAGIC)].tobytes()))
+    data_start = int(raw_buffer[len(MAGIC):len(MAGIC) + 8].view('<u8')[0])
+    header = json.loads(raw_buffer[len(MAGIC) + 8:data_start].tobytes().rstrip(b'\x00').decode('utf-8'))
+    if not format_name is None and header['format'] != format_name:
+        raise Exception('The format is {}, not {}'.format(header['format'], format_name))
+
+    dict_array = {}
+    for array_name, array_info in header['arrays'].items():
+        dtype = numpy.dtype(array_info['dtype'])
+        n_element = int(numpy.prod(array_info['shape']))
+        start = data_start + array_info['offset']
+        dict_array[array_name] = raw_buffer[start:start + n_element * dtype.itemsize].view(dtype).reshape(array_info['shape'])
+    return (header, dict_array)
+
+
+def __write_file(binary:bytes, path_file:str):
+    path_temporary_file = path_file + '.tmp'
+    with open(path_temporary_file, 'wb') as f:
+        f.write(binary)
+    os.replace(path_temporary_file, path_file)
+
+
+def __offsets_of(seq_length:List[int])->ndarray:
+    offsets = numpy.zeros(len(seq_length) + 1, dtype='<i8')
+    numpy.cumsum(seq_length, out=offsets[1:])
+    return offsets
+
+
+def dumps_sequence_scores(seq_sequence_score_batch:List[List[SequenceScore]])->bytes:
+    """* What you can do
+    - You encode results of sentences, e.g. outputs of predict_japanese_wiki_names_batch(), into bytes.
+    - Only fields of routes are encoded. Routes from a lattice are materialized here.
+
+    * Params
+    - seq_sequence_score_batch: list of SequenceScore lists. The i-th list is the result of the i-th sentence.
+    """
+    string_table = StringTableBuilder()
+    seq_n_route = []  # type: List[int]
+    seq_route_score = []  # type: List[float]
+    seq_n_word = []  # type: List[int]
+    seq_n_transition = []  # type: List[int]
+    seq_page_title_id = []  # type: List[int]
+    seq_article_name_id = []  # type: List[int]
+    seq_n_candidate = []  # type: List[int]
+    seq_candidate_id = []  # type: List[int]
+    seq_transition_label_id = []  # type: List[Tuple[int, int]]
+    seq_transition_score = []  # type: List[float]
+
+    for seq_sequence_score in seq_sequence_score_batch:
+        seq_n_route.append(len(seq_sequence_score))
+        for sequence_score_obj in seq_sequence_score:
+            seq_route_score.append(sequence_score_obj.sequence_score)
+            seq_n_word.append(len(sequence_score_obj.seq_words))
+            for wiki_article_obj in sequence_score_obj.seq_words:
+                if isinstance(wiki_article_obj, str):
+                    # a route of a lattice without seq_wiki_article_name has only labels
+                    seq_page_title_id.append(NULL_STRING_ID)
+                    seq_article_name_id.append(string_table.add_string(wiki_article_obj))
+                    seq_n_candidate.append(0)
+                else:
+                    seq_page_title_id.append(string_table.add_string(wiki_article_obj.page_title))
+                    seq_article_name_id.append(string_table.add_string(wiki_article_obj.article_name))
+                    seq_n_candidate.append(len(wiki_article_obj.candidate_article_name))
+                    seq_candidate_id += [string_table.add_string(candidate) for candidate in wiki_article_obj.candidate_article_name]
+            seq_n_transition.append(len(sequence_score_obj.seq_transition_score))
+            for label_t, label_t_plus, transition_score in sequence_score_obj.seq_transition_score:
+                seq_transition_label_id.append((string_table.add_string(label_t), string_table.add_string(label_t_plus)))
+                seq_transition_score.append(transition_score)
+
+    string_bytes, string_offsets = string_table.to_arrays()
+    dict_array = {
+        'string_bytes': string_bytes,
+        'string_offsets': string_offsets,
+        'sentence_offsets': __offsets_of(seq_n_route),
+        'route_score': numpy.array(seq_route_score, dtype='<f8'),
+        'word_offsets': __offsets_of(seq_n_word),
+        'page_title_id': numpy.array(seq_page_title_id, dtype='<i4'),
+        'article_name_id': numpy.array(seq_article_name_id, dtype='<i4'),
+        'candidate_offsets': __offsets_of(seq_n_candidate),
+        'candidate_id': numpy.array(seq_candidate_id, dtype='<i4'),
+        'transition_offsets': __offsets_of(seq_n_transition),
+        'transition_label_id': numpy.array(seq_transition_label_id, dtype='<i4').reshape(len(seq_transition_label_id), 2),
+        'transition_score': numpy.array(seq_transition_score, dtype='<f8'),
+    }
+    return encode_arrays(FORMAT_SEQUENCE_SCORE_BATCH, dict_array, meta={'n_sentence': len(seq_n_route), 'n_route': len(seq_route_score)})
+
+
+def dump_sequence_scores(seq_sequence_score_batch:List[List[SequenceScore]], path_file:str):
+    """* What you can do
+    - You write results of sentences into a file. See dumps_sequence_scores()
+    """
+    __write_file(dumps_sequence_scores(seq_sequence_score_batch), path_file)
+
+
+class SequenceScoreBatchReader(object):
+    """Lazy reader of dumps_sequence_scores() output.
+    - reader[i] is a list of SequenceScore of the i-th sentence.
+      seq_words and seq_transition_score of a SequenceScore are decoded when they're accessed.
+    - get_route_scores() and get_article_names() read columns without making SequenceScore.
+    """
+    def __init__(self, source:Union[str, bytes]):
+        """* Params
+        - source: a path to a file, or bytes. A file is memory-mapped.
+        """
+        self.header, self.dict_array = decode_arrays(source, FORMAT_SEQUENCE_SCORE_BATCH)
+        self.string_table = StringTableObject(self.dict_array['string_bytes'], self.dict_array['string_offsets'])
+
+    def __len__(self)->int:
+        return len(self.dict_array['sentence_offsets']) - 1
+
+    def __getitem__(self, sentence_index:int)->List[SequenceScore]:
+        return [SequenceScore.from_route(lattice_object=self, index_tuple_route=route_index, sequence_score=float(route_score))
+                for route_index, route_score in zip(self.get_route_range(sentence_index), self.get_route_scores(sentence_index))]
+
+    def __iter__(self)->Iterator[List[SequenceScore]]:
+        for sentence_index in range(0, len(self)):
+            yield self[sentence_index]
+
+    def get_route_range(self, sentence_index:int)->range:
+        """* What you can do
+        - You get route indices of a sentence. A route index is a row of route_score column.
+        """
+        if not -len(self) <= sentence_index < len(self):
+            raise IndexError('sentence_index is out of range. sentence_index={}'.format(sentence_index))
+        sentence_offsets = self.dict_array['sentence_offsets']
+        return range(int(sentence_offsets[sentence_index]), int(sentence_offsets[sentence_index+1]))
+
+    def get_route_scores(self, sentence_index:int)->ndarray:
+        route_range = self.get_route_range(sentence_index)
+        return self.dict_array['route_score'][route_range.start:route_range.stop]
+
+    def get_article_names(self, route_index:int)->List[str]:
+        """* What you can do
+        - You get disambiguated article names of a route. Only these strings are decoded.
+        """
+        word_offsets = self.dict_array['word_offsets']
+        return [self.string_table[string_id]
+                for string_id in self.dict_array['article_name_id'][word_offsets[route_index]:word_offsets[route_index+1]].tolist()]
+
+    def materialize_route(self, route_index:int)->Tuple[List[WikipediaArticleObject], List[Tuple[str, str, float]]]:
+        """* What you can do
+        - You decode seq_words and seq_transition_score of a route. It's called by SequenceScore.materialize()
+        """
+        word_offsets = self.dict_array['word_offsets']
+        candidate_offsets = self.dict_array['candidate_offsets']
+        candidate_id = self.dict_array['candidate_id']
+        seq_words = []  # type: List[Union[WikipediaArticleObject, str]]
+        for word_index in range(int(word_offsets[route_index]), int(word_offsets[route_index+1])):
+            page_title_id = int(self.dict_array['page_title_id'][word_index])
+            article_name = self.string_table[int(self.dict_array['article_name_id'][word_index])]
+            if page_title_id == NULL_STRING_ID:
+                seq_words.append(article_name)
+            else:
+                seq_candidate = [self.string_table[string_id]
+                                 for string_id in candidate_id[candidate_offsets[word_index]:candidate_offsets[word_index+1]].tolist()]
+                seq_words.append(WikipediaArticleView(self.string_table[page_title_id], seq_candidate, article_name))
+
+        transition_offsets = self.dict_array['transition_offsets']
+        transition_start, transition_end = int(transition_offsets[route_index]), int(transition_offsets[route_index+1])
+        seq_transition_score = [(self.string_table[label_t_id], self.string_table[label_t_plus_id], transition_score)
+                                for (label_t_id, label_t_plus_id), transition_score
+                                in zip(self.dict_array['transition_label_id'][transition_start:transition_end].tolist(),
+                                       self.dict_array['transition_score'][transition_start:transition_end].tolist())]
+        return (seq_words, seq_transition_score)
+
+
+def loads_sequence_scores(source:Union[str, bytes])->SequenceScoreBatchReader:
+    return SequenceScoreBatchReader(source)
+
+
+def dumps_lattice(lattice_object:LatticeObject)->bytes:
+    """* What you can do
+    - You encode a lattice into bytes. Transition scores are written as they are, so it's restored without the entity vector model.
+    - The lattice must have lattice_array, e.g. a lattice from make_lattice_object()
+    """
+    lattice_array = lattice_object.lattice_array
+    if lattice_array is None:
+        raise Exception('Only a lattice with lattice_array can be serialized. The lattice is closed or made from edges.')
+    # rows of a lazy lattice which are not computed yet are computed here
+    lattice_array.fill_scores()
+
+    string_table = StringTableBuilder()
+    label_id = numpy.array([string_table.add_string(label) for label in lattice_array.label_table], dtype='<i4')
+    dict_array = {
+        'score_buffer': numpy.asarray(lattice_array.score_buffer),
+        'score_offsets': numpy.asarray(lattice_array.score_offsets, dtype='<i8'),
+        'state_offsets': numpy.asarray(lattice_array.state_offsets, dtype='<i8'),
+        'label_id': label_id,
+    }
+    seq_wiki_article_name = lattice_object.seq_wiki_article_name
+    if not seq_wiki_article_name is None:
+        dict_array['page_title_id'] = numpy.array([string_table.add_string(wiki_article_obj.page_title)
+                                                   for wiki_article_obj in seq_wiki_article_name], dtype='<i4')
+        dict_array['candidate_offsets'] = __offsets_of([len(wiki_article_obj.candidate_article_name)
+                                                        for wiki_article_obj in seq_wiki_article_name])
+        dict_array['candidate_id'] = numpy.array([string_table.add_string(candidate)
+                                                  for wiki_article_obj in seq_wiki_article_name
+                                                  for candidate in wiki_article_obj.candidate_article_name], dtype='<i4')
+    dict_array['string_bytes'], dict_array['string_offsets'] = string_table.to_arrays()
+    return encode_arrays(FORMAT_LATTICE, dict_array, meta={'n_position': lattice_array.n_position})
+
+
+def dump_lattice(lattice_object:LatticeObject, path_file:str):
+    """* What you can do
+    - You write a lattice into a file. See dumps_lattice()
+    """
+    __write_file(dumps_lattice(lattice_object), path_file)
+
+
+class LabelTableObject(object):
+    """Read-only list-like object of labels. The i-th label is string_table[label_id[i]]
+    """
+    __slots__ = ['label_id', 'string_table']
+
+    def __init__(self, label_id:ndarray, string_table:StringTableObject):
+        self.label_id = label_id
+        self.string_table = string_table
+
+    def __len__(self)->int:
+        return len(self.label_id)
+
+    def __getitem__(self, index:int)->str:
+        return self.string_table[int(self.label_id[index])]
+
+    def __iter__(self)->Iterator[str]:
+        for index in range(0, len(self)):
+            yield self[index]
+
+
+class ArticleTableObject(object):
+    """Read-only list-like object of input articles of a lattice. The i-th article is made from the arrays when it's accessed.
+    An article is WikipediaArticleView, because a changed article would be lost at the next access.
+    """
+    __slots__ = ['page_title_id', 'candidate_offsets', 'candidate_id', 'string_table']
+
+    def __init__(self, page_title_id:ndarray, candidate_offsets:ndarray, candidate_id:ndarray, string_table:StringTableObject):
+        self.page_title_id = page_title_id
+        self.candidate_offsets = candidate_offsets
+        self.candidate_id = candidate_id
+        self.string_table = string_table
+
+    def __len__(self)->int:
+        return len(self.page_title_id)
+
+    def __getitem__(self, position:int)->WikipediaArticleView:
+        if position < 0: position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError('position is out of range. position={}'.format(position))
+        candidate_start, candidate_end = int(self.candidate_offsets[position]), int(self.candidate_offsets[position+1])
+        return WikipediaArticleView(page_title=self.string_table[int(self.page_title_id[position])],
+                                    candidate_article_name=[self.string_table[string_id] for string_id
+                                                            in self.candidate_id[candidate_start:candidate_end].tolist()])
+
+    def __iter__(self)->Iterator[WikipediaArticleView]:
+        for position in range(0, len(self)):
+            yield self[position]
+
+
+def loads_lattice(source:Union[str, bytes])->LatticeObject:
+    """* What you can do
+    - You restore LatticeObject from dumps_lattice() output.
+    - Scores are not copied. With a path, the score buffer is memory-mapped.
+    - Labels and input articles are decoded when they're accessed. See LabelTableObject and ArticleTableObject
+    """
+    header, dict_array = decode_arrays(source, FORMAT_LATTICE)
+    string_table = StringTableObject(dict_array['string_bytes'], dict_array['string_offsets'])
+    lattice_array = LatticeArrayObject(score_buffer=dict_array['score_buffer'],
+                                       score_offsets=dict_array['score_offsets'],
+                                       state_offsets=dict_array['state_offsets'],
+                                       label_table=LabelTableObject(dict_array['label_id'], string_table))
+    if 'page_title_id' in dict_array:
+        seq_wiki_article_name = ArticleTableObject(page_title_id=dict_array['page_title_id'],
+                                                   candidate_offsets=dict_array['candidate_offsets'],
+                                                   candidate_id=dict_array['candidate_id'],
+                                                   string_table=string_table)
+    else:
+        seq_wiki_article_name = None
+    return LatticeObject(seq_wiki_article_name=seq_wiki_article_name, lattice_array=lattice_array)